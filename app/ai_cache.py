@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import UTC, datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from .ai_utils import METADATA_MODEL, METADATA_PROMPT_VERSION
+from .metrics import AI_CACHE_LOOKUPS
+from .models import MetadataCacheEntry
+
+# Game metadata barely changes, so looked-up titles are reused for a month
+# before the model is asked again (seconds)
+METADATA_CACHE_TTL = int(os.getenv("METADATA_CACHE_TTL", str(30 * 86400)))
+# Recommendation results remembered per worker (0 disables the cache)
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "256"))
+
+_APOSTROPHES = re.compile(r"['’`]")
+_SEPARATORS = re.compile(r"[\W_]+")
+
+# Recommendation cache key -> JSON of the recommendations, least recent first
+_recommendation_cache: "OrderedDict[str, str]" = OrderedDict()
+_recommendation_cache_lock = threading.Lock()
+
+
+def normalize_title(title: str) -> str:
+    """Fold case, accents, punctuation and whitespace so title variants match"""
+    decomposed = unicodedata.normalize("NFKD", title)
+    folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    folded = _APOSTROPHES.sub("", folded.casefold())
+    return " ".join(_SEPARATORS.sub(" ", folded).split())
+
+
+def _lookup(db: Session, key: str):
+    return (
+        db.query(MetadataCacheEntry)
+        .filter(
+            MetadataCacheEntry.normalized_title == key,
+            MetadataCacheEntry.model == METADATA_MODEL,
+            MetadataCacheEntry.prompt_version == METADATA_PROMPT_VERSION,
+        )
+        .first()
+    )
+
+
+def get_cached_metadata(db: Session, title: str) -> Optional[Dict[str, str]]:
+    """Unexpired metadata cached for title by the current model and prompt"""
+    key = normalize_title(title)
+    entry = _lookup(db, key) if key else None
+    # SQLite hands back naive datetimes; all stored times are UTC
+    if entry is not None and entry.expires_at.replace(tzinfo=UTC) > datetime.now(UTC):
+        AI_CACHE_LOOKUPS.inc(operation="metadata", result="hit")
+        return json.loads(entry.data)
+    AI_CACHE_LOOKUPS.inc(operation="metadata", result="miss")
+    return None
+
+
+def cache_metadata(db: Session, title: str, metadata: Dict[str, str]):
+    """
+    Add metadata for title to the session, replacing any earlier entry.
+
+    The metadata is also cached under the corrected title it contains, which
+    is what later re-autofills of the game look up. Only complete answers
+    (with a title) are cached; empty or unparseable responses are retried
+    next time. The caller commits.
+    """
+    if not metadata.get("title"):
+        return
+
+    now = datetime.now(UTC)
+    keys = {normalize_title(title), normalize_title(metadata["title"])}
+    for key in sorted(keys - {""}):
+        entry = _lookup(db, key)
+        if entry is None:
+            entry = MetadataCacheEntry(
+                normalized_title=key,
+                model=METADATA_MODEL,
+                prompt_version=METADATA_PROMPT_VERSION,
+            )
+            db.add(entry)
+        entry.data = json.dumps(metadata)
+        entry.created_at = now
+        entry.expires_at = now + timedelta(seconds=METADATA_CACHE_TTL)
+
+
+def recommendation_cache_key(
+    query: str, games: List[Dict], max_recommendations: int
+) -> str:
+    """
+    Cache key for recommending from games for query.
+
+    The key covers the normalized query and a hash of everything the prompt
+    says about the games, so adding, removing or editing a candidate game
+    gives a new key and stale results are never served; they just age out.
+    """
+    games_hash = hashlib.sha256(
+        json.dumps(games, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return "|".join([normalize_title(query), str(max_recommendations), games_hash])
+
+
+def get_cached_recommendations(key: str) -> Optional[List[Dict]]:
+    """Recommendations cached under key, as a fresh copy"""
+    with _recommendation_cache_lock:
+        data = _recommendation_cache.get(key)
+        if data is not None:
+            _recommendation_cache.move_to_end(key)
+    AI_CACHE_LOOKUPS.inc(
+        operation="recommendations", result="miss" if data is None else "hit"
+    )
+    return None if data is None else json.loads(data)
+
+
+def cache_recommendations(key: str, recommendations: List[Dict]):
+    """Remember recommendations under key, evicting the least recently used.
+
+    Empty results (usually a failed call) are not cached.
+    """
+    if not recommendations or RECOMMENDATION_CACHE_SIZE <= 0:
+        return
+    data = json.dumps(recommendations)
+    with _recommendation_cache_lock:
+        _recommendation_cache[key] = data
+        _recommendation_cache.move_to_end(key)
+        while len(_recommendation_cache) > RECOMMENDATION_CACHE_SIZE:
+            _recommendation_cache.popitem(last=False)
+
+
+def clear_recommendation_cache():
+    """Forget all cached recommendations"""
+    with _recommendation_cache_lock:
+        _recommendation_cache.clear()
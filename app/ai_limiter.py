@@ -0,0 +1,131 @@
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+
+# Limits for OpenAI calls, per worker process
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "8"))
+AI_QUEUE_TIMEOUT = float(os.getenv("AI_QUEUE_TIMEOUT", "10"))
+AI_RATE_PER_MINUTE = float(os.getenv("AI_RATE_PER_MINUTE", "60"))
+AI_RATE_BURST = int(os.getenv("AI_RATE_BURST", "10"))
+
+
+class AIBusyError(Exception):
+    """Raised when an AI call is rejected instead of queued"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__("AI service is busy")
+        self.retry_after = max(int(retry_after), 1)
+
+
+class TokenBucket:
+    """Token bucket that hands out reservations instead of blocking"""
+
+    def __init__(self, rate_per_second: float, capacity: int, clock=time.monotonic):
+        self.rate = rate_per_second
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token, returning how many seconds to wait before using it"""
+        self._refill()
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def cancel(self):
+        """Return a token taken by reserve() that will not be used"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AILimiter:
+    """
+    Per-process limiter for OpenAI calls.
+
+    At most max_concurrency calls run at once and calls are started no
+    faster than the token bucket allows. Callers that cannot start straight
+    away wait in a queue of at most max_queue; anyone beyond that, or who
+    would wait longer than queue_timeout, gets AIBusyError immediately so
+    AI traffic cannot tie up every worker.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        max_queue: int = AI_MAX_QUEUE,
+        queue_timeout: float = AI_QUEUE_TIMEOUT,
+        rate_per_minute: float = AI_RATE_PER_MINUTE,
+        burst: int = AI_RATE_BURST,
+    ):
+        self.max_concurrency = max(max_concurrency, 1)
+        self.max_queue = max(max_queue, 0)
+        self.queue_timeout = queue_timeout
+        self.bucket = (
+            TokenBucket(rate_per_minute / 60, burst) if rate_per_minute > 0 else None
+        )
+        self.waiting = 0
+        self._loop = None
+        self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives belong to one event loop; recreate on a new loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one AI call slot for the duration of the block"""
+        semaphore = self._get_semaphore()
+
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            raise AIBusyError(retry_after=self.queue_timeout)
+
+        delay = self.bucket.reserve() if self.bucket else 0.0
+        if delay > self.queue_timeout:
+            self.bucket.cancel()
+            raise AIBusyError(retry_after=math.ceil(delay))
+
+        self.waiting += 1
+        try:
+            deadline = time.monotonic() + self.queue_timeout
+            if delay:
+                await asyncio.sleep(delay)
+            if semaphore.locked():
+                await asyncio.wait_for(
+                    semaphore.acquire(), timeout=max(deadline - time.monotonic(), 0)
+                )
+            else:
+                await semaphore.acquire()
+        except asyncio.TimeoutError:
+            if self.bucket:
+                self.bucket.cancel()
+            raise AIBusyError(retry_after=self.queue_timeout)
+        except BaseException:
+            # Cancelled while queued (e.g. the client went away): the call
+            # never starts, so give its token back before re-raising
+            if self.bucket:
+                self.bucket.cancel()
+            raise
+        finally:
+            self.waiting -= 1
+
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+ai_limiter = AILimiter()
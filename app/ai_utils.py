@@ -1,13 +1,271 @@
+import asyncio
 import json
 import os
-from typing import Dict, List
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, TypeVar
 
-from openai import OpenAI
+from .ai_limiter import AIBusyError, ai_limiter
+from .metrics import (
+    AI_CALL_ERRORS,
+    AI_CALL_RETRIES,
+    AI_CALL_SECONDS,
+    AI_CALL_TOKENS,
+    AI_PROMPT_TRUNCATIONS,
+    AI_TOKENS,
+    current_request,
+)
+from .tracing import SPAN_KIND_CLIENT, current_span, traced
 
-# Configure OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Model and prompt revision for metadata lookups. Cached metadata is keyed on
+# both, so bump METADATA_PROMPT_VERSION whenever the prompt changes.
+METADATA_MODEL = "gpt-3.5-turbo"
+METADATA_PROMPT_VERSION = 2
 
+# Timeouts for a single OpenAI request (seconds)
+AI_CONNECT_TIMEOUT = float(os.getenv("AI_CONNECT_TIMEOUT", "5"))
+AI_READ_TIMEOUT = float(os.getenv("AI_READ_TIMEOUT", "30"))
+# Retries after a transient failure, with full-jitter exponential backoff
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "0.5"))
+AI_RETRY_MAX_DELAY = float(os.getenv("AI_RETRY_MAX_DELAY", "8"))
+# How often a waiting AI request checks whether its HTTP client went away
+AI_DISCONNECT_POLL = float(os.getenv("AI_DISCONNECT_POLL", "0.25"))
 
+# Token budget for the game table in a recommendation prompt. Games past it
+# (the weakest candidates) are left out; 0 disables the budget.
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "1500"))
+# Rough characters per token for English prompt text
+CHARS_PER_TOKEN = 4
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits, server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# System prompt shared by single and batch metadata lookups
+METADATA_INSTRUCTIONS = (
+    "You are a board game expert. Answer in JSON. Game metadata objects have"
+    " these fields: title (the official title, with typos and capitalization"
+    ' fixed), player_count (e.g. "2-4 players"), game_type (comma-separated,'
+    ' e.g. "Strategy, Deck Building"), playtime (e.g. "30-60 minutes"),'
+    ' complexity ("Easy", "Medium" or "Hard"), setup_time (e.g. "5-10'
+    ' minutes"), game_elements (comma-separated, e.g. "Dice, Cards, Board")'
+    " and description (brief)."
+)
+# Instructions shared by the recommendation prompts
+RECOMMEND_INSTRUCTIONS = (
+    "You are a board game recommendation expert. Provide helpful, accurate"
+    " recommendations."
+)
+
+# Columns of the game table in recommendation prompts
+GAME_TABLE_COLUMNS = ("title", "player_count", "game_type", "playtime", "complexity")
+GAME_TABLE_HEADER = "title|players|type|playtime|complexity"
+
+T = TypeVar("T")
+
+# Async OpenAI client, created on first use by get_client(). Importing the
+# OpenAI SDK is a large share of startup time, so workers that never make an
+# AI call (and test runs) don't pay for it.
+client = None
+
+
+class ClientDisconnected(Exception):
+    """Raised when the HTTP client goes away while an AI call is running"""
+
+
+def get_client():
+    """The shared AsyncOpenAI client, constructing it on first use"""
+    global client
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            timeout=httpx.Timeout(AI_READ_TIMEOUT, connect=AI_CONNECT_TIMEOUT),
+            # Retries are handled by _chat_completion so that each attempt
+            # takes a limiter slot and backoff is jittered across workers
+            max_retries=0,
+        )
+    return client
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed OpenAI call may succeed if retried"""
+    from openai import APIConnectionError, APIStatusError
+
+    if isinstance(error, APIConnectionError):  # includes timeouts
+        return True
+    return isinstance(error, APIStatusError) and (
+        error.status_code in RETRYABLE_STATUSES
+    )
+
+
+def _retry_delay(attempt: int) -> float:
+    """Full-jitter backoff: uniform in [0, min(max, base * 2^attempt)]"""
+    return random.uniform(0, min(AI_RETRY_MAX_DELAY, AI_RETRY_BASE_DELAY * 2**attempt))
+
+
+async def _chat_completion(operation: str, **kwargs):
+    """Call the chat completions API inside a limiter slot, recording metrics.
+
+    Transient failures are retried up to AI_MAX_RETRIES times; the limiter
+    slot is given back while waiting between attempts.
+
+    Raises AIBusyError when the limiter rejects the call.
+    """
+    attempt = 0
+    while True:
+        async with ai_limiter.slot():
+            start = time.perf_counter()
+            try:
+                response = await get_client().chat.completions.create(**kwargs)
+                break
+            except Exception as e:
+                AI_CALL_ERRORS.inc(operation=operation)
+                if attempt >= AI_MAX_RETRIES or not _is_transient(e):
+                    raise
+            finally:
+                AI_CALL_SECONDS.observe(
+                    time.perf_counter() - start, operation=operation
+                )
+        AI_CALL_RETRIES.inc(operation=operation)
+        await asyncio.sleep(_retry_delay(attempt))
+        attempt += 1
+
+    _record_usage(operation, getattr(response, "usage", None))
+    return response
+
+
+def _record_usage(operation: str, usage):
+    """Count a call's token usage in the metrics, request stats and span"""
+    stats = current_request.get()
+    span = current_span.get()
+    for field in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, field, None)
+        if not isinstance(tokens, int):
+            continue
+        kind = field.split("_")[0]
+        AI_TOKENS.inc(tokens, operation=operation, kind=kind)
+        AI_CALL_TOKENS.observe(tokens, operation=operation, kind=kind)
+        if stats is not None:
+            stats.ai_tokens += tokens
+        if span is not None:
+            span.set_attribute(f"ai.{field}", tokens)
+
+
+async def _stream_chat_completion(operation: str, **kwargs) -> AsyncIterator[str]:
+    """Stream the content of a chat completion, holding a limiter slot throughout.
+
+    Only opening the stream is retried (as in _chat_completion); a failure
+    after content has been yielded propagates to the caller.
+
+    Raises AIBusyError when the limiter rejects the call.
+    """
+    attempt = 0
+    while True:
+        async with ai_limiter.slot():
+            start = time.perf_counter()
+            try:
+                stream = await get_client().chat.completions.create(
+                    stream=True, stream_options={"include_usage": True}, **kwargs
+                )
+            except Exception as e:
+                AI_CALL_SECONDS.observe(
+                    time.perf_counter() - start, operation=operation
+                )
+                AI_CALL_ERRORS.inc(operation=operation)
+                if attempt >= AI_MAX_RETRIES or not _is_transient(e):
+                    raise
+            else:
+                try:
+                    async for chunk in stream:
+                        # The last chunk carries the usage and no choices
+                        _record_usage(operation, getattr(chunk, "usage", None))
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            yield chunk.choices[0].delta.content
+                except Exception:
+                    AI_CALL_ERRORS.inc(operation=operation)
+                    raise
+                finally:
+                    AI_CALL_SECONDS.observe(
+                        time.perf_counter() - start, operation=operation
+                    )
+                return
+        AI_CALL_RETRIES.inc(operation=operation)
+        await asyncio.sleep(_retry_delay(attempt))
+        attempt += 1
+
+
+class JSONObjectParser:
+    """
+    Incrementally pick complete JSON objects out of streamed text.
+
+    Feed it the model's output as it arrives; every outermost {...} is
+    returned as soon as its closing brace is seen, whether the objects sit
+    in a JSON array or not. Braces inside strings are ignored.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, text: str) -> List[Any]:
+        """The objects completed by text, in order"""
+        objects = []
+        for char in text:
+            if self._depth:
+                self._buffer += char
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = self._depth > 0
+            elif char == "{":
+                if not self._depth:
+                    self._buffer = char
+                self._depth += 1
+            elif char == "}" and self._depth:
+                self._depth -= 1
+                if not self._depth:
+                    try:
+                        objects.append(json.loads(self._buffer))
+                    except json.JSONDecodeError:
+                        pass
+                    self._buffer = ""
+        return objects
+
+
+async def cancel_on_disconnect(
+    request, awaitable: Awaitable[T], poll_interval: Optional[float] = None
+) -> T:
+    """
+    Await an AI call, cancelling it if the HTTP client disconnects first.
+
+    Raises ClientDisconnected when the client went away, so nobody waits on
+    (or pays for) a completion whose answer can no longer be delivered.
+    """
+    task = asyncio.ensure_future(awaitable)
+    interval = AI_DISCONNECT_POLL if poll_interval is None else poll_interval
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise ClientDisconnected()
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+@traced("get_game_metadata", kind=SPAN_KIND_CLIENT)
 async def get_game_metadata(game_title: str) -> Dict[str, str]:
     """
     Use OpenAI GPT to fetch metadata for a board game based on its title.
@@ -17,32 +275,24 @@ async def get_game_metadata(game_title: str) -> Dict[str, str]:
 
     Returns:
         Dictionary containing game metadata including corrected title
+
+    Raises:
+        AIBusyError: if too many AI calls are already running or queued
     """
     if not os.getenv("OPENAI_API_KEY"):
         return {}
 
     try:
-        prompt = f"""
-        Provide metadata for the board game \"{game_title}\". Return the information in JSON format with these fields:
-        - title: the correct, official title of the game (correct any typos, capitalization, or formatting issues)
-        - player_count: typical player count (e.g., \"2-4 players\")
-        - game_type: category/genre as comma-separated string (e.g., \"Strategy, Deck Building\")
-        - playtime: typical play time (e.g., \"30-60 minutes\")
-        - complexity: complexity level (e.g., \"Easy\", \"Medium\", \"Hard\")
-        - setup_time: typical setup time (e.g., \"5-10 minutes\")
-        - game_elements: main elements used in the game as comma-separated string (e.g., \"Dice, Cards, Board, Tokens\")
-        - description: brief description of the game
-        
-        If you don't know the game, return an empty JSON object {{}}.
-        """
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        prompt = (
+            f'Metadata for the board game "{game_title}" as one JSON object.'
+            " If you don't know the game, return {}."
+        )
+
+        response = await _chat_completion(
+            "metadata",
+            model=METADATA_MODEL,
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are a board game expert. Provide accurate metadata in JSON format.",
-                },
+                {"role": "system", "content": METADATA_INSTRUCTIONS},
                 {"role": "user", "content": prompt},
             ],
             max_tokens=300,
@@ -53,18 +303,7 @@ async def get_game_metadata(game_title: str) -> Dict[str, str]:
 
         # Try to parse JSON response
         try:
-            metadata = json.loads(content)
-
-            # Convert any list fields to comma-separated strings
-            if "game_type" in metadata and isinstance(metadata["game_type"], list):
-                metadata["game_type"] = ", ".join(metadata["game_type"])
-
-            if "game_elements" in metadata and isinstance(
-                metadata["game_elements"], list
-            ):
-                metadata["game_elements"] = ", ".join(metadata["game_elements"])
-
-            return metadata
+            return _join_list_fields(json.loads(content))
         except json.JSONDecodeError:
             # Fallback: return basic structure
             return {
@@ -78,11 +317,142 @@ async def get_game_metadata(game_title: str) -> Dict[str, str]:
                 "description": content,
             }
 
+    except AIBusyError:
+        raise
     except Exception as e:
         print(f"Error fetching game metadata: {e}")
         return {}
 
 
+def _join_list_fields(metadata: Dict) -> Dict:
+    """Convert game_type and game_elements lists to comma-separated strings"""
+    for key in ("game_type", "game_elements"):
+        if key in metadata and isinstance(metadata[key], list):
+            metadata[key] = ", ".join(metadata[key])
+    return metadata
+
+
+@traced("get_batch_game_metadata", kind=SPAN_KIND_CLIENT)
+async def get_batch_game_metadata(game_titles: List[str]) -> List[Dict[str, str]]:
+    """
+    Fetch metadata for several board games with a single AI request.
+
+    Args:
+        game_titles: Titles to look up (a handful per call)
+
+    Returns:
+        One metadata dictionary per title, in the same order; empty for
+        games the model doesn't know or when the call fails
+
+    Raises:
+        AIBusyError: if too many AI calls are already running or queued
+    """
+    if not game_titles or not os.getenv("OPENAI_API_KEY"):
+        return [{} for _ in game_titles]
+
+    try:
+        numbered = "\n".join(
+            f"{number}. {title}" for number, title in enumerate(game_titles, 1)
+        )
+        prompt = (
+            f"Metadata for each of these board games:\n{numbered}\n"
+            "Return a JSON object keyed by the game's number (as a string) whose"
+            " values are metadata objects. Use {} for any game you don't know."
+        )
+
+        response = await _chat_completion(
+            "metadata_batch",
+            model=METADATA_MODEL,
+            messages=[
+                {"role": "system", "content": METADATA_INSTRUCTIONS},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=250 * len(game_titles),
+            temperature=0.3,
+        )
+
+        content = response.choices[0].message.content.strip()
+        results = json.loads(content)
+        if not isinstance(results, dict):
+            return [{} for _ in game_titles]
+
+        metadata = []
+        for number in range(1, len(game_titles) + 1):
+            entry = results.get(str(number))
+            metadata.append(_join_list_fields(entry) if isinstance(entry, dict) else {})
+        return metadata
+
+    except AIBusyError:
+        raise
+    except Exception as e:
+        print(f"Error fetching batch game metadata: {e}")
+        return [{} for _ in game_titles]
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of prompt text"""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _table_cell(value) -> str:
+    if value is None or value == "N/A":
+        return "-"
+    text = " ".join(str(value).replace("|", "/").split())
+    return text or "-"
+
+
+def _games_info(
+    available_games: List[Dict],
+    token_budget: Optional[int] = None,
+    operation: str = "recommendations",
+) -> str:
+    """
+    The games as a pipe-separated table (GAME_TABLE_HEADER, one row each).
+
+    Rows keep the order of available_games, best candidates first, and stop
+    before the table would exceed token_budget (default
+    AI_PROMPT_TOKEN_BUDGET; 0 for no limit), so the games left out are
+    always the same ones. At least one game is always included.
+    """
+    budget = AI_PROMPT_TOKEN_BUDGET if token_budget is None else token_budget
+    rows = [GAME_TABLE_HEADER]
+    used = estimate_tokens(GAME_TABLE_HEADER)
+    for game in available_games:
+        row = "|".join(_table_cell(game.get(column)) for column in GAME_TABLE_COLUMNS)
+        # Plus one for the newline
+        cost = estimate_tokens(row) + 1
+        if budget > 0 and len(rows) > 1 and used + cost > budget:
+            AI_PROMPT_TRUNCATIONS.inc(operation=operation)
+            break
+        rows.append(row)
+        used += cost
+    return "\n".join(rows)
+
+
+def _recommendations_request(
+    query: str, available_games: List[Dict], max_recommendations: int
+) -> Dict:
+    """Chat completion arguments for recommending from available_games"""
+    prompt = (
+        f'Query: "{query}"\n'
+        f"Games:\n{_games_info(available_games)}\n"
+        f"Recommend up to {max_recommendations} of these games that best match"
+        ' the query. Return a JSON array of objects with "title" (as listed) and'
+        ' "reasoning" (why it matches) fields.'
+    )
+
+    return {
+        "model": "gpt-3.5-turbo",
+        "messages": [
+            {"role": "system", "content": RECOMMEND_INSTRUCTIONS},
+            {"role": "user", "content": prompt},
+        ],
+        "max_tokens": 500,
+        "temperature": 0.7,
+    }
+
+
+@traced("get_game_recommendations", kind=SPAN_KIND_CLIENT)
 async def get_game_recommendations(
     query: str, available_games: List[Dict], max_recommendations: int = 5
 ) -> List[Dict]:
@@ -96,58 +466,122 @@ async def get_game_recommendations(
 
     Returns:
         List of recommended games with reasoning
+
+    Raises:
+        AIBusyError: if too many AI calls are already running or queued
     """
-    if not client or not available_games:
+    if not available_games or not os.getenv("OPENAI_API_KEY"):
         return []
 
     try:
-        games_info = "\n".join(
-            [
-                f"- {game.get('title', 'Unknown')}: {game.get('player_count', 'N/A')} players, "
-                f"{game.get('game_type', 'N/A')}, {game.get('playtime', 'N/A')}, "
-                f"Complexity: {game.get('complexity', 'N/A')}"
-                for game in available_games
-            ]
+        response = await _chat_completion(
+            "recommendations",
+            **_recommendations_request(query, available_games, max_recommendations),
         )
 
-        prompt = f"""
-        Based on this query: "{query}"
-        
-        And these available games:
-        {games_info}
-        
-        Recommend up to {max_recommendations} games that best match the query. 
-        For each recommendation, provide:
-        1. Game title
-        2. Brief reasoning why it matches the query
-        
-        Return as JSON array with objects containing "title" and "reasoning" fields.
-        """
-
-        response = client.chat.completions.create(
+        content = response.choices[0].message.content.strip()
+
+        try:
+            recommendations = json.loads(content)
+            return recommendations if isinstance(recommendations, list) else []
+        except json.JSONDecodeError:
+            return []
+
+    except AIBusyError:
+        raise
+    except Exception as e:
+        print(f"Error getting recommendations: {e}")
+        return []
+
+
+@traced("stream_game_recommendations", kind=SPAN_KIND_CLIENT)
+async def stream_game_recommendations(
+    query: str, available_games: List[Dict], max_recommendations: int = 5
+) -> AsyncIterator[Dict]:
+    """
+    Like get_game_recommendations, but yield each recommendation as soon as
+    the model has finished writing it.
+
+    Unlike get_game_recommendations, failures are raised rather than ending
+    the stream quietly, so callers can tell a cut-off answer from a complete
+    one.
+
+    Raises:
+        AIBusyError: if too many AI calls are already running or queued
+    """
+    if not available_games or not os.getenv("OPENAI_API_KEY"):
+        return
+
+    parser = JSONObjectParser()
+    count = 0
+    async for text in _stream_chat_completion(
+        "recommendations",
+        **_recommendations_request(query, available_games, max_recommendations),
+    ):
+        # Past the last recommendation the stream is still read to the end,
+        # since its token usage only arrives in the final chunk
+        for recommendation in parser.feed(text):
+            if count >= max_recommendations:
+                break
+            if isinstance(recommendation, dict) and recommendation.get("title"):
+                yield recommendation
+                count += 1
+
+
+@traced("explain_recommendations", kind=SPAN_KIND_CLIENT)
+async def explain_recommendations(query: str, games: List[Dict]) -> List[str]:
+    """
+    Use AI to explain why already chosen games suit a query.
+
+    Args:
+        query: Natural language query the games were chosen for
+        games: The recommended games, best first
+
+    Returns:
+        One reasoning sentence per game, in the same order; empty strings
+        when the model gives none or the call fails
+
+    Raises:
+        AIBusyError: if too many AI calls are already running or queued
+    """
+    if not games or not os.getenv("OPENAI_API_KEY"):
+        return ["" for _ in games]
+
+    try:
+        prompt = (
+            f'Query: "{query}"\n'
+            f"Games picked from the collection:\n{_games_info(games, 0)}\n"
+            "Explain in one sentence per game why it suits the query. Return a"
+            " JSON array of strings, in the same order as the games."
+        )
+
+        response = await _chat_completion(
+            "reasoning",
             model="gpt-3.5-turbo",
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are a board game recommendation expert. Provide helpful, accurate recommendations.",
-                },
+                {"role": "system", "content": RECOMMEND_INSTRUCTIONS},
                 {"role": "user", "content": prompt},
             ],
-            max_tokens=500,
+            max_tokens=60 * len(games),
             temperature=0.7,
         )
 
         content = response.choices[0].message.content.strip()
 
         try:
-            recommendations = json.loads(content)
-            return recommendations if isinstance(recommendations, list) else []
+            reasons = json.loads(content)
         except json.JSONDecodeError:
-            return []
+            reasons = []
+        if not isinstance(reasons, list):
+            reasons = []
+        reasons = [reason if isinstance(reason, str) else "" for reason in reasons]
+        return (reasons + [""] * len(games))[: len(games)]
 
+    except AIBusyError:
+        raise
     except Exception as e:
-        print(f"Error getting recommendations: {e}")
-        return []
+        print(f"Error explaining recommendations: {e}")
+        return ["" for _ in games]
 
 
 def format_game_metadata(metadata: Dict[str, str]) -> Dict[str, str]:
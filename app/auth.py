@@ -1,4 +1,8 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 
 from fastapi import Depends, HTTPException, Request, status
@@ -23,9 +27,22 @@ if not FAMILY_PASSWORD:
     )
 
 
-# Create serializer function to avoid import-time issues
+# Session tokens are valid for 24 hours
+SESSION_MAX_AGE = 86400
+# Verified tokens are remembered for this long (and never past their expiry)
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", "300"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "256"))
+
+# One serializer for the process; it only depends on the secret key
+serializer = URLSafeTimedSerializer(SESSION_SECRET_KEY)
+
+# SHA-256 digest of a verified token -> time.time() after which to re-verify
+_token_cache: "OrderedDict[bytes, float]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+
 def get_serializer():
-    return URLSafeTimedSerializer(SESSION_SECRET_KEY)
+    return serializer
 
 
 def create_session_token() -> str:
@@ -34,15 +51,48 @@ def create_session_token() -> str:
     return serializer.dumps({"authenticated": True})
 
 
+def _cached_token(digest: bytes) -> bool:
+    with _token_cache_lock:
+        expires_at = _token_cache.get(digest)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del _token_cache[digest]
+            return False
+        _token_cache.move_to_end(digest)
+        return True
+
+
+def _cache_token(digest: bytes, expires_at: float):
+    with _token_cache_lock:
+        _token_cache[digest] = expires_at
+        _token_cache.move_to_end(digest)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+
 def verify_session_token(token: str) -> bool:
-    """Verify a session token"""
+    """Verify a session token, skipping the signature check for recent ones"""
+    digest = hashlib.sha256(token.encode()).digest()
+    if _cached_token(digest):
+        return True
+
     try:
         serializer = get_serializer()
-        data = serializer.loads(token, max_age=86400)  # 24 hours
-        return data.get("authenticated", False)
+        data, signed_at = serializer.loads(
+            token, max_age=SESSION_MAX_AGE, return_timestamp=True
+        )
     except:
         return False
 
+    if not data.get("authenticated", False):
+        return False
+    _cache_token(
+        digest,
+        min(time.time() + TOKEN_CACHE_TTL, signed_at.timestamp() + SESSION_MAX_AGE),
+    )
+    return True
+
 
 def get_current_user(request: Request) -> Optional[dict]:
     """Get current user from session"""
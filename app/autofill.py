@@ -0,0 +1,178 @@
+import asyncio
+import os
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+from .ai_cache import cache_metadata, get_cached_metadata
+from .ai_utils import get_batch_game_metadata
+from .database import SessionLocal, release_connection
+from .models import Game, Job
+
+# Bulk autofill (see README "Bulk Autofill"): titles per AI request and AI
+# requests in flight at once
+AUTOFILL_BATCH_SIZE = int(os.getenv("AUTOFILL_BATCH_SIZE", "8"))
+AUTOFILL_CONCURRENCY = int(os.getenv("AUTOFILL_CONCURRENCY", "2"))
+
+# A game is missing metadata when any of these is empty
+METADATA_FIELDS = ("player_count", "game_type", "playtime", "complexity")
+
+Progress = Callable[[int, int], None]
+
+
+def apply_metadata(game: Game, metadata: dict, only_missing: bool = False):
+    """Copy non-empty AI metadata fields onto game.
+
+    With only_missing, fields that already have a value are left alone.
+    """
+    for key, value in metadata.items():
+        if hasattr(game, key) and value:
+            if only_missing and getattr(game, key):
+                continue
+            # Ensure game_type and game_elements are strings, not lists
+            if key in ["game_type", "game_elements"] and isinstance(value, list):
+                value = ", ".join(value)
+            setattr(game, key, value)
+
+
+def games_missing_metadata(
+    db: Session, limit: Optional[int] = None
+) -> List[Tuple[int, str]]:
+    """(id, title) of games with an empty metadata field, oldest first"""
+    missing = [
+        or_(getattr(Game, field).is_(None), getattr(Game, field) == "")
+        for field in METADATA_FIELDS
+    ]
+    query = db.query(Game.id, Game.title).filter(or_(*missing)).order_by(Game.id)
+    if limit:
+        query = query.limit(limit)
+    return [(game_id, title) for game_id, title in query]
+
+
+def _save(db: Session, metadata_by_id: Dict[int, dict]) -> int:
+    """Fill in the games' empty fields in one transaction; returns games changed"""
+    if not metadata_by_id:
+        return 0
+    changed = 0
+    for game in db.query(Game).filter(Game.id.in_(list(metadata_by_id))):
+        apply_metadata(game, metadata_by_id[game.id], only_missing=True)
+        if db.is_modified(game):
+            changed += 1
+    db.commit()
+    return changed
+
+
+async def autofill_missing(
+    db: Session,
+    batch_size: int = AUTOFILL_BATCH_SIZE,
+    concurrency: int = AUTOFILL_CONCURRENCY,
+    limit: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> Dict[str, int]:
+    """
+    Fill in empty metadata fields across the collection.
+
+    Titles in the metadata cache are filled in first without an AI call;
+    the rest are looked up batch_size titles per request, with at most
+    concurrency requests in flight. Each batch is committed as soon as it
+    returns, so an interrupted run resumes where it stopped: the games it
+    already filled no longer match.
+    """
+    candidates = games_missing_metadata(db, limit)
+    counts = {"games": len(candidates), "filled": 0, "ai_requests": 0}
+    done = 0
+
+    def report(count: int):
+        nonlocal done
+        done += count
+        if progress:
+            progress(done, counts["games"])
+
+    cached, uncached = {}, []
+    for game_id, title in candidates:
+        metadata = get_cached_metadata(db, title)
+        if metadata is not None:
+            cached[game_id] = metadata
+        else:
+            uncached.append((game_id, title))
+    counts["filled"] += _save(db, cached)
+    report(len(cached))
+
+    # Don't hold a pooled connection while waiting on the AI
+    release_connection(db)
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+    async def run_batch(batch: List[Tuple[int, str]]):
+        async with semaphore:
+            results = await get_batch_game_metadata([title for _, title in batch])
+        counts["ai_requests"] += 1
+
+        found = {}
+        for (game_id, title), metadata in zip(batch, results):
+            if metadata:
+                cache_metadata(db, title, metadata)
+                found[game_id] = metadata
+        counts["filled"] += _save(db, found)
+        release_connection(db)
+        report(len(batch))
+
+    size = max(batch_size, 1)
+    batches = [
+        uncached[start : start + size] for start in range(0, len(uncached), size)
+    ]
+    tasks = [asyncio.ensure_future(run_batch(batch)) for batch in batches]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        # On failure (e.g. AIBusyError) stop the remaining batches too
+        for task in tasks:
+            task.cancel()
+    return counts
+
+
+async def autofill_all_job(db: Session, job: Job):
+    """Background job: bulk autofill, recording progress on the job"""
+
+    def progress(done: int, total: int):
+        job.progress_done = done
+        job.progress_total = total
+        db.commit()
+
+    await autofill_missing(db, progress=progress)
+
+
+def main(argv: Optional[List[str]] = None):
+    # Imported here, not at the top: the web app imports this module too
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Fill in missing game metadata with AI"
+    )
+    parser.add_argument("--batch-size", type=int, default=AUTOFILL_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=AUTOFILL_CONCURRENCY)
+    parser.add_argument("--limit", type=int, help="Stop after this many games")
+    args = parser.parse_args(argv)
+
+    def progress(done: int, total: int):
+        print(f"\rAutofilled {done}/{total} games", end="", flush=True)
+
+    with SessionLocal() as db:
+        counts = asyncio.run(
+            autofill_missing(
+                db,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                limit=args.limit,
+                progress=progress,
+            )
+        )
+    print()
+    print(
+        f"Filled {counts['filled']} of {counts['games']} games"
+        f" with {counts['ai_requests']} AI request(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 import os
+from typing import Optional
 
+from fastapi import Request
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel
 
@@ -10,6 +12,10 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is required")
 
+# Connection pool size and extra connections allowed beyond it (PostgreSQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
 # Create engine
 if DATABASE_URL.startswith("sqlite"):
     engine = create_engine(
@@ -19,7 +25,23 @@ if DATABASE_URL.startswith("sqlite"):
     )
 else:
     # PostgreSQL configuration
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(
+        DATABASE_URL,
+        pool_pre_ping=True,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+    )
+
+
+# Pooled connections must never be shared between processes. If a worker is
+# forked from a process that already touched the engine, drop the inherited
+# pool (without closing the parent's sockets) so the child opens its own.
+def _reset_pool_after_fork():
+    engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pool_after_fork)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -46,9 +68,88 @@ def set_updated_at(mapper, connection, target):
         target.updated_at = datetime.now(UTC)
 
 
+def release_connection(session):
+    """
+    Return the session's connection to the pool before the request ends.
+
+    Ends a read-only transaction without expiring the objects it loaded, so
+    they stay usable (e.g. while rendering a template or awaiting an AI call).
+    A later query simply checks out a connection again. Sessions with
+    unflushed changes are left alone.
+    """
+    if isinstance(session, LazySession):
+        session = session._session
+    if session is None:
+        return
+    if not session.in_transaction() or session.info.get("flushed_writes"):
+        return
+    if session.new or session.dirty or session.deleted:
+        return
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+# Track transactions that have written to the database, which
+# release_connection must never commit on the caller's behalf
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_writes(session, flush_context):
+    session.info["flushed_writes"] = True
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _clear_flushed_writes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("flushed_writes", None)
+
+
+class LazySession:
+    """
+    Request-scoped stand-in for a Session that creates it on first use.
+
+    Routes that never touch the database create no Session at all, and the
+    connection is only checked out when the first statement runs (SQLAlchemy
+    sessions begin lazily).
+    """
+
+    def __init__(self, factory=None):
+        self._factory = factory or SessionLocal
+        self._session: Optional[Session] = None
+
+    @property
+    def session(self) -> Session:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+    def release(self):
+        release_connection(self)
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+def release_request_connection(request: Request):
+    """Release the connection of the request's session, if it opened one"""
+    db = getattr(request.state, "db", None)
+    if db is not None:
+        db.release()
+
+
 # Dependency to get database session
-def get_db():
-    db = SessionLocal()
+def get_db(request: Request = None):
+    db = LazySession()
+    if request is not None:
+        # Lets helpers that only see the request release the connection
+        request.state.db = db
     try:
         yield db
     finally:
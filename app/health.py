@@ -0,0 +1,102 @@
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+
+# Read once at startup; the environment does not change while running
+ENVIRONMENT = (
+    "production"
+    if os.getenv("IS_PRODUCTION", "false").lower() == "true"
+    else "development"
+)
+
+# Seconds between background readiness probes
+READINESS_INTERVAL = float(os.getenv("READINESS_INTERVAL", "5"))
+# Share of pooled connections in use at which the worker reports not ready
+POOL_SATURATION_THRESHOLD = float(os.getenv("POOL_SATURATION_THRESHOLD", "0.9"))
+
+
+@dataclass
+class ReadinessState:
+    ready: bool = False
+    database: str = "unknown"
+    pool_usage: Optional[float] = None
+    checked_at: Optional[float] = None
+
+
+def pool_usage(engine, max_overflow: int = 0) -> Optional[float]:
+    """Share of the engine's connection pool in use, if the pool tracks it.
+
+    max_overflow is the overflow the engine was configured with, which pools
+    don't expose publicly.
+    """
+    pool = engine.pool
+    try:
+        capacity = pool.size() + max(max_overflow, 0)
+        return pool.checkedout() / capacity if capacity else None
+    except AttributeError:
+        return None
+
+
+class ReadinessProbe:
+    """
+    Probe the database in the background and cache the result.
+
+    /readyz only reads the cached state, so however often the load balancer
+    asks, the database sees one SELECT 1 per interval per worker. /healthz
+    is the exception: it checks the database on demand, for humans and
+    scripts, and should not be used as a probe.
+    """
+
+    def __init__(
+        self, engine, interval: float = READINESS_INTERVAL, max_overflow: int = 0
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.max_overflow = max_overflow
+        self.state = ReadinessState()
+        self._task: Optional[asyncio.Task] = None
+
+    def refresh(self) -> ReadinessState:
+        """Run one probe now and cache its result"""
+        usage = pool_usage(self.engine, self.max_overflow)
+        if usage is not None and usage >= POOL_SATURATION_THRESHOLD:
+            # Don't queue for a connection behind the requests that need it
+            self.state = ReadinessState(False, "saturated", usage, time.monotonic())
+            return self.state
+
+        try:
+            with self.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            self.state = ReadinessState(True, "connected", usage, time.monotonic())
+        except Exception as e:
+            print(f"Error checking database readiness: {e}")
+            self.state = ReadinessState(False, "disconnected", usage, time.monotonic())
+        return self.state
+
+    async def current(self) -> ReadinessState:
+        """Cached probe result, probing once (off the event loop) if none has run"""
+        if self.state.checked_at is None:
+            return await asyncio.to_thread(self.refresh)
+        return self.state
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.refresh)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
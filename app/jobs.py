@@ -0,0 +1,176 @@
+import asyncio
+import os
+from datetime import UTC, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from .ai_limiter import AIBusyError
+from .database import SessionLocal
+from .models import Job
+
+# Background job workers per process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# A running job that has not been updated for this long (seconds) belonged to
+# a process that died, and is run again
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "600"))
+# Runs of a job (including ones put back because the AI was busy) before it
+# is marked failed
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+UNFINISHED = (PENDING, RUNNING)
+
+JobHandler = Callable[[Session, Job], Awaitable[None]]
+
+
+class JobQueue:
+    """
+    In-process asyncio queue for slow work, persisted in the jobs table.
+
+    Jobs are committed before they are queued and claimed with a conditional
+    UPDATE, so several worker processes can resume the same table without
+    running a job twice. Unfinished jobs are picked up again on start().
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        workers: int = JOB_WORKERS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.workers = max(workers, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    def create(self, db: Session, kind: str, game_id: Optional[int] = None) -> Job:
+        """Add a pending job to the session; submit() it once committed"""
+        job = Job(kind=kind, game_id=game_id, status=PENDING)
+        db.add(job)
+        return job
+
+    def submit(self, job_id: int):
+        """Queue a committed job for this process's workers"""
+        if self._queue is not None:
+            self._queue.put_nowait(job_id)
+
+    def _retry_later(self, job_id: int, delay: float):
+        asyncio.get_running_loop().call_later(delay, self.submit, job_id)
+
+    async def run_job(self, job_id: int) -> Optional[str]:
+        """Claim and run one pending job, returning its new status.
+
+        Returns None when the job is not pending (e.g. another worker has
+        claimed it).
+        """
+        with self.session_factory() as db:
+            claimed = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == PENDING)
+                .values(
+                    status=RUNNING,
+                    attempts=Job.attempts + 1,
+                    updated_at=datetime.now(UTC),
+                )
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return None
+
+            job = db.get(Job, job_id)
+            try:
+                await self.handlers[job.kind](db, job)
+            except AIBusyError as e:
+                db.rollback()
+                if job.attempts >= self.max_attempts:
+                    job.status = FAILED
+                    job.error = f"The AI was still busy after {job.attempts} attempts"
+                else:
+                    # The AI limiter is full; try again once it has room
+                    job.status = PENDING
+                    self._retry_later(job_id, e.retry_after)
+            except asyncio.CancelledError:
+                # Shutting down: leave the job for the next start
+                db.rollback()
+                job.status = PENDING
+                db.commit()
+                raise
+            except Exception as e:
+                db.rollback()
+                print(f"Error running {job.kind} job {job.id}: {e}")
+                job.status = FAILED
+                job.error = str(e)[:500]
+            else:
+                job.status = DONE
+                job.error = None
+            db.commit()
+            return job.status
+
+    def resume(self) -> List[int]:
+        """Reset stale running jobs and return the ids of pending ones"""
+        now = datetime.now(UTC)
+        with self.session_factory() as db:
+            db.execute(
+                update(Job)
+                .where(
+                    Job.status == RUNNING,
+                    Job.updated_at < now - timedelta(seconds=JOB_STALE_AFTER),
+                )
+                .values(status=PENDING, updated_at=now)
+            )
+            db.commit()
+            return [
+                job_id
+                for (job_id,) in db.query(Job.id)
+                .filter(Job.status == PENDING)
+                .order_by(Job.id)
+            ]
+
+    async def _work(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.run_job(job_id)
+            except Exception as e:
+                print(f"Error running job {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self):
+        """Start the workers and queue jobs left unfinished by a restart"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        try:
+            job_ids = self.resume()
+        except Exception as e:
+            print(f"Error resuming jobs: {e}")
+            return
+        for job_id in job_ids:
+            self.submit(job_id)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    async def join(self):
+        """Wait until every queued job has been run"""
+        if self._queue is not None:
+            await self._queue.join()
+
+
+job_queue = JobQueue()
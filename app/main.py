@@ -1,43 +1,181 @@
+import logging
 import os
+from contextlib import asynccontextmanager
 from typing import List, Optional
-
-import uvicorn
-from fastapi import Depends, FastAPI, Form, HTTPException, Path, Query, Request
-from fastapi.responses import RedirectResponse
+from urllib.parse import urlencode
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    FastAPI,
+    Form,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import (
+    JSONResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from sqlalchemy import text
+from sqlalchemy import func, text
 from sqlalchemy.orm import Session, selectinload
 
-from .ai_utils import get_game_metadata, get_game_recommendations
+from .ai_cache import (
+    cache_metadata,
+    cache_recommendations,
+    get_cached_metadata,
+    get_cached_recommendations,
+    recommendation_cache_key,
+)
+from .ai_limiter import AIBusyError
+from .ai_utils import (
+    ClientDisconnected,
+    cancel_on_disconnect,
+    explain_recommendations,
+    get_game_metadata,
+    get_game_recommendations,
+    stream_game_recommendations,
+)
 from .auth import check_family_password, create_session_token, require_auth
-from .database import engine, get_db
-from .models import FamilyMember, Game, GameRating, PlayLog
-
-app = FastAPI(title="GameDex", description="Board Game Collection Manager")
+from .autofill import apply_metadata, autofill_all_job
+from .database import (
+    DB_MAX_OVERFLOW,
+    engine,
+    get_db,
+    release_connection,
+    release_request_connection,
+)
+from .health import ENVIRONMENT, ReadinessProbe
+from .jobs import DONE, UNFINISHED, job_queue
+from .metrics import (
+    InstrumentedTemplate,
+    MetricsMiddleware,
+    SnapshotWriter,
+    instrument_engine,
+    register_pool_metrics,
+    render_metrics,
+)
+from .models import FamilyMember, Game, GameRating, Job, PlayLog
+from .pagination import paginate_games
+from .sql_monitor import monitor_queries
+from .tracing import TracingMiddleware, flush_tracing
+
+readiness_probe = ReadinessProbe(engine, max_overflow=DB_MAX_OVERFLOW)
+metrics_writer = SnapshotWriter()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Probe the database in the background so /readyz never touches it
+    readiness_probe.start()
+    # Share this worker's metrics with the others (when METRICS_DIR is set)
+    metrics_writer.start()
+    # Background autofill workers, resuming jobs left over from a restart
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await readiness_probe.stop()
+    await metrics_writer.stop()
+    # Don't lose the spans still waiting for the export thread
+    flush_tracing()
+
+
+app = FastAPI(
+    title="GameDex", description="Board Game Collection Manager", lifespan=lifespan
+)
+
+# Request, SQL and pool metrics (exposed at /metrics)
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+register_pool_metrics(engine)
+
+# Slow query and N+1 warnings, checked by the metrics SQL hooks
+monitor_queries()
+
+# Tracing spans for requests (outermost, so it covers everything); SQL spans
+# come from the instrument_engine hooks
+app.add_middleware(TracingMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+
+class Templates(Jinja2Templates):
+    """Templates that return the request's DB connection before rendering"""
+
+    def TemplateResponse(self, request: Request, *args, **kwargs):
+        # The handler has loaded what the page needs by now
+        release_request_connection(request)
+        return super().TemplateResponse(request, *args, **kwargs)
+
+
 # Templates
-templates = Jinja2Templates(directory="app/templates")
+templates = Templates(directory="app/templates")
+templates.env.template_class = InstrumentedTemplate
+
+
+# Every route registered on this router requires a logged-in session. The
+# check runs as a route dependency ahead of get_db, so unauthenticated
+# requests are redirected to /login without opening a database session.
+router = APIRouter(dependencies=[Depends(require_auth)])
+
+
+@app.exception_handler(AIBusyError)
+async def ai_busy_handler(request: Request, exc: AIBusyError):
+    """Reject AI requests quickly when the AI limiter is saturated"""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "The AI assistant is busy, please try again shortly"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected_handler(request: Request, exc: ClientDisconnected):
+    """The client left while we waited on the AI; nobody reads this response"""
+    return Response(status_code=499)
+
+
+@app.head("/livez")
+@app.get("/livez")
+async def liveness_check():
+    """Liveness probe: the process is up and serving requests (no I/O)"""
+    return {"status": "alive"}
+
+
+@app.head("/readyz")
+@app.get("/readyz")
+async def readiness_check():
+    """Readiness probe served from the cached background database check"""
+    state = await readiness_probe.current()
+    return JSONResponse(
+        status_code=200 if state.ready else 503,
+        content={
+            "status": "ready" if state.ready else "not ready",
+            "database": state.database,
+            "pool_usage": state.pool_usage,
+            "environment": ENVIRONMENT,
+        },
+    )
 
 
 @app.head("/healthz")
 @app.get("/healthz")
 async def health_check(db: Session = Depends(get_db)):
-    """Health check endpoint that verifies database connectivity"""
+    """On-demand health check that verifies database connectivity"""
     try:
         # Test database connection by executing a simple query
         db.execute(text("SELECT 1"))
         return {
             "status": "healthy",
             "database": "connected",
-            "environment": (
-                "production"
-                if os.getenv("IS_PRODUCTION", "false").lower() == "true"
-                else "development"
-            ),
+            "environment": ENVIRONMENT,
         }
     except Exception as e:
         import logging
@@ -47,14 +185,18 @@ async def health_check(db: Session = Depends(get_db)):
             "status": "unhealthy",
             "database": "disconnected",
             "error": "An internal error occurred.",
-            "environment": (
-                "production"
-                if os.getenv("IS_PRODUCTION", "false").lower() == "true"
-                else "development"
-            ),
+            "environment": ENVIRONMENT,
         }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics, for all workers when METRICS_DIR is set"""
+    return PlainTextResponse(
+        render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/login")
 async def login_page(request: Request):
     """Login page"""
@@ -93,39 +235,140 @@ async def logout():
     return response
 
 
-@app.get("/")
-async def index(
-    request: Request, msg: Optional[str] = None, db: Session = Depends(get_db)
+def _filter_games(
+    query,
+    search: Optional[str] = None,
+    game_type: Optional[str] = None,
+    complexity: Optional[str] = None,
+    game_elements: Optional[str] = None,
+    setup_time: Optional[str] = None,
+    players: Optional[int] = None,
+    max_playtime: Optional[int] = None,
+    max_setup: Optional[int] = None,
 ):
-    """Home page with list of games"""
-    # Require authentication
-    require_auth(request)
+    """Apply the game list filters to a Game query"""
+    # Apply search filter
+    if search:
+        query = query.filter(
+            Game.title.ilike(f"%{search}%") | Game.description.ilike(f"%{search}%")
+        )
 
-    # Load games with their play logs for the last_played property
-    games = db.query(Game).options(selectinload(Game.play_logs)).all()
+    # Apply game type filter (LIKE for comma-separated values)
+    if game_type:
+        query = query.filter(Game.game_type.ilike(f"%{game_type}%"))
 
-    # Get family members and their ratings for all games
-    family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
-    family_ratings = {}
+    # Apply game elements filter (LIKE for comma-separated values)
+    if game_elements:
+        query = query.filter(Game.game_elements.ilike(f"%{game_elements}%"))
 
+    # Apply setup time filter (exact match or LIKE)
+    if setup_time:
+        query = query.filter(Game.setup_time.ilike(f"%{setup_time}%"))
+
+    # Apply complexity filter
+    if complexity:
+        query = query.filter(Game.complexity == complexity)
+
+    # Range filters on the parsed numeric columns ("5+ players" has no maximum)
+    if players is not None:
+        query = query.filter(
+            Game.min_players <= players,
+            (Game.max_players >= players) | Game.max_players.is_(None),
+        )
+    if max_playtime is not None:
+        query = query.filter(Game.max_playtime <= max_playtime)
+    if max_setup is not None:
+        query = query.filter(Game.setup_minutes <= max_setup)
+
+    return query
+
+
+def _collection_stats(db: Session, game_query) -> dict:
+    """Aggregate statistics for the games matched by game_query"""
+    game_ids = game_query.with_entities(Game.id)
+
+    highly_rated = (
+        db.query(func.count(GameRating.id))
+        .filter(GameRating.rating >= 8, GameRating.game_id.in_(game_ids))
+        .scalar()
+    )
+
+    per_game_average = (
+        db.query(func.avg(GameRating.rating).label("average"))
+        .filter(GameRating.game_id.in_(game_ids))
+        .group_by(GameRating.game_id)
+        .subquery()
+    )
+    average_rating = db.query(func.avg(per_game_average.c.average)).scalar()
+
+    game_types = set()
+    for (value,) in game_query.with_entities(Game.game_type).distinct():
+        if value:
+            game_types.update(t.strip() for t in value.split(",") if t.strip())
+
+    return {
+        "total_games": game_query.count(),
+        "highly_rated_count": highly_rated or 0,
+        "average_rating": float(average_rating or 0),
+        "game_types": sorted(game_types),
+    }
+
+
+def _game_page_context(
+    db: Session, game_query, sort_by: Optional[str], cursor: Optional[str], filters
+) -> dict:
+    """Load one page of games plus the ratings and next-page URL for the grid"""
+    query = game_query.options(
+        selectinload(Game.play_logs), selectinload(Game.family_ratings)
+    )
+    games, next_cursor = paginate_games(query, sort_by=sort_by, cursor=cursor)
+
+    family_ratings = {}
     for game in games:
         family_ratings[game.id] = {
             rating.family_member_id: rating.rating for rating in game.family_ratings
         }
 
+    next_page_url = None
+    if next_cursor:
+        params = {
+            key: value for key, value in filters.items() if value not in (None, "")
+        }
+        if sort_by:
+            params["sort_by"] = sort_by
+        params["cursor"] = next_cursor
+        next_page_url = f"/games/fragment?{urlencode(params)}"
+
+    return {
+        "games": games,
+        "family_ratings": family_ratings,
+        "next_page_url": next_page_url,
+    }
+
+
+@router.get("/")
+async def index(
+    request: Request, msg: Optional[str] = None, db: Session = Depends(get_db)
+):
+    """Home page with the first page of games"""
+    game_query = db.query(Game)
+    family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
+
     return templates.TemplateResponse(
         request,
         "index.html",
         {
-            "games": games,
             "msg": msg,
             "family_members": family_members,
-            "family_ratings": family_ratings,
+            "stats": _collection_stats(db, game_query),
+            "filters": {},
+            "sort_by": None,
+            **_game_page_context(db, game_query, None, None, {}),
         },
     )
 
 
-@app.get("/games")
+@router.get("/games")
 async def list_games(
     request: Request,
     search: Optional[str] = Query(None),
@@ -134,91 +377,102 @@ async def list_games(
     sort_by: Optional[str] = Query(None),
     game_elements: Optional[str] = Query(None),
     setup_time: Optional[str] = Query(None),
+    players: Optional[int] = Query(None, ge=1),
+    max_playtime: Optional[int] = Query(None, ge=0),
+    max_setup: Optional[int] = Query(None, ge=0),
     db: Session = Depends(get_db),
 ):
     """Games list page with filtering and sorting"""
-    # Require authentication
-    require_auth(request)
-
-    # Start with base query and load play logs for last_played property
-    query = db.query(Game).options(selectinload(Game.play_logs))
-
-    # Apply search filter
-    if search:
-        query = query.filter(
-            Game.title.ilike(f"%{search}%") | Game.description.ilike(f"%{search}%")
-        )
-
-    # Apply game type filter (LIKE for comma-separated values)
-    if game_type:
-        query = query.filter(Game.game_type.ilike(f"%{game_type}%"))
-
-    # Apply game elements filter (LIKE for comma-separated values)
-    if game_elements:
-        query = query.filter(Game.game_elements.ilike(f"%{game_elements}%"))
-
-    # Apply setup time filter (exact match or LIKE)
-    if setup_time:
-        query = query.filter(Game.setup_time.ilike(f"%{setup_time}%"))
-
-    # Apply complexity filter
-    if complexity:
-        query = query.filter(Game.complexity == complexity)
+    filters = {
+        "search": search,
+        "game_type": game_type,
+        "complexity": complexity,
+        "game_elements": game_elements,
+        "setup_time": setup_time,
+        "players": players,
+        "max_playtime": max_playtime,
+        "max_setup": max_setup,
+    }
+    game_query = _filter_games(db.query(Game), **filters)
+    family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
 
-    # Apply sorting
-    if sort_by:
-        if sort_by == "title":
-            query = query.order_by(Game.title)
-        elif sort_by == "created_at":
-            query = query.order_by(Game.created_at.desc())
-        elif sort_by == "updated_at":
-            query = query.order_by(Game.updated_at.desc())
-    else:
-        # Default sorting by title
-        query = query.order_by(Game.title)
+    return templates.TemplateResponse(
+        request,
+        "index.html",
+        {
+            "family_members": family_members,
+            "stats": _collection_stats(db, game_query),
+            "filters": filters,
+            "sort_by": sort_by,
+            **_game_page_context(db, game_query, sort_by, None, filters),
+        },
+    )
 
-    games = query.all()
 
-    # Get family members and their ratings for all games
+@router.get("/games/fragment")
+async def list_games_fragment(
+    request: Request,
+    cursor: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    game_type: Optional[str] = Query(None),
+    complexity: Optional[str] = Query(None),
+    sort_by: Optional[str] = Query(None),
+    game_elements: Optional[str] = Query(None),
+    setup_time: Optional[str] = Query(None),
+    players: Optional[int] = Query(None, ge=1),
+    max_playtime: Optional[int] = Query(None, ge=0),
+    max_setup: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """HTML fragment with the next page of game cards (infinite scroll)"""
+    filters = {
+        "search": search,
+        "game_type": game_type,
+        "complexity": complexity,
+        "game_elements": game_elements,
+        "setup_time": setup_time,
+        "players": players,
+        "max_playtime": max_playtime,
+        "max_setup": max_setup,
+    }
+    game_query = _filter_games(db.query(Game), **filters)
     family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
-    family_ratings = {}
-
-    for game in games:
-        family_ratings[game.id] = {
-            rating.family_member_id: rating.rating for rating in game.family_ratings
-        }
 
     return templates.TemplateResponse(
         request,
-        "index.html",
+        "_game_cards.html",
         {
-            "games": games,
             "family_members": family_members,
-            "family_ratings": family_ratings,
+            **_game_page_context(db, game_query, sort_by, cursor, filters),
         },
     )
 
 
-@app.get("/settings")
+@router.get("/settings")
 async def settings_page(request: Request, db: Session = Depends(get_db)):
     """Settings page for managing family members"""
-    # Require authentication
-    require_auth(request)
-
     family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
+    # The latest bulk autofill while it runs, or with a retry if it failed
+    autofill_job = (
+        db.query(Job)
+        .filter(Job.kind == "autofill_all")
+        .order_by(Job.id.desc())
+        .first()
+    )
+    if autofill_job and autofill_job.status == DONE:
+        autofill_job = None
     return templates.TemplateResponse(
-        request, "settings.html", {"family_members": family_members}
+        request,
+        "settings.html",
+        {"family_members": family_members, "autofill_job": autofill_job},
     )
 
 
-@app.post("/settings/family-members")
+@router.post("/settings/family-members")
 async def add_family_member(
     request: Request, name: str = Form(...), db: Session = Depends(get_db)
 ):
     """Add a new family member"""
-    # Require authentication
-    require_auth(request)
-
     # Check if name already exists
     existing = db.query(FamilyMember).filter(FamilyMember.name == name).first()
     if existing:
@@ -234,14 +488,11 @@ async def add_family_member(
     )
 
 
-@app.delete("/settings/family-members/{member_id}")
+@router.delete("/settings/family-members/{member_id}")
 async def delete_family_member(
     request: Request, member_id: int = Path(..., gt=0), db: Session = Depends(get_db)
 ):
     """Delete a family member and all their ratings"""
-    # Require authentication
-    require_auth(request)
-
     family_member = db.query(FamilyMember).filter(FamilyMember.id == member_id).first()
     if not family_member:
         raise HTTPException(status_code=404, detail="Family member not found")
@@ -253,19 +504,16 @@ async def delete_family_member(
     )
 
 
-@app.get("/games/new")
+@router.get("/games/new")
 async def new_game_form(request: Request, db: Session = Depends(get_db)):
     """Form to add a new game"""
-    # Require authentication
-    require_auth(request)
-
     family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
     return templates.TemplateResponse(
         request, "new_game.html", {"family_members": family_members}
     )
 
 
-@app.post("/games")
+@router.post("/games")
 async def create_game(
     request: Request,
     title: str = Form(...),
@@ -279,9 +527,6 @@ async def create_game(
     db: Session = Depends(get_db),
 ):
     """Create a new game"""
-    # Require authentication
-    require_auth(request)
-
     game = Game(
         title=title,
         player_count=player_count or "",
@@ -317,37 +562,118 @@ async def create_game(
     return RedirectResponse(url="/?msg=Game+added+successfully", status_code=303)
 
 
-@app.post("/games/autofill")
+async def _lookup_game_metadata(
+    db: Session, title: str, request: Optional[Request] = None
+) -> dict:
+    """AI metadata for title, served from the metadata cache when possible.
+
+    With a request, the AI call is cancelled if its client disconnects.
+    """
+    metadata = get_cached_metadata(db, title)
+    if metadata is not None:
+        return metadata
+
+    # Don't hold a pooled connection while waiting on the AI
+    release_connection(db)
+
+    if request is not None:
+        metadata = await cancel_on_disconnect(request, get_game_metadata(title))
+    else:
+        metadata = await get_game_metadata(title)
+    cache_metadata(db, title, metadata)
+    return metadata
+
+
+async def _autofill_job(db: Session, job: Job):
+    """Background job: fill in a game's metadata with AI"""
+    game = db.query(Game).filter(Game.id == job.game_id).first()
+    if not game:
+        raise ValueError("Game not found")
+
+    metadata = await _lookup_game_metadata(db, game.title)
+    if not metadata:
+        raise ValueError("No metadata found for this title")
+
+    apply_metadata(game, metadata)
+    db.commit()
+
+
+job_queue.register("autofill", _autofill_job)
+job_queue.register("autofill_all", autofill_all_job)
+
+
+@router.post("/games/autofill")
 async def autofill_game_by_title(
     request: Request, title: str = Form(...), db: Session = Depends(get_db)
 ):
-    """Create a game with just title and use AI to autofill metadata"""
-    # Require authentication
-    require_auth(request)
-
+    """Create a game with just title and autofill its metadata in the background"""
     # Create game with just title
     game = Game(title=title)
     db.add(game)
     db.commit()
     db.refresh(game)
 
-    # Use AI to get metadata
-    metadata = await get_game_metadata(game.title)
+    # Known titles are filled in straight away; others are queued so the
+    # user isn't kept waiting on the AI
+    metadata = get_cached_metadata(db, game.title)
+    if metadata is not None:
+        apply_metadata(game, metadata)
+        db.commit()
+    else:
+        job = job_queue.create(db, "autofill", game.id)
+        db.commit()
+        job_queue.submit(job.id)
 
-    # Update game with AI metadata
-    for key, value in metadata.items():
-        if hasattr(game, key) and value:
-            # Ensure game_type and game_elements are strings, not lists
-            if key in ["game_type", "game_elements"] and isinstance(value, list):
-                value = ", ".join(value)
-            setattr(game, key, value)
+    return RedirectResponse(url=f"/games/{game.id}", status_code=303)
 
+
+@router.post("/games/autofill-all")
+async def autofill_all_games(db: Session = Depends(get_db)):
+    """Queue a background job filling in missing metadata for every game"""
+    running = (
+        db.query(Job)
+        .filter(Job.kind == "autofill_all", Job.status.in_(UNFINISHED))
+        .first()
+    )
+    if running:
+        return RedirectResponse(
+            url="/settings?msg=Bulk+autofill+is+already+running", status_code=303
+        )
+
+    job = job_queue.create(db, "autofill_all")
     db.commit()
-    db.refresh(game)
-    return RedirectResponse(url=f"/games/{game.id}", status_code=303)
+    job_queue.submit(job.id)
+    return RedirectResponse(url="/settings?msg=Bulk+autofill+started", status_code=303)
+
 
+@router.get("/jobs/{job_id}")
+async def get_job(
+    request: Request, job_id: int = Path(..., gt=0), db: Session = Depends(get_db)
+):
+    """Status of a background job (JSON, or the status banner for htmx polls)"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    if request.headers.get("HX-Request"):
+        if job.status == "done":
+            # Reload the page to show the new metadata
+            return Response(headers={"HX-Refresh": "true"})
+        return templates.TemplateResponse(request, "_job_status.html", {"job": job})
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "game_id": job.game_id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.error,
+        "progress_done": job.progress_done,
+        "progress_total": job.progress_total,
+    }
 
-@app.get("/games/{game_id}")
+
+@router.get("/games/{game_id}")
 async def get_game(
     request: Request,
     game_id: int = Path(..., gt=0),
@@ -355,9 +681,6 @@ async def get_game(
     db: Session = Depends(get_db),
 ):
     """Get a specific game"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -376,6 +699,19 @@ async def get_game(
         .all()
     )
 
+    # Background autofill for a game added by title only: still running, or
+    # failed (shown with its error and a retry)
+    autofill_job = None
+    if not (game.player_count or game.game_type or game.description):
+        autofill_job = (
+            db.query(Job)
+            .filter(Job.game_id == game_id)
+            .order_by(Job.id.desc())
+            .first()
+        )
+        if autofill_job and autofill_job.status == DONE:
+            autofill_job = None
+
     return templates.TemplateResponse(
         request,
         "game_detail.html",
@@ -385,20 +721,18 @@ async def get_game(
             "family_members": family_members,
             "family_ratings": family_ratings,
             "play_logs": play_logs,
+            "autofill_job": autofill_job,
         },
     )
 
 
-@app.get("/games/{game_id}/edit")
+@router.get("/games/{game_id}/edit")
 async def edit_game_form(
     request: Request,
     game_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
 ):
     """Form to edit an existing game"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -420,7 +754,7 @@ async def edit_game_form(
     )
 
 
-@app.post("/games/{game_id}")
+@router.post("/games/{game_id}")
 async def update_game(
     request: Request,
     game_id: int = Path(..., gt=0),
@@ -435,9 +769,6 @@ async def update_game(
     db: Session = Depends(get_db),
 ):
     """Update a game"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -478,14 +809,76 @@ async def update_game(
     )
 
 
-@app.delete("/games/{game_id}")
+@router.patch("/games/{game_id}/ratings/{member_id}")
+async def update_game_rating(
+    request: Request,
+    game_id: int = Path(..., gt=0),
+    member_id: int = Path(..., gt=0),
+    rating: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """Set or clear one family member's rating and return the updated fragment"""
+    if not db.query(Game.id).filter(Game.id == game_id).first():
+        raise HTTPException(status_code=404, detail="Game not found")
+
+    member = db.query(FamilyMember).filter(FamilyMember.id == member_id).first()
+    if not member:
+        raise HTTPException(status_code=404, detail="Family member not found")
+
+    # An empty value clears the rating
+    rating_value = None
+    if rating:
+        try:
+            rating_value = int(rating)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid rating")
+        if not 1 <= rating_value <= 10:
+            raise HTTPException(status_code=400, detail="Rating must be 1-10")
+
+    existing_rating = (
+        db.query(GameRating)
+        .filter(
+            GameRating.game_id == game_id,
+            GameRating.family_member_id == member_id,
+        )
+        .first()
+    )
+
+    if rating_value is None:
+        if existing_rating:
+            db.delete(existing_rating)
+    elif existing_rating:
+        existing_rating.rating = rating_value
+    else:
+        db.add(
+            GameRating(game_id=game_id, family_member_id=member_id, rating=rating_value)
+        )
+    db.commit()
+
+    # Same rounding as Game.average_rating
+    average = (
+        db.query(func.avg(GameRating.rating))
+        .filter(GameRating.game_id == game_id)
+        .scalar()
+    )
+
+    return templates.TemplateResponse(
+        request,
+        "_rating_update.html",
+        {
+            "game_id": game_id,
+            "member": member,
+            "rating": rating_value,
+            "average_rating": round(float(average), 1) if average is not None else None,
+        },
+    )
+
+
+@router.delete("/games/{game_id}")
 async def delete_game(
     request: Request, game_id: int = Path(..., gt=0), db: Session = Depends(get_db)
 ):
     """Delete a game"""
-    # Require authentication
-    require_auth(request)
-
     # Validate game_id exists before deletion (security fix)
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
@@ -497,28 +890,19 @@ async def delete_game(
     return RedirectResponse(url="/?msg=Game+deleted+successfully", status_code=303)
 
 
-@app.post("/games/{game_id}/autofill")
+@router.post("/games/{game_id}/autofill")
 async def autofill_game(
     request: Request, game_id: int = Path(..., gt=0), db: Session = Depends(get_db)
 ):
     """Autofill game metadata using AI"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    # Use AI to get metadata
-    metadata = await get_game_metadata(game.title)
+    metadata = await _lookup_game_metadata(db, game.title, request)
 
     # Update game with AI metadata
-    for key, value in metadata.items():
-        if hasattr(game, key) and value:
-            # Ensure game_type and game_elements are strings, not lists
-            if key in ["game_type", "game_elements"] and isinstance(value, list):
-                value = ", ".join(value)
-            setattr(game, key, value)
+    apply_metadata(game, metadata)
 
     db.commit()
     return RedirectResponse(
@@ -526,25 +910,27 @@ async def autofill_game(
     )
 
 
-@app.get("/recommend")
+@router.get("/recommend")
 async def recommend_games(request: Request, db: Session = Depends(get_db)):
     """Recommendation page"""
-    # Require authentication
-    require_auth(request)
-
     return templates.TemplateResponse(request, "recommend.html", {})
 
 
-@app.post("/recommend")
+@router.post("/recommend")
 async def get_recommendations(
     request: Request, query: str = Form(...), db: Session = Depends(get_db)
 ):
     """Get AI recommendations"""
-    # Require authentication
-    require_auth(request)
+    # Imported on first use to keep app startup fast (see README "Startup Time")
+    from .recommend import (
+        RECOMMEND_AI_REASONING,
+        recommend_locally,
+        select_candidates,
+        use_local_recommendations,
+    )
 
     # Get all games from the database
-    games = db.query(Game).all()
+    games = _recommendation_games(db)
 
     if not games:
         return templates.TemplateResponse(
@@ -556,25 +942,141 @@ async def get_recommendations(
             },
         )
 
-    # Convert games to the format expected by get_game_recommendations
-    available_games = []
-    for game in games:
-        available_games.append(
-            {
-                "title": game.title,
-                "player_count": game.player_count or "N/A",
-                "game_type": game.game_type or "N/A",
-                "playtime": game.playtime or "N/A",
-                "complexity": game.complexity or "N/A",
-                "description": game.description or "",
-            }
+    if use_local_recommendations():
+        recommendations = recommend_locally(query, games, max_recommendations=5)
+        if RECOMMEND_AI_REASONING and os.getenv("OPENAI_API_KEY"):
+            release_connection(db)
+            reasons = await cancel_on_disconnect(
+                request, explain_recommendations(query, recommendations)
+            )
+            for recommendation, reason in zip(recommendations, reasons):
+                recommendation["reasoning"] = reason or recommendation["reasoning"]
+        return _recommendations_response(request, db, query, recommendations, games)
+
+    # Only the games that best fit the query go into the prompt
+    candidates = select_candidates(query, _available_games(games))
+
+    # Repeated questions about an unchanged collection skip the AI
+    cache_key = recommendation_cache_key(query, candidates, 5)
+    recommendations = get_cached_recommendations(cache_key)
+    if recommendations is None:
+        # Don't hold a pooled connection while waiting on the AI
+        release_connection(db)
+
+        # Get AI recommendations
+        recommendations = await cancel_on_disconnect(
+            request,
+            get_game_recommendations(query, candidates, max_recommendations=5),
         )
+        cache_recommendations(cache_key, recommendations)
+
+    return _recommendations_response(request, db, query, recommendations, games)
+
+
+@router.get("/recommend/stream")
+async def stream_recommendations(
+    request: Request, query: str = Query(...), db: Session = Depends(get_db)
+):
+    """Recommendations as Server-Sent Events, one rendered card per event"""
+    from .recommend import (
+        recommend_locally,
+        select_candidates,
+        use_local_recommendations,
+    )
+
+    games = _recommendation_games(db)
+    context = _recommendation_context(db, games)
+    local = use_local_recommendations()
+    if local:
+        recommendations = recommend_locally(query, games, max_recommendations=5)
+    else:
+        candidates = select_candidates(query, _available_games(games))
+        cache_key = recommendation_cache_key(query, candidates, 5)
+        recommendations = get_cached_recommendations(cache_key)
+    # Nothing below touches the database
+    release_connection(db)
+    card = templates.get_template("_recommendation_card.html")
+
+    async def events():
+        if not games:
+            yield _sse_event(
+                "error", "No games in your collection. Add some games first!"
+            )
+            return
+        if recommendations is not None:
+            for recommendation in recommendations:
+                yield _sse_event(
+                    "recommendation",
+                    card.render(context, recommendation=recommendation),
+                )
+            yield _sse_event("done", str(len(recommendations)))
+            return
+
+        streamed = []
+        try:
+            async for recommendation in stream_game_recommendations(
+                query, candidates, max_recommendations=5
+            ):
+                streamed.append(recommendation)
+                yield _sse_event(
+                    "recommendation",
+                    card.render(context, recommendation=recommendation),
+                )
+        except AIBusyError:
+            yield _sse_event("error", "The AI is busy right now. Please try again.")
+            return
+        except Exception:
+            # Cards already sent stay up, but a cut-off answer is not cached
+            logging.error("Streaming recommendations failed", exc_info=True)
+            yield _sse_event(
+                "error", "Recommendations were interrupted. Please try again."
+            )
+            return
+        cache_recommendations(cache_key, streamed)
+        yield _sse_event("done", str(len(streamed)))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Get AI recommendations
-    recommendations = await get_game_recommendations(
-        query, available_games, max_recommendations=5
+
+def _sse_event(event: str, data: str) -> str:
+    """One Server-Sent Event; multi-line data becomes several data: lines"""
+    lines = "".join(f"data: {line}\n" for line in data.splitlines() or [""])
+    return f"event: {event}\n{lines}\n"
+
+
+def _recommendation_games(db: Session) -> List[Game]:
+    """All games in id order, with the family ratings shown on recommendation cards"""
+    # A stable order keeps prompts (and their cache keys) the same between calls
+    return (
+        db.query(Game)
+        .options(selectinload(Game.family_ratings))
+        .order_by(Game.id)
+        .all()
     )
 
+
+def _available_games(games: List[Game]) -> List[dict]:
+    """Games in the format expected by get_game_recommendations"""
+    return [
+        {
+            "title": game.title,
+            "player_count": game.player_count or "N/A",
+            "game_type": game.game_type or "N/A",
+            "playtime": game.playtime or "N/A",
+            "complexity": game.complexity or "N/A",
+            "description": game.description or "",
+        }
+        for game in games
+    ]
+
+
+def _recommendation_context(db: Session, games: List[Game]) -> dict:
+    """Games, family members and their ratings for recommendation cards"""
     # Get family members and ratings for displaying in recommendations
     family_members = db.query(FamilyMember).order_by(FamilyMember.name).all()
     family_ratings = {}
@@ -584,31 +1086,71 @@ async def get_recommendations(
             rating.family_member_id: rating.rating for rating in game.family_ratings
         }
 
+    return {
+        "games": games,
+        "family_members": family_members,
+        "family_ratings": family_ratings,
+        "total_games": len(games),
+    }
+
+
+def _recommendations_response(
+    request: Request,
+    db: Session,
+    query: str,
+    recommendations: List[dict],
+    games: List[Game],
+):
+    """Recommendation results with the games' family ratings"""
     return templates.TemplateResponse(
         request,
         "recommendations.html",
         {
             "query": query,
             "recommendations": recommendations,
-            "games": games,
-            "family_members": family_members,
-            "family_ratings": family_ratings,
-            "total_games": len(games),
+            **_recommendation_context(db, games),
         },
     )
 
 
+def _save_family_ratings(db: Session, game_id: int, form_data, family_members):
+    """Create or update the rating_{member_id} form fields for a game"""
+    # Load the game's existing ratings once instead of querying per member
+    existing_ratings = {
+        rating.family_member_id: rating
+        for rating in db.query(GameRating).filter(GameRating.game_id == game_id)
+    }
+
+    for member in family_members:
+        rating_key = f"rating_{member.id}"
+        if rating_key in form_data and form_data[rating_key]:
+            try:
+                rating_value = int(form_data[rating_key])
+                if 1 <= rating_value <= 10:
+                    existing_rating = existing_ratings.get(member.id)
+                    if existing_rating:
+                        # Update existing rating
+                        existing_rating.rating = rating_value
+                    else:
+                        # Create new rating
+                        game_rating = GameRating(
+                            game_id=game_id,
+                            family_member_id=member.id,
+                            rating=rating_value,
+                        )
+                        db.add(game_rating)
+            except ValueError:
+                pass  # Skip invalid ratings
+
+
 # Play Log Routes
-@app.get("/play-logs")
+@router.get("/play-logs")
 async def list_play_logs(
     request: Request,
     page: int = Query(1, ge=1),
     db: Session = Depends(get_db),
 ):
     """List all play logs with pagination"""
-    # Require authentication
-    require_auth(request)
-
     # Pagination
     per_page = 20
     offset = (page - 1) * per_page
@@ -638,16 +1180,13 @@ async def list_play_logs(
     )
 
 
-@app.get("/games/{game_id}/log-play")
+@router.get("/games/{game_id}/log-play")
 async def log_play_form(
     request: Request,
     game_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
 ):
     """Form to log a play session for a specific game"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -675,7 +1214,7 @@ async def log_play_form(
     )
 
 
-@app.post("/games/{game_id}/log-play")
+@router.post("/games/{game_id}/log-play")
 async def log_play_session(
     request: Request,
     game_id: int = Path(..., gt=0),
@@ -687,9 +1226,6 @@ async def log_play_session(
     db: Session = Depends(get_db),
 ):
     """Create a new play log entry"""
-    # Require authentication
-    require_auth(request)
-
     game = db.query(Game).filter(Game.id == game_id).first()
     if not game:
         raise HTTPException(status_code=404, detail="Game not found")
@@ -719,35 +1255,7 @@ async def log_play_session(
     form_data = await request.form()
     family_members = db.query(FamilyMember).all()
 
-    for member in family_members:
-        rating_key = f"rating_{member.id}"
-        if rating_key in form_data and form_data[rating_key]:
-            try:
-                rating_value = int(form_data[rating_key])
-                if 1 <= rating_value <= 10:
-                    # Check if rating already exists
-                    existing_rating = (
-                        db.query(GameRating)
-                        .filter(
-                            GameRating.game_id == game_id,
-                            GameRating.family_member_id == member.id,
-                        )
-                        .first()
-                    )
-
-                    if existing_rating:
-                        # Update existing rating
-                        existing_rating.rating = rating_value
-                    else:
-                        # Create new rating
-                        game_rating = GameRating(
-                            game_id=game_id,
-                            family_member_id=member.id,
-                            rating=rating_value,
-                        )
-                        db.add(game_rating)
-            except ValueError:
-                pass  # Skip invalid ratings
+    _save_family_ratings(db, game_id, form_data, family_members)
 
     db.commit()
 
@@ -762,16 +1270,13 @@ async def log_play_session(
     )
 
 
-@app.get("/play-logs/{play_log_id}/edit")
+@router.get("/play-logs/{play_log_id}/edit")
 async def edit_play_log_form(
     request: Request,
     play_log_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
 ):
     """Form to edit a play log entry"""
-    # Require authentication
-    require_auth(request)
-
     play_log = db.query(PlayLog).filter(PlayLog.id == play_log_id).first()
     if not play_log:
         raise HTTPException(status_code=404, detail="Play log not found")
@@ -798,7 +1303,7 @@ async def edit_play_log_form(
     )
 
 
-@app.post("/play-logs/{play_log_id}")
+@router.post("/play-logs/{play_log_id}")
 async def update_play_log(
     request: Request,
     play_log_id: int = Path(..., gt=0),
@@ -810,9 +1315,6 @@ async def update_play_log(
     db: Session = Depends(get_db),
 ):
     """Update a play log entry"""
-    # Require authentication
-    require_auth(request)
-
     play_log = db.query(PlayLog).filter(PlayLog.id == play_log_id).first()
     if not play_log:
         raise HTTPException(status_code=404, detail="Play log not found")
@@ -836,35 +1338,7 @@ async def update_play_log(
     form_data = await request.form()
     family_members = db.query(FamilyMember).all()
 
-    for member in family_members:
-        rating_key = f"rating_{member.id}"
-        if rating_key in form_data and form_data[rating_key]:
-            try:
-                rating_value = int(form_data[rating_key])
-                if 1 <= rating_value <= 10:
-                    # Check if rating already exists
-                    existing_rating = (
-                        db.query(GameRating)
-                        .filter(
-                            GameRating.game_id == play_log.game_id,
-                            GameRating.family_member_id == member.id,
-                        )
-                        .first()
-                    )
-
-                    if existing_rating:
-                        # Update existing rating
-                        existing_rating.rating = rating_value
-                    else:
-                        # Create new rating
-                        game_rating = GameRating(
-                            game_id=play_log.game_id,
-                            family_member_id=member.id,
-                            rating=rating_value,
-                        )
-                        db.add(game_rating)
-            except ValueError:
-                pass  # Skip invalid ratings
+    _save_family_ratings(db, play_log.game_id, form_data, family_members)
 
     db.commit()
 
@@ -873,16 +1347,13 @@ async def update_play_log(
     )
 
 
-@app.post("/play-logs/{play_log_id}/delete")
+@router.post("/play-logs/{play_log_id}/delete")
 async def delete_play_log(
     request: Request,
     play_log_id: int = Path(..., gt=0),
     db: Session = Depends(get_db),
 ):
     """Delete a play log entry"""
-    # Require authentication
-    require_auth(request)
-
     play_log = db.query(PlayLog).filter(PlayLog.id == play_log_id).first()
     if not play_log:
         raise HTTPException(status_code=404, detail="Play log not found")
@@ -895,5 +1366,10 @@ async def delete_play_log(
     )
 
 
+app.include_router(router)
+
+
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,577 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from jinja2 import Template
+from sqlalchemy import event
+
+from .tracing import begin_sql_span, start_span
+
+# Metrics are kept per worker process and exposed in the Prometheus text
+# format at /metrics. With several workers behind one port, each worker also
+# saves its metrics to METRICS_DIR every METRICS_WRITE_INTERVAL seconds, and
+# /metrics adds up every worker's (like prometheus_client's multiprocess
+# mode). The directory must be private to one server and is emptied when the
+# server starts (see server.py).
+METRICS_DIR = os.getenv("METRICS_DIR") or None
+METRICS_WRITE_INTERVAL = float(os.getenv("METRICS_WRITE_INTERVAL", "5"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+AI_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra="") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def snapshot(self) -> list:
+        """This process's values as JSON-ready [label values, value] pairs"""
+        raise NotImplementedError
+
+    def collect(self, others: Iterable[list] = ()) -> List[str]:
+        """Sample lines for this process's values plus other workers' snapshots"""
+        raise NotImplementedError
+
+    def render(self, others: Iterable[list] = ()) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.collect(others),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def collect(self, others: Iterable[list] = ()) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        for snapshot in others:
+            for key, value in snapshot:
+                values[tuple(key)] = values.get(tuple(key), 0) + value
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per-bucket counts followed by the running sum and count
+            state = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return [[list(key), list(state)] for key, state in self._values.items()]
+
+    def collect(self, others: Iterable[list] = ()) -> List[str]:
+        with self._lock:
+            values = {key: list(state) for key, state in self._values.items()}
+        for snapshot in others:
+            for key, state in snapshot:
+                if len(state) != len(self.buckets) + 2:
+                    continue  # Saved by a worker with other buckets
+                total = values.setdefault(tuple(key), [0] * len(state))
+                for index, value in enumerate(state):
+                    total[index] += value
+        lines = []
+        for key, state in sorted(values.items()):
+            cumulative = 0
+            for index, bound in enumerate(self.buckets):
+                cumulative += state[index]
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {int(state[-1])}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is read from a callback at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float]):
+        super().__init__(name, documentation)
+        self.callback = callback
+
+    def _read(self) -> Optional[float]:
+        try:
+            return self.callback()
+        except Exception:
+            return None
+
+    def snapshot(self) -> list:
+        value = self._read()
+        return [] if value is None else [[[], value]]
+
+    def collect(self, others: Iterable[list] = ()) -> List[str]:
+        # Summed across workers, e.g. pool gauges give the server's connections
+        values = [value for snapshot in others for _, value in snapshot]
+        value = self._read()
+        if value is not None:
+            values.append(value)
+        if not values:
+            return []
+        return [f"{self.name} {_format_value(sum(values))}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> Dict[str, list]:
+        return {name: metric.snapshot() for name, metric in self._metrics.items()}
+
+    def render(self, others: Sequence[Dict[str, list]] = ()) -> str:
+        """Text exposition of every metric, adding in other workers' snapshots"""
+        lines = []
+        for name, metric in self._metrics.items():
+            lines.extend(
+                metric.render(snapshot[name] for snapshot in others if name in snapshot)
+            )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "gamedex_http_requests_total",
+        "HTTP requests handled",
+        ["method", "route", "status"],
+    )
+)
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "gamedex_http_request_duration_seconds",
+        "HTTP request latency",
+        ["method", "route"],
+    )
+)
+DB_QUERIES = registry.register(
+    Counter("gamedex_db_queries_total", "SQL statements executed", ["route"])
+)
+REQUEST_DB_QUERIES = registry.register(
+    Histogram(
+        "gamedex_request_db_queries",
+        "SQL statements executed per request",
+        ["route"],
+        buckets=COUNT_BUCKETS,
+    )
+)
+REQUEST_DB_SECONDS = registry.register(
+    Histogram(
+        "gamedex_request_db_duration_seconds",
+        "Time spent executing SQL per request",
+        ["route"],
+    )
+)
+TEMPLATE_RENDER_SECONDS = registry.register(
+    Histogram(
+        "gamedex_template_render_duration_seconds",
+        "Jinja template render time",
+        ["template"],
+    )
+)
+AI_CALL_SECONDS = registry.register(
+    Histogram(
+        "gamedex_ai_call_duration_seconds",
+        "OpenAI call latency",
+        ["operation"],
+        buckets=AI_BUCKETS,
+    )
+)
+AI_CALL_ERRORS = registry.register(
+    Counter("gamedex_ai_call_errors_total", "Failed OpenAI calls", ["operation"])
+)
+AI_CALL_RETRIES = registry.register(
+    Counter(
+        "gamedex_ai_call_retries_total",
+        "OpenAI calls retried after a transient error",
+        ["operation"],
+    )
+)
+AI_TOKENS = registry.register(
+    Counter(
+        "gamedex_ai_tokens_total",
+        "OpenAI tokens consumed",
+        ["operation", "kind"],
+    )
+)
+AI_CALL_TOKENS = registry.register(
+    Histogram(
+        "gamedex_ai_call_tokens",
+        "OpenAI tokens per call",
+        ["operation", "kind"],
+        buckets=TOKEN_BUCKETS,
+    )
+)
+AI_PROMPT_TRUNCATIONS = registry.register(
+    Counter(
+        "gamedex_ai_prompt_truncations_total",
+        "AI prompts cut short to fit the prompt token budget",
+        ["operation"],
+    )
+)
+REQUEST_AI_TOKENS = registry.register(
+    Histogram(
+        "gamedex_request_ai_tokens",
+        "OpenAI tokens consumed per request that called the AI",
+        ["route"],
+        buckets=TOKEN_BUCKETS,
+    )
+)
+AI_CACHE_LOOKUPS = registry.register(
+    Counter(
+        "gamedex_ai_cache_lookups_total",
+        "AI response cache lookups",
+        ["operation", "result"],
+    )
+)
+
+
+@dataclass
+class RequestStats:
+    """Per-request accounting shared by the middleware and SQL hooks"""
+
+    route: str = "unmatched"
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    ai_tokens: int = 0
+    # The ASGI scope, for the route while the request is still running
+    scope: Optional[dict] = field(default=None, repr=False)
+    # Statements executed, for N+1 detection (see sql_monitor)
+    statements: List[str] = field(default_factory=list, repr=False)
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+# Extra per-statement and per-request checks (see sql_monitor), run by the
+# same hooks that do the accounting rather than by listeners of their own.
+# Statement observers get the statement, its duration in seconds and the
+# current request's stats (None outside requests); request observers get
+# the stats of each finished request.
+statement_observers: List[Callable[[str, float, Optional[RequestStats]], None]] = []
+request_observers: List[Callable[[RequestStats], None]] = []
+
+
+def route_label(scope) -> str:
+    """Route template for a request scope, e.g. /games/{game_id}"""
+    route = scope.get("route")
+    if route is not None and getattr(route, "path", None):
+        return route.path
+    if scope.get("path", "").startswith("/static/"):
+        return "/static"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts and latency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = current_request.set(stats)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            stats.route = route_label(scope)
+            method = scope.get("method", "")
+
+            HTTP_REQUESTS.inc(method=method, route=stats.route, status=status)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method=method, route=stats.route)
+            REQUEST_DB_QUERIES.observe(stats.db_queries, route=stats.route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, route=stats.route)
+            if stats.db_queries:
+                DB_QUERIES.inc(stats.db_queries, route=stats.route)
+            if stats.ai_tokens:
+                REQUEST_AI_TOKENS.observe(stats.ai_tokens, route=stats.route)
+            for observer in request_observers:
+                observer(stats)
+
+
+def instrument_engine(engine):
+    """
+    Count SQL statements and their execution time against the current request,
+    and trace each one as a client span when tracing is on.
+
+    These are the only cursor listeners on engine: statement_observers hook
+    further checks into them.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+        span = begin_sql_span(engine.dialect.name, statement)
+        conn.info.setdefault("query_start_time", []).append((time.perf_counter(), span))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        start, span = conn.info["query_start_time"].pop()
+        elapsed = time.perf_counter() - start
+        if span is not None:
+            span.end()
+        stats = current_request.get()
+        if stats is None:
+            DB_QUERIES.inc(route="background")
+        else:
+            stats.db_queries += 1
+            stats.db_seconds += elapsed
+        for observer in statement_observers:
+            observer(statement, elapsed, stats)
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_query_timer(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        conn = exception_context.connection
+        timers = conn.info.get("query_start_time") if conn is not None else None
+        if timers:
+            _, span = timers.pop()
+            if span is not None:
+                span.record_error(exception_context.original_exception)
+                span.end()
+
+
+def register_pool_metrics(engine):
+    """Expose connection pool usage for engine (only pools that track it)
+
+    The pool is looked up on every scrape: engine.dispose() (e.g. after a
+    worker fork) replaces engine.pool with a new one.
+    """
+    for name, attribute, documentation in (
+        ("gamedex_db_pool_size", "size", "Configured connection pool size"),
+        ("gamedex_db_pool_checked_out", "checkedout", "Connections in use"),
+        ("gamedex_db_pool_checked_in", "checkedin", "Idle pooled connections"),
+        ("gamedex_db_pool_overflow", "overflow", "Connections beyond pool size"),
+    ):
+        if callable(getattr(engine.pool, attribute, None)):
+            registry.register(
+                Gauge(
+                    name,
+                    documentation,
+                    lambda attribute=attribute: getattr(engine.pool, attribute)(),
+                )
+            )
+
+
+class InstrumentedTemplate(Template):
+    """Jinja template that times and traces each top-level render"""
+
+    def render(self, *args, **kwargs):
+        name = self.name or "<string>"
+        start = time.perf_counter()
+        try:
+            with start_span(f"render {name}", **{"template.name": name}):
+                return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER_SECONDS.observe(time.perf_counter() - start, template=name)
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_snapshot(directory: Optional[str] = None):
+    """Save this worker's metrics to directory for the other workers to render"""
+    directory = directory or METRICS_DIR
+    if not directory:
+        return
+    path = _snapshot_path(directory, os.getpid())
+    # Write then rename, so readers never see a half-written file
+    with open(path + ".tmp", "w") as f:
+        json.dump({"pid": os.getpid(), "metrics": registry.snapshot()}, f)
+    os.replace(path + ".tmp", path)
+
+
+def read_snapshots(directory: Optional[str] = None) -> List[Dict[str, list]]:
+    """Metrics saved by the other workers, including ones that have exited.
+
+    Counters and histograms of exited workers (e.g. recycled after
+    MAX_REQUESTS) still count, so totals never go backwards; their gauges
+    are dropped.
+    """
+    directory = directory or METRICS_DIR
+    if not directory:
+        return []
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading metrics snapshot {name}: {e}")
+            continue
+        if saved["pid"] == os.getpid():
+            continue  # This worker's live values are used instead
+        metrics = saved["metrics"]
+        if not _process_alive(saved["pid"]):
+            metrics = {
+                metric: values
+                for metric, values in metrics.items()
+                if not isinstance(registry._metrics.get(metric), Gauge)
+            }
+        snapshots.append(metrics)
+    return snapshots
+
+
+def clear_snapshots(directory: Optional[str] = None):
+    """Remove the snapshots left by a previous run of the server"""
+    directory = directory or METRICS_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith("metrics-"):
+            os.remove(os.path.join(directory, name))
+
+
+class SnapshotWriter:
+    """Save this worker's metrics to METRICS_DIR in the background"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        interval: float = METRICS_WRITE_INTERVAL,
+    ):
+        self.directory = directory or METRICS_DIR
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self):
+        try:
+            write_snapshot(self.directory)
+        except OSError as e:
+            print(f"Error writing metrics snapshot: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.to_thread(self.write)
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self.directory and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            # Keep the requests served since the last write
+            self.write()
+
+
+def render_metrics(directory: Optional[str] = None) -> str:
+    """
+    All metrics in the Prometheus text exposition format, summed over the
+    workers sharing directory (METRICS_DIR) when there is one.
+    """
+    return registry.render(read_snapshots(directory))
@@ -1,7 +1,10 @@
 from datetime import UTC, datetime
 from typing import List, Optional
 
-from sqlmodel import Field, Relationship, SQLModel
+from sqlalchemy import event
+from sqlmodel import Field, Index, Relationship, SQLModel
+
+from .ranges import game_numbers
 
 
 class FamilyMember(SQLModel, table=True):
@@ -23,6 +26,11 @@ class FamilyMember(SQLModel, table=True):
 
 class Game(SQLModel, table=True):
     __tablename__ = "games"
+    __table_args__ = (
+        # Range filters: "supports N players", "plays in under M minutes"
+        Index("ix_games_players", "min_players", "max_players"),
+        Index("ix_games_playtime", "max_playtime", "min_playtime"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True, index=True)
     title: str = Field(max_length=255, nullable=False, index=True)
@@ -37,6 +45,12 @@ class Game(SQLModel, table=True):
     playtime: Optional[str] = Field(max_length=100, nullable=True)
     complexity: Optional[str] = Field(max_length=100, nullable=True)
     description: Optional[str] = Field(nullable=True)
+    # Parsed from player_count, playtime and setup_time on every write
+    min_players: Optional[int] = Field(default=None, nullable=True)
+    max_players: Optional[int] = Field(default=None, nullable=True)
+    min_playtime: Optional[int] = Field(default=None, nullable=True)  # minutes
+    max_playtime: Optional[int] = Field(default=None, nullable=True)  # minutes
+    setup_minutes: Optional[int] = Field(default=None, nullable=True)
     created_at: Optional[datetime] = Field(default=None, nullable=True)
     updated_at: Optional[datetime] = Field(default=None, nullable=True)
 
@@ -73,6 +87,16 @@ class Game(SQLModel, table=True):
         return f"<Game(id={self.id}, title='{self.title}')>"
 
 
+@event.listens_for(Game, "before_insert")
+@event.listens_for(Game, "before_update")
+def set_game_numbers(mapper, connection, target):
+    """Keep the numeric columns in step with the free-text fields"""
+    for key, value in game_numbers(
+        target.player_count, target.playtime, target.setup_time
+    ).items():
+        setattr(target, key, value)
+
+
 class PlayLog(SQLModel, table=True):
     __tablename__ = "play_logs"
 
@@ -115,3 +139,48 @@ class GameRating(SQLModel, table=True):
 
     def __repr__(self):
         return f"<GameRating(game_id={self.game_id}, family_member_id={self.family_member_id}, rating={self.rating})>"
+
+
+class MetadataCacheEntry(SQLModel, table=True):
+    __tablename__ = "ai_metadata_cache"
+    __table_args__ = (
+        Index(
+            "ix_ai_metadata_cache_lookup",
+            "normalized_title",
+            "model",
+            "prompt_version",
+            unique=True,
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    normalized_title: str = Field(max_length=255, nullable=False)
+    model: str = Field(max_length=100, nullable=False)
+    prompt_version: int = Field(nullable=False)
+    data: str = Field(nullable=False)  # JSON-encoded metadata
+    created_at: Optional[datetime] = Field(default=None, nullable=True)
+    expires_at: datetime = Field(nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<MetadataCacheEntry(normalized_title='{self.normalized_title}', model='{self.model}')>"
+
+
+class Job(SQLModel, table=True):
+    __tablename__ = "jobs"
+
+    id: Optional[int] = Field(default=None, primary_key=True, index=True)
+    kind: str = Field(max_length=50, nullable=False)  # e.g. "autofill"
+    game_id: Optional[int] = Field(default=None, nullable=True, index=True)
+    status: str = Field(
+        default="pending", max_length=20, nullable=False, index=True
+    )  # pending, running, done or failed
+    attempts: int = Field(default=0, nullable=False)
+    error: Optional[str] = Field(default=None, max_length=500, nullable=True)
+    # Items processed so far, for jobs that work through many games
+    progress_done: Optional[int] = Field(default=None, nullable=True)
+    progress_total: Optional[int] = Field(default=None, nullable=True)
+    created_at: Optional[datetime] = Field(default=None, nullable=True)
+    updated_at: Optional[datetime] = Field(default=None, nullable=True)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+from .models import Game
+
+# Number of game cards rendered per page / fragment
+GAMES_PAGE_SIZE = 24
+
+# Supported sort orders: sort_by value -> (column, descending)
+GAME_SORTS = {
+    "title": (Game.title, False),
+    "created_at": (Game.created_at, True),
+    "updated_at": (Game.updated_at, True),
+}
+DEFAULT_GAME_SORT = "title"
+
+
+def encode_cursor(value, game_id: int) -> str:
+    """Encode the sort value and id of the last game on a page as an opaque cursor"""
+    if isinstance(value, datetime):
+        payload = {"d": value.isoformat(), "id": game_id}
+    else:
+        payload = {"v": value, "id": game_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[object, int]]:
+    """Decode a cursor produced by encode_cursor, returning None if it is invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if "d" in payload:
+            value = datetime.fromisoformat(payload["d"])
+        else:
+            value = payload["v"]
+        return value, int(payload["id"])
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return None
+
+
+def paginate_games(
+    query: Query,
+    sort_by: Optional[str] = None,
+    cursor: Optional[str] = None,
+    page_size: int = GAMES_PAGE_SIZE,
+) -> Tuple[List[Game], Optional[str]]:
+    """
+    Return one page of games using keyset pagination on the active sort.
+
+    Games are ordered by the sort column with the id as a tie-breaker, and
+    each page continues strictly after the cursor row, so fetching a page
+    costs the same regardless of how deep into the collection it is.
+
+    Args:
+        query: Filtered game query (without ordering)
+        sort_by: One of GAME_SORTS; unknown values fall back to title
+        cursor: Cursor returned for the previous page, or None for the first
+        page_size: Maximum number of games to return
+
+    Returns:
+        Tuple of (games on this page, cursor for the next page or None)
+    """
+    column, descending = GAME_SORTS.get(sort_by or "", GAME_SORTS[DEFAULT_GAME_SORT])
+
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        value, last_id = position
+        id_after = Game.id < last_id if descending else Game.id > last_id
+        if value is None:
+            # Already into the trailing rows without a sort value
+            query = query.filter(and_(column.is_(None), id_after))
+        else:
+            value_after = column < value if descending else column > value
+            query = query.filter(
+                or_(value_after, and_(column == value, id_after), column.is_(None))
+            )
+
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), Game.id.desc())
+    else:
+        query = query.order_by(column.asc().nulls_last(), Game.id.asc())
+
+    games = query.limit(page_size + 1).all()
+
+    next_cursor = None
+    if len(games) > page_size:
+        games = games[:page_size]
+        last = games[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), last.id)
+
+    return games, next_cursor
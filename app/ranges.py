@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Open-ended player counts ("5+") are read as N up to this many more;
+# open-ended durations ("120+ minutes") have no upper bound
+OPEN_RANGE_SPAN = 4
+
+# A number with the unit written after it, if any ("45", "1.5 hours", "30m")
+_UNIT = r"(hours?|hrs?|h|minutes?|mins?|m)(?![a-z])"
+_AMOUNT = re.compile(r"(\d+(?:\.\d+)?)(?:\s*" + _UNIT + ")?")
+_NEXT_UNIT = re.compile(r"\b" + _UNIT)
+# Between the hours and minutes of one duration ("1 hour 30 minutes", "1h30m")
+_COMPOUND_SEPARATOR = re.compile(r"\s*(?:and\s*)?")
+# Between the ends of a range or the options of a list ("2-4", "2, 4 or 6")
+_LIST_SEPARATOR = re.compile(r"(?:\s*(?:-|–|to|,|/|or|and)\s*)+")
+
+
+@dataclass
+class _Amount:
+    value: float
+    unit: Optional[str]
+    start: int
+    end: int
+
+
+def _amounts(value: str) -> List[_Amount]:
+    """The numbers in value, durations in minutes and compound ones summed"""
+    amounts: List[_Amount] = []
+    for match in _AMOUNT.finditer(value):
+        # A bare number takes the next unit in the text ("1-2 hours"); hours
+        # become minutes and anything else (players, minutes) is kept as is
+        unit = match.group(2)
+        if unit is None:
+            following = _NEXT_UNIT.search(value, match.end())
+            unit = following.group(1) if following else None
+        number = float(match.group(1)) * (60 if unit and unit[0] == "h" else 1)
+
+        previous = amounts[-1] if amounts else None
+        if (
+            previous is not None
+            and previous.unit
+            and previous.unit[0] == "h"
+            and match.group(2)
+            and match.group(2)[0] == "m"
+            and _COMPOUND_SEPARATOR.fullmatch(value, previous.end, match.start())
+        ):
+            previous.value += number
+            previous.end = match.end()
+        else:
+            amounts.append(_Amount(number, match.group(2), match.start(), match.end()))
+    return amounts
+
+
+def parse_range(
+    text: Optional[str], open_span: Optional[int] = OPEN_RANGE_SPAN
+) -> Optional[Tuple[int, Optional[int]]]:
+    """(low, high) from free text like "2-4 players", "5+" or "1-2 hours".
+
+    Durations are converted to minutes, each number with its own unit, so
+    "45 minutes to 1 hour" is (45, 60), "1.5 hours" is (90, 90) and
+    "1h 30m" is (90, 90). Lists span their options ("2, 4 or 6" is (2, 6)).
+    Open-ended "N+" player counts end open_span above N, or at None when
+    open_span is None; open-ended durations always end at None.
+    """
+    if not text:
+        return None
+    value = text.lower()
+    amounts = _amounts(value)
+    if not amounts:
+        return None
+
+    count = 1
+    while count < len(amounts) and _LIST_SEPARATOR.fullmatch(
+        value, amounts[count - 1].end, amounts[count].start
+    ):
+        count += 1
+    numbers = [amount.value for amount in amounts[:count]]
+    low, high = min(numbers), max(numbers)
+    if count == 1:
+        if re.search(r"\bup to\s+\d", value):
+            low = 1
+        elif value[amounts[0].end :].lstrip().startswith("+"):
+            duration = _NEXT_UNIT.search(value) is not None
+            high = None if open_span is None or duration else low + open_span
+    return round(low), None if high is None else round(high)
+
+
+def game_numbers(
+    player_count: Optional[str], playtime: Optional[str], setup_time: Optional[str]
+) -> Dict[str, Optional[int]]:
+    """
+    The numeric game columns for the free-text fields.
+
+    Unparseable fields give None, as does the upper end of an open-ended
+    range ("5+ players"). Setup time is stored as its upper bound.
+    """
+    players = parse_range(player_count, open_span=None) or (None, None)
+    minutes = parse_range(playtime, open_span=None) or (None, None)
+    setup = parse_range(setup_time, open_span=None) or (None, None)
+    return {
+        "min_players": players[0],
+        "max_players": players[1],
+        "min_playtime": minutes[0],
+        "max_playtime": minutes[1],
+        "setup_minutes": setup[1] if setup[1] is not None else setup[0],
+    }
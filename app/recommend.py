@@ -0,0 +1,274 @@
+import os
+import re
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Game
+from .ranges import parse_range
+from .vector_index import game_index
+
+# Most games sent to the AI for one recommendation query
+RECOMMEND_CANDIDATES = int(os.getenv("RECOMMEND_CANDIDATES", "25"))
+# How /recommend picks games: "ai" asks the model, "local" ranks them with
+# the in-process similarity index. Without an OpenAI API key it is always local.
+RECOMMEND_MODE = os.getenv("RECOMMEND_MODE", "ai").lower()
+# In local mode, have the AI write the reasoning for the games it picked
+RECOMMEND_AI_REASONING = os.getenv("RECOMMEND_AI_REASONING", "false").lower() == "true"
+
+NUMBER_WORDS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "a": 1,
+    "an": 1,
+    "half an": 0.5,
+    "half a": 0.5,
+}
+_COUNT = r"(\d+|one|two|three|four|five|six|seven|eight|nine|ten)"
+_AMOUNT = (
+    r"(\d+(?:\.\d+)?|half an?|an?|one|two|three|four|five|six|seven|eight|nine|ten)"
+)
+
+_PLAYERS = re.compile(
+    r"\b" + _COUNT + r"[\s-]*(?:players?|people|persons|of us|kids|friends|adults)\b"
+)
+_PARTY_OF = re.compile(r"\b(?:party|group|family) of\s+" + _COUNT + r"\b")
+# "game for 4", unless the number is a duration ("for 2 hours")
+_FOR_COUNT = re.compile(
+    r"\bfor\s+" + _COUNT + r"\b(?![\s-]*(?:hours?|hrs?|h|minutes?|mins?|m)\b)"
+)
+_DURATION = re.compile(r"\b" + _AMOUNT + r"[\s-]*(hours?|hrs?|minutes?|mins?)\b")
+
+# Complexity levels, from the words people use in queries and metadata
+COMPLEXITY_LEVELS = {
+    "easy": 1,
+    "simple": 1,
+    "light": 1,
+    "beginner": 1,
+    "casual": 1,
+    "medium": 2,
+    "moderate": 2,
+    "intermediate": 2,
+    "hard": 3,
+    "heavy": 3,
+    "complex": 3,
+    "challenging": 3,
+    "difficult": 3,
+    "expert": 4,
+}
+# A "quick" game without an explicit duration (minutes)
+QUICK_MINUTES = 30
+# Weight of the player count, time and complexity fit (score_game) against
+# text similarity (0 to 1) when ranking locally
+PREFERENCE_WEIGHT = 0.1
+
+# Query words too common to say anything about a game
+_STOP_WORDS = {
+    "about",
+    "game",
+    "games",
+    "half",
+    "have",
+    "hour",
+    "hours",
+    "like",
+    "minute",
+    "minutes",
+    "people",
+    "play",
+    "player",
+    "players",
+    "something",
+    "that",
+    "them",
+    "under",
+    "want",
+    "what",
+    "with",
+}
+
+
+@dataclass
+class QueryPreferences:
+    """What a recommendation query asks for, as far as it can be parsed"""
+
+    players: Optional[int] = None
+    max_minutes: Optional[int] = None
+    complexity: Optional[int] = None
+    words: Tuple[str, ...] = ()
+
+
+def _number(text: str) -> float:
+    return NUMBER_WORDS[text] if text in NUMBER_WORDS else float(text)
+
+
+def parse_query(query: str) -> QueryPreferences:
+    """Player count, time budget and complexity mentioned in a query"""
+    text = query.lower()
+    prefs = QueryPreferences()
+
+    match = _PLAYERS.search(text) or _PARTY_OF.search(text) or _FOR_COUNT.search(text)
+    if match:
+        prefs.players = max(int(_number(match.group(1))), 1)
+    elif re.search(r"\bsolo\b|\bby myself\b", text):
+        prefs.players = 1
+    elif re.search(r"\bcouple\b|\bdate night\b|\btwo of us\b", text):
+        prefs.players = 2
+
+    match = _DURATION.search(text)
+    if match:
+        amount = _number(match.group(1))
+        minutes = amount * 60 if match.group(2).startswith("h") else amount
+        prefs.max_minutes = int(minutes)
+    elif re.search(r"\b(quick|short|fast)\b", text):
+        prefs.max_minutes = QUICK_MINUTES
+
+    levels = [
+        COMPLEXITY_LEVELS[word]
+        for word in re.findall(r"[a-z]+", text)
+        if word in COMPLEXITY_LEVELS
+    ]
+    if levels:
+        prefs.complexity = levels[0]
+
+    prefs.words = tuple(
+        sorted(set(re.findall(r"[a-z]{4,}", text)) - _STOP_WORDS - set(NUMBER_WORDS))
+    )
+    return prefs
+
+
+def complexity_level(text: Optional[str]) -> Optional[int]:
+    """Numeric complexity (1 easy to 4 expert) from a game's complexity text"""
+    for word in re.findall(r"[a-z]+", (text or "").lower()):
+        if word in COMPLEXITY_LEVELS:
+            return COMPLEXITY_LEVELS[word]
+    return None
+
+
+def score_game(game: Dict, prefs: QueryPreferences) -> float:
+    """How well a game fits the parsed query; higher is better"""
+    score = 0.0
+
+    if prefs.players is not None:
+        players = parse_range(game.get("player_count"))
+        if players:
+            score += 3 if players[0] <= prefs.players <= players[1] else -3
+
+    if prefs.max_minutes is not None:
+        playtime = parse_range(game.get("playtime"))
+        if playtime:
+            # Open-ended playtimes ("120+ minutes") never fully fit
+            if playtime[1] is not None and playtime[1] <= prefs.max_minutes:
+                score += 2
+            elif playtime[0] <= prefs.max_minutes:
+                score += 1
+            else:
+                score -= 2
+
+    if prefs.complexity is not None:
+        level = complexity_level(game.get("complexity"))
+        if level is not None:
+            score += 2 - abs(level - prefs.complexity) * 1.5
+
+    if prefs.words:
+        text = " ".join(
+            str(game.get(field) or "")
+            for field in ("title", "game_type", "description")
+        ).lower()
+        score += 0.5 * sum(1 for word in prefs.words if word in text)
+
+    return score
+
+
+def select_candidates(
+    query: str, games: List[Dict], limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    The games worth sending to the AI for query, best matches first.
+
+    Collections of up to limit (default RECOMMEND_CANDIDATES) games are
+    returned unchanged. Larger ones are ranked by score_game, ties keeping
+    collection order, so the same query over the same games always produces
+    the same prompt.
+    """
+    limit = RECOMMEND_CANDIDATES if limit is None else limit
+    if len(games) <= limit:
+        return games
+    prefs = parse_query(query)
+    ranked = sorted(
+        enumerate(games), key=lambda item: (-score_game(item[1], prefs), item[0])
+    )
+    return [game for _, game in ranked[:limit]]
+
+
+def use_local_recommendations() -> bool:
+    """Whether /recommend ranks games locally instead of asking the AI"""
+    return RECOMMEND_MODE == "local" or not os.getenv("OPENAI_API_KEY")
+
+
+def explain_match(game: Dict, prefs: QueryPreferences) -> str:
+    """Short reasoning for a locally recommended game"""
+    reasons = []
+    players = parse_range(game.get("player_count"))
+    if prefs.players and players and players[0] <= prefs.players <= players[1]:
+        reasons.append(f"plays {prefs.players} ({game['player_count']})")
+    playtime = parse_range(game.get("playtime"))
+    if (
+        prefs.max_minutes
+        and playtime
+        and playtime[1] is not None
+        and playtime[1] <= prefs.max_minutes
+    ):
+        reasons.append(f"fits in {prefs.max_minutes} minutes ({game['playtime']})")
+    if prefs.complexity and complexity_level(game.get("complexity")) == (
+        prefs.complexity
+    ):
+        reasons.append(f"{game['complexity'].lower()} complexity")
+    text = " ".join(
+        str(game.get(field) or "") for field in ("title", "game_type", "description")
+    ).lower()
+    words = [word for word in prefs.words if word in text]
+    if words:
+        reasons.append("matches " + ", ".join(f'"{word}"' for word in words))
+    if not reasons:
+        return "Closest match in your collection."
+    sentence = "; ".join(reasons)
+    return sentence[0].upper() + sentence[1:] + "."
+
+
+def recommend_locally(
+    query: str, games: Iterable[Game], max_recommendations: int = 5
+) -> List[Dict]:
+    """
+    Recommend games without the AI.
+
+    games (the whole collection) are synced into the similarity index, then
+    ranked by how similar their text is to the query plus how well they fit
+    its player count, time budget and complexity. Returns the game fields
+    with a "reasoning" entry, best first; games with no positive score are
+    left out.
+    """
+    game_index.sync(games)
+    prefs = parse_query(query)
+    # Keywords already count through the text similarity
+    fit = replace(prefs, words=())
+    similarity = dict(game_index.search(query))
+    scores = {
+        game_id: similarity.get(game_id, 0.0)
+        + PREFERENCE_WEIGHT * score_game(game, fit)
+        for game_id, game in game_index.games.items()
+    }
+    ranked = sorted(scores, key=lambda game_id: (-scores[game_id], game_id))
+    recommendations = []
+    for game_id in ranked[:max_recommendations]:
+        if scores[game_id] > 0:
+            game = game_index.games[game_id]
+            recommendations.append({**game, "reasoning": explain_match(game, prefs)})
+    return recommendations
@@ -0,0 +1,113 @@
+import logging
+import os
+import random
+
+import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+from .metrics import METRICS_DIR, clear_snapshots
+
+logger = logging.getLogger(__name__)
+
+# Server settings (all optional, see README "Running in production")
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8080"))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "1000"))
+# Each worker recycles after MAX_REQUESTS plus a random 0-MAX_REQUESTS_JITTER
+# more, so workers started together don't all restart at once
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "50"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+# Proxies trusted to set X-Forwarded-For / X-Forwarded-Proto (comma-separated
+# IPs or networks; uvicorn's default trusts only localhost)
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def available_cpus() -> int:
+    """Number of CPUs this process may run on (respects container CPU sets)"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def worker_count() -> int:
+    """Worker count from WEB_CONCURRENCY, defaulting to one per available CPU"""
+    value = os.getenv("WEB_CONCURRENCY")
+    if value:
+        try:
+            return max(int(value), 1)
+        except ValueError:
+            raise ValueError("WEB_CONCURRENCY must be a positive integer")
+    return available_cpus()
+
+
+def preload_app():
+    """Import the application once in the supervisor before spawning workers.
+
+    Configuration errors (missing environment variables, bad DATABASE_URL)
+    then fail the launch immediately instead of crash-looping every worker.
+    """
+    from .main import app
+
+    return app
+
+
+class JitteredServer(uvicorn.Server):
+    """uvicorn server that adds its own jitter to the max-requests limit.
+
+    Workers are spawned with a copy of the supervisor's config, so run()
+    (called in the worker) jitters only that worker's limit, and a recycled
+    worker draws a new one.
+    """
+
+    def run(self, sockets=None):
+        if self.config.limit_max_requests and MAX_REQUESTS_JITTER > 0:
+            self.config.limit_max_requests += random.randint(0, MAX_REQUESTS_JITTER)
+        return super().run(sockets)
+
+
+def serve(config: uvicorn.Config):
+    """Run config like uvicorn.run, but with JitteredServer workers"""
+    server = JitteredServer(config)
+    try:
+        if config.workers > 1:
+            sock = config.bind_socket()
+            Multiprocess(config, target=server.run, sockets=[sock]).run()
+        else:
+            server.run()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    """Run GameDex with a pool of uvicorn worker processes"""
+    preload_app()
+
+    workers = worker_count()
+    if METRICS_DIR:
+        clear_snapshots()
+    elif workers > 1:
+        logger.warning(
+            "%d workers share one port but METRICS_DIR is not set: each "
+            "/metrics scrape only shows the worker that answered it",
+            workers,
+        )
+
+    serve(
+        uvicorn.Config(
+            "app.main:app",
+            host=HOST,
+            port=PORT,
+            workers=workers,
+            # Recycle workers after about this many requests (JitteredServer adds
+            # each worker's jitter) to bound memory growth
+            limit_max_requests=MAX_REQUESTS or None,
+            # Time allowed for in-flight requests on shutdown / SIGHUP restarts
+            timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+            forwarded_allow_ips=FORWARDED_ALLOW_IPS,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .metrics import (
+    RequestStats,
+    request_observers,
+    route_label,
+    statement_observers,
+)
+
+# Statements slower than this are logged with the route that issued them
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Identical statement shapes repeated this often in one request look like N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+logger = logging.getLogger("gamedex.sql")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+\b")
+_PARAM = re.compile(r"%\(\w+\)s|:\w+|\?")
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so repeats with different parameters compare equal"""
+    shape = " ".join(statement.split())
+    shape = _STRING.sub("?", shape)
+    shape = _NUMBER.sub("?", shape)
+    shape = _PARAM.sub("?", shape)
+    return _IN_LIST.sub("(?...)", shape)
+
+
+@dataclass
+class QueryRecord:
+    statement: str
+    duration: float
+
+
+@dataclass
+class QueryLog:
+    """Statements executed while the log is active"""
+
+    queries: List[QueryRecord] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+
+def repeated_shapes(
+    statements: List[str], threshold: Optional[int] = None
+) -> List[Tuple[str, int]]:
+    """Statement shapes executed at least threshold times, with their counts
+
+    threshold defaults to N_PLUS_ONE_THRESHOLD.
+    """
+    threshold = N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+    counts = Counter(statement_shape(statement) for statement in statements)
+    return [(shape, count) for shape, count in counts.items() if count >= threshold]
+
+
+# Logs that see every statement in the process (used by record_queries)
+_watchers: List[QueryLog] = []
+
+
+def check_statement(statement: str, duration: float, stats: Optional[RequestStats]):
+    """Keep statement for N+1 detection and watchers, and log it if slow"""
+    if stats is not None:
+        stats.statements.append(statement)
+    for watcher in _watchers:
+        watcher.queries.append(QueryRecord(statement, duration))
+
+    if duration * 1000 >= SLOW_QUERY_MS:
+        route = route_label(stats.scope) if stats and stats.scope else "background"
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s",
+            duration * 1000,
+            route,
+            " ".join(statement.split()),
+        )
+
+
+def report_n_plus_one(stats: RequestStats):
+    """Warn about statement shapes repeated enough to be a probable N+1"""
+    for shape, count in repeated_shapes(stats.statements):
+        logger.warning(
+            "Probable N+1 on %s: statement executed %d times: %s",
+            stats.route,
+            count,
+            shape,
+        )
+
+
+def monitor_queries():
+    """
+    Check the statements of engines set up with metrics.instrument_engine:
+    slow ones are logged, and so are probable N+1s once each request ends.
+    """
+    if check_statement not in statement_observers:
+        statement_observers.append(check_statement)
+    if report_n_plus_one not in request_observers:
+        request_observers.append(report_n_plus_one)
+
+
+@contextmanager
+def record_queries():
+    """Collect every statement executed in the process inside the block"""
+    query_log = QueryLog()
+    _watchers.append(query_log)
+    try:
+        yield query_log
+    finally:
+        _watchers.remove(query_log)
+
+
+@contextmanager
+def assert_max_queries(n: int):
+    """Fail if the block executes more than n SQL statements (test helper)"""
+    with record_queries() as query_log:
+        yield query_log
+    if len(query_log) > n:
+        statements = "\n".join(
+            f"  {index}. {' '.join(query.statement.split())}"
+            for index, query in enumerate(query_log.queries, 1)
+        )
+        raise AssertionError(
+            f"Expected at most {n} queries, {len(query_log)} were executed:\n"
+            f"{statements}"
+        )
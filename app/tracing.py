@@ -0,0 +1,374 @@
+import functools
+import inspect
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+# Tracing is off unless enabled. Spans are exported in the OpenTelemetry
+# OTLP/JSON format, to a collector when OTEL_EXPORTER_OTLP_ENDPOINT is set,
+# otherwise appended to TRACE_FILE (one export request per line, as written
+# by the collector's file exporter).
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "gamedex")
+
+# OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_span_id: str = "",
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = 0
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException):
+        self.status = STATUS_ERROR
+        self.attributes["exception.type"] = type(exc).__name__
+        self.attributes["exception.message"] = str(exc)
+
+    def end(self):
+        self.end_ns = time.time_ns()
+        if _processor is not None:
+            _processor.on_end(self)
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(k, v) for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+def export_request(spans: List[Span]) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest body for spans"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [
+                    {
+                        "scope": {"name": "gamedex"},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class JsonLinesExporter:
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(export_request(spans), separators=(",", ":")) + "\n")
+
+
+class OTLPHttpExporter:
+    def __init__(self, endpoint: str, timeout: float = 5):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+
+    def export(self, spans: List[Span]):
+        # Imported here: only processes exporting over OTLP pay for it
+        import urllib.request
+
+        body = json.dumps(export_request(spans)).encode()
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class BatchSpanProcessor:
+    """Export finished spans from a background thread in batches"""
+
+    def __init__(self, exporter, max_batch: int = 256, interval: float = 2.0):
+        self.exporter = exporter
+        self.max_batch = max_batch
+        self.interval = interval
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=10000)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Drop spans rather than slow down requests
+
+    def _drain(self, first: Optional[Span] = None) -> List[Span]:
+        batch = [first] if first else []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self.interval)
+            except queue.Empty:
+                continue
+            self._export(self._drain(first))
+
+    def _export(self, batch: List[Span]):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            print(f"Error exporting traces: {e}")
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Export everything queued so far (see flush_tracing; also used in tests)"""
+        while not self._queue.empty():
+            self._export(self._drain())
+        # Wait for a batch the export thread may have picked up already
+        self._queue.join()
+
+
+_processor: Optional[BatchSpanProcessor] = None
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(exporter=None):
+    """Start exporting spans; without an exporter, pick one from the environment"""
+    global _processor
+    if exporter is None:
+        if OTLP_ENDPOINT:
+            exporter = OTLPHttpExporter(OTLP_ENDPOINT)
+        else:
+            exporter = JsonLinesExporter(TRACE_FILE)
+    _processor = BatchSpanProcessor(exporter)
+    return _processor
+
+
+def tracing_enabled() -> bool:
+    return _processor is not None
+
+
+def begin_span(
+    name: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    parent: Optional[Span] = None,
+    trace_id: str = "",
+    parent_span_id: str = "",
+    **attributes,
+) -> Span:
+    """Create a span as a child of parent (default: the current span)"""
+    parent = parent if parent is not None else current_span.get()
+    if parent is not None:
+        trace_id, parent_span_id = parent.trace_id, parent.span_id
+    return Span(
+        name,
+        trace_id or secrets.token_hex(16),
+        parent_span_id,
+        kind=kind,
+        attributes=attributes,
+    )
+
+
+@contextmanager
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Run the block inside a child span of the current span (no-op when disabled)"""
+    if _processor is None:
+        yield None
+        return
+
+    span = begin_span(name, kind=kind, **attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_error(exc)
+        raise
+    finally:
+        current_span.reset(token)
+        span.end()
+
+
+def traced(name: str, kind: int = SPAN_KIND_INTERNAL):
+    """Decorator wrapping an async function or async generator in a span"""
+
+    def decorator(func):
+        if inspect.isasyncgenfunction(func):
+            return _traced_generator(func, name, kind)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name, kind=kind):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _traced_generator(func, name: str, kind: int):
+    # One span from the first item to exhaustion. It is only the current span
+    # while the generator runs, not while the caller handles what it yielded,
+    # so the caller's own spans don't nest under it.
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        span = begin_span(name, kind=kind) if _processor is not None else None
+        generator = func(*args, **kwargs)
+        try:
+            while True:
+                token = current_span.set(span) if span is not None else None
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    if token is not None:
+                        current_span.reset(token)
+                yield item
+        except GeneratorExit:
+            raise  # The caller stopped early, not an error
+        except BaseException as exc:
+            if span is not None:
+                span.record_error(exc)
+            raise
+        finally:
+            await generator.aclose()
+            if span is not None:
+                span.end()
+
+    return wrapper
+
+
+def parse_traceparent(header: str):
+    """Trace and parent span id from a W3C traceparent header, if valid"""
+    parts = header.split("-")
+    if len(parts) == 4 and len(parts[1]) == 32 and len(parts[2]) == 16:
+        return parts[1], parts[2]
+    return "", ""
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root server span per request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _processor is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        trace_id, parent_span_id = parse_traceparent(
+            headers.get(b"traceparent", b"").decode("latin-1")
+        )
+        method = scope.get("method", "")
+        span = begin_span(
+            method,
+            kind=SPAN_KIND_SERVER,
+            trace_id=trace_id,
+            parent_span_id=parent_span_id,
+            **{"http.method": method, "url.path": scope.get("path", "")},
+        )
+        token = current_span.set(span)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                span.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    span.status = STATUS_ERROR
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            span.record_error(exc)
+            raise
+        finally:
+            current_span.reset(token)
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                span.name = f"{method} {route.path}"
+                span.set_attribute("http.route", route.path)
+            span.end()
+
+
+def begin_sql_span(dialect: str, statement: str) -> Optional[Span]:
+    """Client span for a SQL statement, or None when there is nothing to trace
+
+    Started and ended by the SQL hooks in metrics.instrument_engine.
+    """
+    if _processor is None or current_span.get() is None:
+        return None
+    return begin_span(
+        statement.split(None, 1)[0].upper() if statement else "SQL",
+        kind=SPAN_KIND_CLIENT,
+        **{
+            "db.system": dialect,
+            "db.statement": " ".join(statement.split()),
+        },
+    )
+
+
+def flush_tracing():
+    """Export the spans still queued (called at shutdown)"""
+    if _processor is not None:
+        _processor.flush()
+
+
+if TRACING_ENABLED:
+    configure_tracing()
@@ -0,0 +1,170 @@
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .ai_cache import normalize_title
+from .models import Game
+
+# Hashed feature space of the local recommendation index. Collisions only
+# blur similarity a little, so this can be much smaller than the vocabulary.
+VECTOR_DIMENSIONS = int(os.getenv("VECTOR_DIMENSIONS", str(2**18)))
+
+# Text fields a game is indexed by, and how much each one counts
+FIELD_WEIGHTS = {
+    "title": 2.0,
+    "game_type": 2.0,
+    "game_elements": 1.0,
+    "description": 1.0,
+}
+# Word prefixes let "coop" find "cooperative" and "strategic" find
+# "strategy", but say less than whole words
+PREFIX_LENGTH = 4
+PREFIX_WEIGHT = 0.5
+
+# Game fields kept next to the vectors for ranking and display
+GAME_FIELDS = ("title", "player_count", "game_type", "playtime", "complexity")
+
+SparseVector = Dict[int, float]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _bucket(feature: str) -> int:
+    # crc32 rather than hash() so buckets are the same in every process
+    return zlib.crc32(feature.encode()) % VECTOR_DIMENSIONS
+
+
+def features(text: str, weight: float = 1.0) -> Counter:
+    """Weighted hashed word, word-prefix and word-pair counts of text"""
+    counts: Counter = Counter()
+    words = _TOKEN.findall(normalize_title(text or ""))
+    for word in words:
+        counts[_bucket("w:" + word)] += weight
+        if len(word) >= PREFIX_LENGTH:
+            counts[_bucket("p:" + word[:PREFIX_LENGTH])] += weight * PREFIX_WEIGHT
+    for first, second in zip(words, words[1:]):
+        counts[_bucket(f"b:{first} {second}")] += weight
+    return counts
+
+
+def _log_weights(counts: Counter) -> SparseVector:
+    # Sublinear term frequency; fractional counts (prefixes) are kept as is
+    return {
+        bucket: 1 + math.log(count) if count > 1 else count
+        for bucket, count in counts.items()
+    }
+
+
+def _normalized(vector: SparseVector) -> SparseVector:
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    if not norm:
+        return {}
+    return {bucket: weight / norm for bucket, weight in vector.items()}
+
+
+def game_vector(game: Game) -> SparseVector:
+    """Unit-length log-weighted feature vector of a game's text fields"""
+    counts: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        counts.update(features(getattr(game, field), weight))
+    return _normalized(_log_weights(counts))
+
+
+class GameIndex:
+    """
+    In-memory similarity index over the collection's game text.
+
+    Game vectors use log term frequency with cosine normalization and the
+    query is additionally weighted by inverse document frequency, so games
+    are vectorized once and stay valid as the collection grows. The index
+    is brought up to date by sync(), which only re-vectorizes games whose
+    updated_at changed since they were indexed.
+    """
+
+    def __init__(self):
+        self._vectors: Dict[int, SparseVector] = {}
+        self._postings: Dict[int, Dict[int, float]] = {}
+        self._document_frequency: Counter = Counter()
+        self._versions: Dict[int, Optional[datetime]] = {}
+        self.games: Dict[int, Dict] = {}
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def add(self, game: Game):
+        """Index game, replacing any earlier version of it"""
+        self.remove(game.id)
+        vector = game_vector(game)
+        self._vectors[game.id] = vector
+        for bucket, weight in vector.items():
+            self._postings.setdefault(bucket, {})[game.id] = weight
+        self._document_frequency.update(vector.keys())
+        self._versions[game.id] = game.updated_at
+        self.games[game.id] = {
+            "id": game.id,
+            **{field: getattr(game, field) or "N/A" for field in GAME_FIELDS},
+            "description": game.description or "",
+        }
+
+    def remove(self, game_id: int):
+        """Drop game_id from the index, if present"""
+        vector = self._vectors.pop(game_id, None)
+        if vector is None:
+            return
+        for bucket in vector:
+            postings = self._postings[bucket]
+            del postings[game_id]
+            if not postings:
+                del self._postings[bucket]
+            self._document_frequency[bucket] -= 1
+            if not self._document_frequency[bucket]:
+                del self._document_frequency[bucket]
+        del self._versions[game_id]
+        del self.games[game_id]
+
+    def sync(self, games: Iterable[Game]) -> int:
+        """
+        Bring the index in line with games, the whole collection.
+
+        Only games that are new or whose updated_at changed since they were
+        indexed are vectorized again, and games no longer present are
+        dropped, so writes made by other workers or the CLI are picked up
+        too. Returns the number of games re-indexed.
+        """
+        current = {game.id: game for game in games}
+        for game_id in set(self._versions) - set(current):
+            self.remove(game_id)
+        changed = 0
+        for game_id, game in current.items():
+            if self._versions.get(game_id, False) != game.updated_at:
+                self.add(game)
+                changed += 1
+        return changed
+
+    def _idf(self, bucket: int) -> float:
+        # Smoothed, so a feature shared by every game still counts a little
+        documents = len(self._vectors)
+        return math.log((documents + 1) / (self._document_frequency[bucket] + 1)) + 1
+
+    def search(self, text: str) -> List[Tuple[int, float]]:
+        """Games sharing features with text as (id, cosine similarity), best first"""
+        query = _normalized(
+            {
+                bucket: weight * self._idf(bucket)
+                for bucket, weight in _log_weights(features(text)).items()
+                if bucket in self._postings
+            }
+        )
+        scores: Dict[int, float] = {}
+        for bucket, query_weight in query.items():
+            for game_id, weight in self._postings[bucket].items():
+                scores[game_id] = scores.get(game_id, 0.0) + query_weight * weight
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+# Shared by the app's requests and jobs (one per worker process)
+game_index = GameIndex()
@@ -0,0 +1,156 @@
+import json
+import os
+import platform
+import statistics
+import timeit
+
+import pytest
+
+# Microbenchmarks run with `pytest benchmarks/`. The `benchmark` fixture
+# follows the pytest-benchmark call style (benchmark(func, *args)) but is
+# implemented with timeit so it needs no extra dependency:
+#
+#   --bench-save PATH          write results as a baseline
+#   --bench-compare PATH       fail benchmarks slower than the baseline by
+#   --bench-max-regression N   more than N percent (default 10)
+#
+# Baselines are only meaningful on the machine that recorded them.
+
+# The app modules read their configuration at import time
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("SESSION_SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault("FAMILY_PASSWORD", "benchmark-password")
+os.environ.setdefault("OPENAI_API_KEY", "")
+
+# Statistic compared against the baseline (the least noisy one)
+COMPARE_STAT = "min"
+
+_results = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption("--bench-save", metavar="PATH", help="Save results as a baseline")
+    group.addoption(
+        "--bench-compare", metavar="PATH", help="Compare results with a baseline"
+    )
+    group.addoption(
+        "--bench-max-regression",
+        type=float,
+        default=10.0,
+        metavar="PCT",
+        help="Allowed slowdown against the baseline in percent (default 10)",
+    )
+    group.addoption(
+        "--bench-rounds",
+        type=int,
+        default=5,
+        help="Timed rounds per benchmark (default 5)",
+    )
+
+
+def _format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f}{unit}"
+    return f"{seconds * 1e6:.1f}us"
+
+
+class Benchmark:
+    """Time a callable over several rounds of auto-sized loops"""
+
+    def __init__(self, name: str, rounds: int, baseline=None, max_regression=10.0):
+        self.name = name
+        self.rounds = rounds
+        self.baseline = baseline
+        self.max_regression = max_regression
+        self.stats = None
+
+    def __call__(self, func, *args, **kwargs):
+        timer = timeit.Timer(lambda: func(*args, **kwargs))
+        # Loops per round so that a round takes at least 0.2 seconds
+        loops, _ = timer.autorange()
+        times = [
+            total / loops for total in timer.repeat(repeat=self.rounds, number=loops)
+        ]
+        self.stats = {
+            "min": min(times),
+            "median": statistics.median(times),
+            "mean": statistics.mean(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+            "rounds": self.rounds,
+            "loops": loops,
+        }
+        _results[self.name] = self.stats
+        self._check_regression()
+        return func(*args, **kwargs)
+
+    def _check_regression(self):
+        if not self.baseline or self.name not in self.baseline:
+            return
+        before = self.baseline[self.name][COMPARE_STAT]
+        after = self.stats[COMPARE_STAT]
+        change = (after - before) / before * 100 if before else 0.0
+        if change > self.max_regression:
+            pytest.fail(
+                f"{self.name} regressed {change:.1f}% "
+                f"({_format_seconds(before)} -> {_format_seconds(after)} "
+                f"{COMPARE_STAT}, allowed {self.max_regression:g}%)"
+            )
+
+
+def _load_baseline(config):
+    path = config.getoption("--bench-compare")
+    if not path:
+        return None
+    if not hasattr(config, "_bench_baseline"):
+        with open(path, encoding="utf-8") as f:
+            config._bench_baseline = json.load(f)["benchmarks"]
+    return config._bench_baseline
+
+
+@pytest.fixture
+def benchmark(request):
+    config = request.config
+    return Benchmark(
+        request.node.nodeid.split("::", 1)[-1],
+        rounds=max(config.getoption("--bench-rounds"), 1),
+        baseline=_load_baseline(config),
+        max_regression=config.getoption("--bench-max-regression"),
+    )
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    if not _results:
+        return
+    baseline = _load_baseline(config) or {}
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(
+        f"{'benchmark':<55} {'min':>11} {'median':>11} {'vs baseline':>12}"
+    )
+    for name, stats in sorted(_results.items()):
+        change = ""
+        if name in baseline and baseline[name][COMPARE_STAT]:
+            before = baseline[name][COMPARE_STAT]
+            change = f"{(stats[COMPARE_STAT] - before) / before * 100:+.1f}%"
+        terminalreporter.write_line(
+            f"{name:<55} {_format_seconds(stats['min']):>11}"
+            f" {_format_seconds(stats['median']):>11} {change:>12}"
+        )
+
+    path = config.getoption("--bench-save")
+    if path:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "processor": platform.processor(),
+                    },
+                    "benchmarks": dict(sorted(_results.items())),
+                },
+                f,
+                indent=2,
+            )
+        terminalreporter.write_line(f"Baseline saved to {path}")
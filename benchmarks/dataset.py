@@ -0,0 +1,330 @@
+import argparse
+import os
+import random
+import time
+from datetime import UTC, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, func, select, text
+from sqlmodel import SQLModel
+
+from app.models import FamilyMember, Game, GameRating, PlayLog
+from app.ranges import game_numbers
+
+# Deterministic synthetic collections for scale testing:
+#
+#   python -m benchmarks.dataset --database-url sqlite:///bench.db \
+#       --games 10000 --members 20 --play-logs 1000000 --seed 42
+#
+# The same seed always produces the same rows (ids included), so benchmark
+# and migration runs are comparable. Rows are written with executemany
+# batches straight to the tables, bypassing the ORM.
+
+# Fixed reference date so the output does not depend on when it is generated
+ANCHOR_DATE = datetime(2025, 1, 1, tzinfo=UTC)
+HISTORY_DAYS = 3 * 365
+
+TITLE_WORDS = (
+    ["Lost", "Ancient", "Crimson", "Hidden", "Iron", "Golden", "Silent", "Wild"],
+    ["Empire", "Harbor", "Forest", "Dragon", "Kingdom", "Railway", "Garden", "Tower"],
+    ["", "", "Legends", "Expansion", "Deluxe", "Duel", "Saga", "Reborn"],
+)
+GAME_TYPES = [
+    "Strategy",
+    "Family",
+    "Party",
+    "Cooperative",
+    "Deck Building",
+    "Worker Placement",
+    "Area Control",
+    "Abstract",
+    "Trivia",
+    "Dexterity",
+    "Engine Building",
+    "Roll and Write",
+]
+GAME_ELEMENTS = [
+    "Cards",
+    "Dice",
+    "Board",
+    "Tokens",
+    "Tiles",
+    "Miniatures",
+    "Meeples",
+    "Timer",
+    "Cubes",
+    "Score Pad",
+]
+COMPLEXITIES = ["Easy", "Medium", "Hard", "Expert"]
+SETUP_TIMES = ["Under 5 minutes", "5-10 minutes", "10-15 minutes", "15-30 minutes"]
+PLAYER_COUNTS = [(1, 4), (2, 4), (2, 5), (2, 6), (3, 6), (4, 10)]
+PLAYTIMES = [(15, 30), (20, 45), (30, 60), (45, 90), (60, 120), (90, 180)]
+MEMBER_NAMES = [
+    "Alex",
+    "Blair",
+    "Casey",
+    "Drew",
+    "Emery",
+    "Finley",
+    "Gray",
+    "Harper",
+    "Indy",
+    "Jordan",
+    "Kai",
+    "Logan",
+    "Morgan",
+    "Noel",
+    "Oakley",
+    "Parker",
+    "Quinn",
+    "Riley",
+    "Sage",
+    "Taylor",
+]
+
+
+def _batches(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def member_rows(count: int) -> List[dict]:
+    rows = []
+    for index in range(count):
+        name = MEMBER_NAMES[index % len(MEMBER_NAMES)]
+        if index >= len(MEMBER_NAMES):
+            name = f"{name} {index // len(MEMBER_NAMES) + 1}"
+        rows.append({"id": index + 1, "name": name, "created_at": ANCHOR_DATE})
+    return rows
+
+
+def game_rows(
+    rng: random.Random, count: int
+) -> Tuple[List[dict], Dict[int, Tuple[int, int]]]:
+    """Game rows plus each game's playtime range (used for play durations)"""
+    rows = []
+    playtimes = {}
+    for game_id in range(1, count + 1):
+        words = [rng.choice(options) for options in TITLE_WORDS]
+        title = " ".join(word for word in words if word)
+        min_players, max_players = rng.choice(PLAYER_COUNTS)
+        playtime = rng.choice(PLAYTIMES)
+        created_at = ANCHOR_DATE - timedelta(minutes=rng.randrange(HISTORY_DAYS * 1440))
+        playtimes[game_id] = playtime
+        rows.append(
+            {
+                "id": game_id,
+                "title": f"{title} #{game_id}",
+                "player_count": f"{min_players}-{max_players} players",
+                "game_type": ", ".join(rng.sample(GAME_TYPES, rng.randint(1, 3))),
+                "game_elements": ", ".join(
+                    rng.sample(GAME_ELEMENTS, rng.randint(2, 5))
+                ),
+                "setup_time": rng.choice(SETUP_TIMES),
+                "playtime": f"{playtime[0]}-{playtime[1]} minutes",
+                "complexity": rng.choice(COMPLEXITIES),
+                "description": f"A {rng.choice(COMPLEXITIES).lower()} game of "
+                f"{rng.choice(TITLE_WORDS[1]).lower()}s and "
+                f"{rng.choice(GAME_ELEMENTS).lower()}.",
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+        )
+        # Core inserts skip the ORM hook that fills in the numeric columns
+        rows[-1].update(
+            game_numbers(
+                rows[-1]["player_count"], rows[-1]["playtime"], rows[-1]["setup_time"]
+            )
+        )
+    return rows, playtimes
+
+
+def rating_rows(
+    rng: random.Random, game_count: int, member_count: int, density: float
+) -> Iterator[dict]:
+    """Ratings for a density share of all (game, member) pairs"""
+    rating_id = 0
+    for game_id in range(1, game_count + 1):
+        # Members broadly agree on a game, with some personal spread
+        quality = rng.gauss(6.5, 1.5)
+        for member_id in range(1, member_count + 1):
+            if rng.random() >= density:
+                continue
+            rating_id += 1
+            yield {
+                "id": rating_id,
+                "game_id": game_id,
+                "family_member_id": member_id,
+                "rating": min(max(round(rng.gauss(quality, 1.2)), 1), 10),
+                "created_at": ANCHOR_DATE,
+                "updated_at": ANCHOR_DATE,
+            }
+
+
+def play_log_rows(
+    rng: random.Random,
+    count: int,
+    playtimes: Dict[int, Tuple[int, int]],
+    member_names: List[str],
+) -> Iterator[dict]:
+    # A few favourites get most of the plays, like a real shelf
+    game_ids = list(playtimes)
+    cum_weights = list(
+        accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(game_ids)))
+    )
+    rng.shuffle(game_ids)
+    for play_id in range(1, count + 1):
+        game_id = rng.choices(game_ids, cum_weights=cum_weights)[0]
+        shortest, longest = playtimes[game_id]
+        players = rng.sample(member_names, min(rng.randint(2, 5), len(member_names)))
+        played_date = ANCHOR_DATE - timedelta(
+            minutes=rng.randrange(HISTORY_DAYS * 1440)
+        )
+        yield {
+            "id": play_id,
+            "game_id": game_id,
+            "played_date": played_date,
+            "players": ", ".join(players),
+            "notes": None,
+            "duration_minutes": rng.randint(shortest, longest),
+            # Cooperative and unfinished games have no winner
+            "winner": rng.choice(players) if rng.random() < 0.85 else None,
+            "created_at": played_date,
+            "updated_at": played_date,
+        }
+
+
+def _reset_sequences(conn):
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    for table in ("family_members", "games", "game_ratings", "play_logs"):
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+        )
+
+
+def generate_dataset(
+    engine,
+    games: int = 10000,
+    members: int = 20,
+    play_logs: int = 1000000,
+    rating_density: float = 0.8,
+    seed: int = 42,
+    batch_size: int = 5000,
+    reset: bool = False,
+    progress=None,
+) -> Dict[str, int]:
+    """Write a seeded synthetic collection to engine and return row counts"""
+    rng = random.Random(seed)
+    SQLModel.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        if reset:
+            for model in (PlayLog, GameRating, Game, FamilyMember):
+                conn.execute(model.__table__.delete())
+        elif conn.execute(select(func.count()).select_from(Game.__table__)).scalar():
+            raise ValueError("Database already has games (use --reset to replace)")
+
+        counts = {}
+
+        def insert(model, rows, label):
+            inserted = 0
+            for batch in _batches(iter(rows), batch_size):
+                conn.execute(model.__table__.insert(), batch)
+                inserted += len(batch)
+                if progress:
+                    progress(label, inserted)
+            counts[label] = inserted
+
+        members_data = member_rows(members)
+        insert(FamilyMember, members_data, "family_members")
+        games_data, playtimes = game_rows(rng, games)
+        insert(Game, games_data, "games")
+        insert(
+            GameRating, rating_rows(rng, games, members, rating_density), "game_ratings"
+        )
+        if games:
+            names = [member["name"] for member in members_data] or ["Player"]
+            insert(
+                PlayLog, play_log_rows(rng, play_logs, playtimes, names), "play_logs"
+            )
+        else:
+            counts["play_logs"] = 0
+
+        if engine.dialect.name == "postgresql":
+            _reset_sequences(conn)
+
+    return counts
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Generate a deterministic synthetic GameDex dataset"
+    )
+    parser.add_argument(
+        "--database-url",
+        default=os.getenv("DATABASE_URL"),
+        help="SQLite or PostgreSQL URL (defaults to $DATABASE_URL)",
+    )
+    parser.add_argument("--games", type=int, default=10000)
+    parser.add_argument("--members", type=int, default=20)
+    parser.add_argument("--play-logs", type=int, default=1000000)
+    parser.add_argument(
+        "--rating-density",
+        type=float,
+        default=0.8,
+        help="Share of (game, member) pairs with a rating",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--reset", action="store_true", help="Delete existing rows first"
+    )
+    args = parser.parse_args(argv)
+
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+
+    engine = create_engine(args.database_url)
+    start = time.perf_counter()
+
+    current_table = None
+
+    def progress(table: str, inserted: int):
+        # One line per table, updated in place as batches are written
+        nonlocal current_table
+        if current_table not in (None, table):
+            print()
+        current_table = table
+        print(f"\r{table:<16}{inserted:>10}", end="", flush=True)
+
+    try:
+        counts = generate_dataset(
+            engine,
+            games=args.games,
+            members=args.members,
+            play_logs=args.play_logs,
+            rating_density=args.rating_density,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            reset=args.reset,
+            progress=progress,
+        )
+    except ValueError as e:
+        parser.exit(1, f"Error generating dataset: {e}\n")
+    print()
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    print(f"Inserted {summary} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
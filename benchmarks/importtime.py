@@ -0,0 +1,101 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Import-time report for the application module:
+#
+#   python -m benchmarks.importtime --top 20 --budget-ms 1500
+#
+# Runs `python -X importtime -c "import app.main"` in a fresh interpreter,
+# prints the modules with the largest cumulative import time and exits
+# non-zero when the total exceeds the budget.
+
+# Startup budget for importing app.main (see README "Startup Time"). Imports
+# measure 800-1130 ms, almost all of it FastAPI, SQLAlchemy and SQLModel, so
+# the budget leaves about a third over the slowest run for noisy machines.
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Settings the app requires at import time, used when they are not set
+DEFAULT_ENV = {
+    "DATABASE_URL": "sqlite:///:memory:",
+    "SESSION_SECRET_KEY": "importtime-secret-key",
+    "FAMILY_PASSWORD": "importtime-password",
+    "OPENAI_API_KEY": "",
+}
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """Records from `-X importtime` stderr output"""
+    records = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(
+                ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+    return records
+
+
+def app_env() -> dict:
+    """The current environment, with defaults for the app's required settings"""
+    return {**DEFAULT_ENV, **os.environ}
+
+
+def measure_imports(module: str = "app.main") -> List[ImportRecord]:
+    """Import module in a fresh interpreter and return its import-time records"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=app_env(),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr)
+
+
+def total_ms(records: List[ImportRecord]) -> float:
+    """Total import time: the sum over top-level imports"""
+    return sum(record.cumulative_us for record in records if record.depth == 0) / 1000
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report app.main import time")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    records = measure_imports(args.module)
+    slowest = sorted(records, key=lambda record: record.cumulative_us, reverse=True)
+    print(f"{'module':<50} {'self ms':>9} {'cumul ms':>9}")
+    for record in slowest[: args.top]:
+        print(
+            f"{record.module:<50} {record.self_us / 1000:>9.1f}"
+            f" {record.cumulative_us / 1000:>9.1f}"
+        )
+
+    total = total_ms(records)
+    print(f"\nTotal import time: {total:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    if total > args.budget_ms:
+        print("Over the startup budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import httpx
+
+# Load generator for a running GameDex server:
+#
+#   python -m benchmarks.loadtest --base-url http://localhost:8080 \
+#       --concurrency 20 --duration 60 --output loadtest.json
+#
+# Each virtual user logs in once (shared cookie), then repeatedly picks one
+# of the selected scenarios at random. Latency percentiles and throughput are
+# reported per route and written to a JSON file; pass --compare with an
+# earlier report to see how the run moved.
+
+GAME_LINK = re.compile(r'href="/games/(\d+)"')
+MEMBER_ID = re.compile(r'data-member-id="(\d+)"')
+
+# Filter combinations exercised by the browse scenario
+BROWSE_FILTERS = [
+    {},
+    {"sort_by": "created_at"},
+    {"sort_by": "updated_at"},
+    {"search": "a"},
+    {"game_type": "Strategy"},
+    {"complexity": "Medium"},
+    {"game_elements": "Cards"},
+    {"setup_time": "Quick"},
+]
+
+
+@dataclass
+class RouteStats:
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+
+class Recorder:
+    """Times requests and groups the results by route template"""
+
+    def __init__(self):
+        self.routes: Dict[str, RouteStats] = defaultdict(RouteStats)
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, url: str, route: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        stats = self.routes[f"{method} {route}"]
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            return None
+        stats.latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            stats.errors += 1
+        return response
+
+
+@dataclass
+class Targets:
+    """Ids discovered on the server that the scenarios act on"""
+
+    game_ids: List[int]
+    member_ids: List[int]
+
+
+async def browse(client, recorder: Recorder, rng: random.Random, targets: Targets):
+    await recorder.request(client, "GET", "/", "/")
+    await recorder.request(
+        client, "GET", "/games", "/games", params=rng.choice(BROWSE_FILTERS)
+    )
+    game_id = rng.choice(targets.game_ids)
+    await recorder.request(client, "GET", f"/games/{game_id}", "/games/{game_id}")
+
+
+async def log_play(client, recorder: Recorder, rng: random.Random, targets: Targets):
+    game_id = rng.choice(targets.game_ids)
+    await recorder.request(
+        client, "GET", f"/games/{game_id}/log-play", "/games/{game_id}/log-play"
+    )
+    data = {
+        "played_date": datetime.now().date().isoformat(),
+        "duration_minutes": str(rng.randint(15, 180)),
+        "notes": "Load test",
+    }
+    for member_id in targets.member_ids:
+        data[f"rating_{member_id}"] = str(rng.randint(1, 10))
+    await recorder.request(
+        client,
+        "POST",
+        f"/games/{game_id}/log-play",
+        "/games/{game_id}/log-play",
+        data=data,
+    )
+
+
+async def edit_ratings(
+    client, recorder: Recorder, rng: random.Random, targets: Targets
+):
+    game_id = rng.choice(targets.game_ids)
+    member_id = rng.choice(targets.member_ids)
+    await recorder.request(
+        client,
+        "PATCH",
+        f"/games/{game_id}/ratings/{member_id}",
+        "/games/{game_id}/ratings/{member_id}",
+        data={"rating": str(rng.randint(1, 10))},
+    )
+
+
+SCENARIOS = {
+    "browse": browse,
+    "log-play": log_play,
+    "edit-ratings": edit_ratings,
+}
+
+
+async def login(client: httpx.AsyncClient, password: str):
+    """Log in through /login so every request carries the session cookie"""
+    response = await client.post("/login", data={"password": password})
+    if response.status_code != 303 or "session" not in client.cookies:
+        raise RuntimeError("Login failed: check the family password")
+
+
+async def discover(client: httpx.AsyncClient) -> Targets:
+    """Find existing games and family members to drive the scenarios"""
+    games = await client.get("/games")
+    settings = await client.get("/settings")
+    game_ids = sorted({int(game_id) for game_id in GAME_LINK.findall(games.text)})
+    member_ids = sorted(
+        {int(member_id) for member_id in MEMBER_ID.findall(settings.text)}
+    )
+    if not game_ids:
+        raise RuntimeError("No games found: seed the database before load testing")
+    return Targets(game_ids, member_ids)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values (0 for no values)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float, config: dict) -> dict:
+    """Report with per-route latency percentiles (ms) and throughput"""
+    routes = {}
+    for name, stats in sorted(recorder.routes.items()):
+        count = len(stats.latencies)
+        routes[name] = {
+            "requests": count,
+            "errors": stats.errors,
+            "rps": round(count / elapsed, 2) if elapsed else 0.0,
+            "mean_ms": round(sum(stats.latencies) / count * 1000, 2) if count else 0.0,
+            "p50_ms": round(percentile(stats.latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(stats.latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(stats.latencies, 99) * 1000, 2),
+            "max_ms": round(max(stats.latencies, default=0) * 1000, 2),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "config": config,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": total,
+        "errors": sum(route["errors"] for route in routes.values()),
+        "rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "routes": routes,
+    }
+
+
+async def run_load_test(
+    base_url: str,
+    password: str,
+    scenarios: List[str],
+    concurrency: int = 10,
+    duration: Optional[float] = 30,
+    iterations: Optional[int] = None,
+    seed: int = 0,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> dict:
+    """
+    Run scenarios with concurrency virtual users and return the report.
+
+    Stops after duration seconds, or after iterations scenario runs in total
+    when iterations is given.
+    """
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    async with httpx.AsyncClient(
+        base_url=base_url, transport=transport, limits=limits, timeout=30
+    ) as client:
+        await login(client, password)
+        targets = await discover(client)
+        if "edit-ratings" in scenarios and not targets.member_ids:
+            raise RuntimeError("edit-ratings needs at least one family member")
+
+        recorder = Recorder()
+        remaining = iterations
+        start = time.perf_counter()
+        deadline = start + duration if duration and iterations is None else None
+
+        async def virtual_user(index: int):
+            nonlocal remaining
+            rng = random.Random(seed + index)
+            while True:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return
+                if remaining is not None:
+                    if remaining <= 0:
+                        return
+                    remaining -= 1
+                scenario = SCENARIOS[rng.choice(scenarios)]
+                await scenario(client, recorder, rng, targets)
+
+        await asyncio.gather(*(virtual_user(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    config = {
+        "base_url": base_url,
+        "scenarios": scenarios,
+        "concurrency": concurrency,
+        "duration": duration if iterations is None else None,
+        "iterations": iterations,
+        "seed": seed,
+    }
+    return summarize(recorder, elapsed, config)
+
+
+def _change(current: float, baseline: float) -> str:
+    if not baseline:
+        return "n/a"
+    return f"{(current - baseline) / baseline * 100:+.1f}%"
+
+
+def compare_reports(current: dict, baseline: dict) -> List[str]:
+    """Lines comparing p50/p95/p99 and RPS per route against a baseline report"""
+    lines = [
+        f"{'route':<45} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}",
+    ]
+    for name, route in current["routes"].items():
+        before = baseline.get("routes", {}).get(name)
+        if before is None:
+            lines.append(f"{name:<45} {'(new route)':>39}")
+            continue
+        lines.append(
+            f"{name:<45}"
+            f" {_change(route['p50_ms'], before['p50_ms']):>9}"
+            f" {_change(route['p95_ms'], before['p95_ms']):>9}"
+            f" {_change(route['p99_ms'], before['p99_ms']):>9}"
+            f" {_change(route['rps'], before['rps']):>9}"
+        )
+    lines.append(f"{'overall rps':<45} {_change(current['rps'], baseline['rps']):>39}")
+    return lines
+
+
+def format_report(report: dict) -> List[str]:
+    lines = [
+        f"{'route':<45} {'reqs':>7} {'err':>5} {'rps':>8}"
+        f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    ]
+    for name, route in report["routes"].items():
+        lines.append(
+            f"{name:<45} {route['requests']:>7} {route['errors']:>5}"
+            f" {route['rps']:>8} {route['p50_ms']:>8}"
+            f" {route['p95_ms']:>8} {route['p99_ms']:>8}"
+        )
+    lines.append(
+        f"{report['requests']} requests, {report['errors']} errors in"
+        f" {report['elapsed_seconds']}s ({report['rps']} req/s)"
+    )
+    return lines
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load test a running GameDex server")
+    parser.add_argument("--base-url", default="http://localhost:8080")
+    parser.add_argument(
+        "--password",
+        default=os.getenv("FAMILY_PASSWORD"),
+        help="Family password (defaults to $FAMILY_PASSWORD)",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="Scenario to run; repeat to mix (defaults to all)",
+    )
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument(
+        "--iterations", type=int, help="Total scenario runs (overrides --duration)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="loadtest.json")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    args = parser.parse_args(argv)
+
+    if not args.password:
+        parser.error("--password or FAMILY_PASSWORD is required")
+
+    report = asyncio.run(
+        run_load_test(
+            args.base_url,
+            args.password,
+            args.scenario or sorted(SCENARIOS),
+            concurrency=max(args.concurrency, 1),
+            duration=args.duration,
+            iterations=args.iterations,
+            seed=args.seed,
+        )
+    )
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("\n".join(format_report(report)))
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\nChange against {args.compare}:")
+        print("\n".join(compare_reports(report, baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import random
+from datetime import timedelta
+
+import pytest
+from starlette.requests import Request
+
+from app.ai_utils import _games_info, format_game_metadata
+from app.auth import create_session_token, verify_session_token
+from app.main import templates
+from app.models import FamilyMember, Game, GameRating, PlayLog
+from app.recommend import recommend_locally
+from app.vector_index import GameIndex
+from benchmarks.dataset import ANCHOR_DATE, game_rows, member_rows
+
+MEMBERS = 6
+
+
+def _games(count: int, ratings: int = MEMBERS, plays: int = 5):
+    """Detached games with ratings and play logs, built from the dataset rows"""
+    rng = random.Random(42)
+    rows, _ = game_rows(rng, count)
+    games = []
+    for row in rows:
+        game = Game(**row)
+        game.family_ratings = [
+            GameRating(game_id=row["id"], family_member_id=member, rating=rating)
+            for member, rating in enumerate(
+                (rng.randint(1, 10) for _ in range(ratings)), 1
+            )
+        ]
+        game.play_logs = [
+            PlayLog(
+                game_id=row["id"],
+                played_date=ANCHOR_DATE - timedelta(days=rng.randrange(1000)),
+            )
+            for _ in range(plays)
+        ]
+        games.append(game)
+    return games
+
+
+@pytest.fixture(scope="module")
+def rated_game():
+    return _games(1, ratings=20, plays=0)[0]
+
+
+@pytest.fixture(scope="module")
+def played_game():
+    return _games(1, ratings=0, plays=500)[0]
+
+
+@pytest.fixture(scope="module")
+def game_dicts():
+    rows, _ = game_rows(random.Random(42), 1000)
+    return rows
+
+
+def _request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "query_string": b"",
+            "headers": [],
+        }
+    )
+
+
+class TestModelBenchmarks:
+    def test_average_rating(self, benchmark, rated_game):
+        assert benchmark(lambda: rated_game.average_rating) is not None
+
+    def test_last_played(self, benchmark, played_game):
+        assert benchmark(lambda: played_game.last_played) is not None
+
+
+class TestAuthBenchmarks:
+    def test_create_session_token(self, benchmark):
+        assert benchmark(create_session_token)
+
+    def test_verify_session_token(self, benchmark):
+        token = create_session_token()
+        assert benchmark(verify_session_token, token)
+
+
+class TestAIHelperBenchmarks:
+    def test_format_game_metadata(self, benchmark):
+        metadata = {
+            "title": "  Catan \n",
+            "player_count": "3-4   players",
+            "game_type": "Strategy,\n Trading",
+            "playtime": "60-90 minutes",
+            "complexity": "Medium",
+            "setup_time": "10 minutes",
+            "game_elements": "Board, Cards,  Dice",
+            "description": "Trade, build and settle the island of Catan. " * 5,
+        }
+        assert benchmark(format_game_metadata, metadata)
+
+    def test_recommendation_games_info(self, benchmark, game_dicts):
+        # Unbudgeted: a header line plus one row per game
+        assert benchmark(_games_info, game_dicts, 0).count("\n") == len(game_dicts)
+
+
+class TestRecommendBenchmarks:
+    def test_index_collection(self, benchmark):
+        games = _games(1000, ratings=0, plays=0)
+        assert benchmark(lambda: GameIndex().sync(games)) == len(games)
+
+    def test_recommend_locally(self, benchmark):
+        games = _games(1000, ratings=0, plays=0)
+        recommendations = benchmark(
+            recommend_locally, "cooperative dice game for 4 players", games
+        )
+        assert len(recommendations) == 5
+
+
+class TestTemplateBenchmarks:
+    @pytest.mark.parametrize("count", [100, 1000, 10000])
+    def test_render_index(self, benchmark, count):
+        games = _games(count)
+        members = [FamilyMember(**row) for row in member_rows(MEMBERS)]
+        context = {
+            "request": _request(),
+            "msg": None,
+            "family_members": members,
+            "filters": {},
+            "sort_by": None,
+            "stats": {
+                "total_games": count,
+                "highly_rated_count": 0,
+                "average_rating": 6.5,
+                "game_types": ["Family", "Strategy"],
+            },
+            "games": games,
+            "family_ratings": {
+                game.id: {
+                    rating.family_member_id: rating.rating
+                    for rating in game.family_ratings
+                }
+                for game in games
+            },
+            "next_page_url": None,
+        }
+        template = templates.get_template("index.html")
+        assert "game-card" in benchmark(template.render, context)
@@ -0,0 +1,30 @@
+import subprocess
+import sys
+
+from benchmarks.importtime import (
+    STARTUP_BUDGET_MS,
+    app_env,
+    measure_imports,
+    total_ms,
+)
+
+
+def _import_app():
+    subprocess.run([sys.executable, "-c", "import app.main"], check=True, env=app_env())
+
+
+class TestStartupBenchmarks:
+    def test_import_app(self, benchmark):
+        """Wall-clock time for a fresh interpreter to import the app"""
+        benchmark(_import_app)
+
+    def test_import_within_budget(self):
+        records = measure_imports("app.main")
+        modules = {record.module for record in records}
+        # Deferred until first use
+        assert "openai" not in modules
+        assert "uvicorn" not in modules
+        assert "app.recommend" not in modules
+        assert "urllib.request" not in modules
+        assert "argparse" not in modules
+        assert total_ms(records) <= STARTUP_BUDGET_MS
@@ -0,0 +1,57 @@
+"""Add ai_metadata_cache table
+
+Revision ID: add_ai_metadata_cache_table
+Revises: add_play_logs_table
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_ai_metadata_cache_table"
+down_revision: Union[str, Sequence[str], None] = "add_play_logs_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Create ai_metadata_cache table
+    op.create_table(
+        "ai_metadata_cache",
+        sa.Column("id", sa.INTEGER(), nullable=False),
+        sa.Column("normalized_title", sa.VARCHAR(length=255), nullable=False),
+        sa.Column("model", sa.VARCHAR(length=100), nullable=False),
+        sa.Column("prompt_version", sa.INTEGER(), nullable=False),
+        sa.Column("data", sa.VARCHAR(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_ai_metadata_cache_lookup",
+        "ai_metadata_cache",
+        ["normalized_title", "model", "prompt_version"],
+        unique=True,
+    )
+    op.create_index(
+        op.f("ix_ai_metadata_cache_expires_at"),
+        "ai_metadata_cache",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop ai_metadata_cache table
+    op.drop_index(
+        op.f("ix_ai_metadata_cache_expires_at"), table_name="ai_metadata_cache"
+    )
+    op.drop_index("ix_ai_metadata_cache_lookup", table_name="ai_metadata_cache")
+    op.drop_table("ai_metadata_cache")
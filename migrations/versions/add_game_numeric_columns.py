@@ -0,0 +1,141 @@
+"""Add numeric player count, playtime and setup time columns to games
+
+Revision ID: add_game_numeric_columns
+Revises: add_job_progress_columns
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_game_numeric_columns"
+down_revision: Union[str, Sequence[str], None] = "add_job_progress_columns"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NUMERIC_COLUMNS = (
+    "min_players",
+    "max_players",
+    "min_playtime",
+    "max_playtime",
+    "setup_minutes",
+)
+
+# Frozen copy of app.ranges as of this revision, so the backfill gives the
+# same result however the app's parser changes later
+_UNIT = r"(hours?|hrs?|h|minutes?|mins?|m)(?![a-z])"
+_AMOUNT = re.compile(r"(\d+(?:\.\d+)?)(?:\s*" + _UNIT + ")?")
+_NEXT_UNIT = re.compile(r"\b" + _UNIT)
+_COMPOUND_SEPARATOR = re.compile(r"\s*(?:and\s*)?")
+_LIST_SEPARATOR = re.compile(r"(?:\s*(?:-|–|to|,|/|or|and)\s*)+")
+
+
+def _amounts(value: str) -> List[list]:
+    # [minutes or count, written unit, start, end] per number, with
+    # "1 hour 30 minutes" summed into one
+    amounts: List[list] = []
+    for match in _AMOUNT.finditer(value):
+        unit = match.group(2)
+        if unit is None:
+            following = _NEXT_UNIT.search(value, match.end())
+            unit = following.group(1) if following else None
+        number = float(match.group(1)) * (60 if unit and unit[0] == "h" else 1)
+        previous = amounts[-1] if amounts else None
+        if (
+            previous is not None
+            and previous[1]
+            and previous[1][0] == "h"
+            and match.group(2)
+            and match.group(2)[0] == "m"
+            and _COMPOUND_SEPARATOR.fullmatch(value, previous[3], match.start())
+        ):
+            previous[0] += number
+            previous[3] = match.end()
+        else:
+            amounts.append([number, match.group(2), match.start(), match.end()])
+    return amounts
+
+
+def _parse_range(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    if not text:
+        return None, None
+    value = text.lower()
+    amounts = _amounts(value)
+    if not amounts:
+        return None, None
+    count = 1
+    while count < len(amounts) and _LIST_SEPARATOR.fullmatch(
+        value, amounts[count - 1][3], amounts[count][2]
+    ):
+        count += 1
+    numbers = [amount[0] for amount in amounts[:count]]
+    low, high = min(numbers), max(numbers)
+    if count == 1:
+        if re.search(r"\bup to\s+\d", value):
+            low = 1
+        elif value[amounts[0][3]:].lstrip().startswith("+"):
+            high = None
+    return round(low), None if high is None else round(high)
+
+
+def game_numbers(player_count, playtime, setup_time):
+    players = _parse_range(player_count)
+    minutes = _parse_range(playtime)
+    setup = _parse_range(setup_time)
+    return {
+        "min_players": players[0],
+        "max_players": players[1],
+        "min_playtime": minutes[0],
+        "max_playtime": minutes[1],
+        "setup_minutes": setup[1] if setup[1] is not None else setup[0],
+    }
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Add new columns
+    for name in NUMERIC_COLUMNS:
+        op.add_column("games", sa.Column(name, sa.INTEGER(), nullable=True))
+    op.create_index(
+        "ix_games_players", "games", ["min_players", "max_players"], unique=False
+    )
+    op.create_index(
+        "ix_games_playtime", "games", ["max_playtime", "min_playtime"], unique=False
+    )
+
+    # Backfill from the existing free-text fields
+    connection = op.get_bind()
+    games = sa.table(
+        "games",
+        sa.column("id", sa.INTEGER()),
+        sa.column("player_count", sa.VARCHAR()),
+        sa.column("playtime", sa.VARCHAR()),
+        sa.column("setup_time", sa.VARCHAR()),
+        *(sa.column(name, sa.INTEGER()) for name in NUMERIC_COLUMNS),
+    )
+    rows = connection.execute(
+        sa.select(
+            games.c.id, games.c.player_count, games.c.playtime, games.c.setup_time
+        )
+    ).all()
+    for game_id, player_count, playtime, setup_time in rows:
+        connection.execute(
+            games.update()
+            .where(games.c.id == game_id)
+            .values(**game_numbers(player_count, playtime, setup_time))
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remove new columns
+    op.drop_index("ix_games_playtime", table_name="games")
+    op.drop_index("ix_games_players", table_name="games")
+    for name in reversed(NUMERIC_COLUMNS):
+        op.drop_column("games", name)
@@ -0,0 +1,33 @@
+"""Add job progress columns
+
+Revision ID: add_job_progress_columns
+Revises: add_jobs_table
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_job_progress_columns"
+down_revision: Union[str, Sequence[str], None] = "add_jobs_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Add new columns
+    op.add_column("jobs", sa.Column("progress_done", sa.INTEGER(), nullable=True))
+    op.add_column("jobs", sa.Column("progress_total", sa.INTEGER(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Remove new columns
+    op.drop_column("jobs", "progress_total")
+    op.drop_column("jobs", "progress_done")
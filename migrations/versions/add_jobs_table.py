@@ -0,0 +1,48 @@
+"""Add jobs table
+
+Revision ID: add_jobs_table
+Revises: add_ai_metadata_cache_table
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "add_jobs_table"
+down_revision: Union[str, Sequence[str], None] = "add_ai_metadata_cache_table"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Create jobs table
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.INTEGER(), nullable=False),
+        sa.Column("kind", sa.VARCHAR(length=50), nullable=False),
+        sa.Column("game_id", sa.INTEGER(), nullable=True),
+        sa.Column("status", sa.VARCHAR(length=20), nullable=False),
+        sa.Column("attempts", sa.INTEGER(), nullable=False),
+        sa.Column("error", sa.VARCHAR(length=500), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_jobs_id"), "jobs", ["id"], unique=False)
+    op.create_index(op.f("ix_jobs_game_id"), "jobs", ["game_id"], unique=False)
+    op.create_index(op.f("ix_jobs_status"), "jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Drop jobs table
+    op.drop_index(op.f("ix_jobs_status"), table_name="jobs")
+    op.drop_index(op.f("ix_jobs_game_id"), table_name="jobs")
+    op.drop_index(op.f("ix_jobs_id"), table_name="jobs")
+    op.drop_table("jobs")
@@ -5,5 +5,10 @@ echo "🔄 Running database migrations..."
 poetry run alembic upgrade head
 
 # Start the application
+# Worker count comes from WEB_CONCURRENCY (defaults to one per CPU core);
+# see app/server.py for the other tunables. exec so signals (SIGTERM for
+# graceful shutdown, SIGHUP for a rolling worker restart) reach the server.
 echo "🚀 Starting GameDex application..."
-poetry run uvicorn app.main:app --host 0.0.0.0 --port 8080 
\ No newline at end of file
+# Workers add up their metrics for /metrics through this directory
+export METRICS_DIR="${METRICS_DIR:-/tmp/gamedex-metrics}"
+exec poetry run python -m app.server
@@ -5,9 +5,12 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from sqlmodel import SQLModel
 
+from app.ai_cache import clear_recommendation_cache
 from app.auth import create_session_token
 from app.database import get_db
+from app.jobs import job_queue
 from app.main import app
+from app.metrics import instrument_engine
 from app.models import FamilyMember, Game, GameRating
 
 # Create in-memory SQLite database for testing
@@ -20,6 +23,12 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Record statements on the test engine so tests can pin query budgets
+instrument_engine(engine)
+
+# Background jobs run against the test database too
+job_queue.session_factory = TestingSessionLocal
+
 
 def override_get_db():
     """Override the database dependency for testing"""
@@ -35,6 +44,8 @@ def db_session():
     """Create a fresh database session for each test"""
     # Create tables
     SQLModel.metadata.create_all(bind=engine)
+    # Recommendations cached by earlier tests were for another collection
+    clear_recommendation_cache()
 
     # Create session
     session = TestingSessionLocal()
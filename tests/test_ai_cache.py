@@ -0,0 +1,117 @@
+from datetime import UTC, datetime, timedelta
+from unittest.mock import patch
+
+from app import ai_cache
+from app.ai_cache import (
+    cache_metadata,
+    cache_recommendations,
+    clear_recommendation_cache,
+    get_cached_metadata,
+    get_cached_recommendations,
+    normalize_title,
+    recommendation_cache_key,
+)
+from app.models import MetadataCacheEntry
+
+CATAN = {"title": "Catan", "player_count": "3-4 players", "complexity": "Medium"}
+
+
+class TestNormalizeTitle:
+    def test_folds_case_whitespace_and_punctuation(self):
+        assert normalize_title("  Ticket to Ride:  EUROPE! ") == "ticket to ride europe"
+        assert normalize_title("ticket-to-ride europe") == "ticket to ride europe"
+
+    def test_folds_accents_and_apostrophes(self):
+        assert normalize_title("Pokémon") == normalize_title("pokemon")
+        assert normalize_title("Tzolk'in") == normalize_title("Tzolkin")
+
+    def test_keeps_numbers(self):
+        assert normalize_title("7 Wonders") == "7 wonders"
+
+
+class TestMetadataCache:
+    def test_miss_then_hit_for_title_variant(self, db_session):
+        assert get_cached_metadata(db_session, "Catan") is None
+        cache_metadata(db_session, "Catan", CATAN)
+        db_session.commit()
+        assert get_cached_metadata(db_session, "  catan. ") == CATAN
+
+    def test_cached_under_corrected_title(self, db_session):
+        cache_metadata(db_session, "catan setlers", CATAN)
+        db_session.commit()
+        assert db_session.query(MetadataCacheEntry).count() == 2
+        assert get_cached_metadata(db_session, "Catan") == CATAN
+        assert get_cached_metadata(db_session, "Catan Setlers") == CATAN
+
+    def test_expired_entries_are_misses(self, db_session):
+        cache_metadata(db_session, "Catan", CATAN)
+        db_session.commit()
+        entry = db_session.query(MetadataCacheEntry).one()
+        entry.expires_at = datetime.now(UTC) - timedelta(seconds=1)
+        db_session.commit()
+        assert get_cached_metadata(db_session, "Catan") is None
+
+    def test_store_replaces_existing_entry(self, db_session):
+        cache_metadata(db_session, "Catan", CATAN)
+        db_session.commit()
+        cache_metadata(db_session, "catan", {**CATAN, "complexity": "Easy"})
+        db_session.commit()
+        assert db_session.query(MetadataCacheEntry).count() == 1
+        assert get_cached_metadata(db_session, "Catan")["complexity"] == "Easy"
+
+    def test_prompt_version_is_part_of_the_key(self, db_session):
+        cache_metadata(db_session, "Catan", CATAN)
+        db_session.commit()
+        with patch.object(ai_cache, "METADATA_PROMPT_VERSION", 99):
+            assert get_cached_metadata(db_session, "Catan") is None
+
+    def test_incomplete_answers_are_not_cached(self, db_session):
+        cache_metadata(db_session, "Catan", {})
+        cache_metadata(db_session, "Catan", {"description": "unparseable"})
+        cache_metadata(db_session, "!!!", {"title": "?"})
+        db_session.commit()
+        assert db_session.query(MetadataCacheEntry).count() == 0
+
+
+GAMES = [{"title": "Catan", "player_count": "3-4 players"}, {"title": "Azul"}]
+PICKS = [{"title": "Catan", "reasoning": "Good for 4"}]
+
+
+class TestRecommendationCache:
+    def setup_method(self):
+        clear_recommendation_cache()
+
+    def test_key_normalizes_the_query(self):
+        assert recommendation_cache_key(
+            "Quick game for 4!", GAMES, 5
+        ) == recommendation_cache_key("quick  game for 4", GAMES, 5)
+
+    def test_key_changes_with_the_games(self):
+        key = recommendation_cache_key("quick", GAMES, 5)
+        edited = [{**GAMES[0], "player_count": "3-6 players"}, GAMES[1]]
+        assert recommendation_cache_key("quick", edited, 5) != key
+        assert recommendation_cache_key("quick", GAMES[:1], 5) != key
+        assert recommendation_cache_key("quick", GAMES, 3) != key
+
+    def test_hit_returns_a_copy(self):
+        key = recommendation_cache_key("quick", GAMES, 5)
+        assert get_cached_recommendations(key) is None
+        cache_recommendations(key, PICKS)
+        cached = get_cached_recommendations(key)
+        assert cached == PICKS
+        cached[0]["reasoning"] = "changed"
+        assert get_cached_recommendations(key) == PICKS
+
+    def test_empty_results_are_not_cached(self):
+        cache_recommendations("key", [])
+        assert get_cached_recommendations("key") is None
+
+    def test_least_recently_used_is_evicted(self):
+        with patch.object(ai_cache, "RECOMMENDATION_CACHE_SIZE", 2):
+            cache_recommendations("a", PICKS)
+            cache_recommendations("b", PICKS)
+            get_cached_recommendations("a")
+            cache_recommendations("c", PICKS)
+        assert get_cached_recommendations("a") == PICKS
+        assert get_cached_recommendations("b") is None
+        assert get_cached_recommendations("c") == PICKS
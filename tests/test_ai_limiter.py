@@ -0,0 +1,168 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.ai_limiter import AIBusyError, AILimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    """Test cases for the AI rate limiting token bucket"""
+
+    def test_burst_then_wait(self):
+        """Test the bucket allows a burst and then asks callers to wait"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_second=1, capacity=2, clock=clock)
+
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(1.0)
+
+    def test_refill_over_time(self):
+        """Test tokens are refilled at the configured rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_second=2, capacity=1, clock=clock)
+
+        assert bucket.reserve() == 0
+        clock.now = 0.5
+        assert bucket.reserve() == 0
+
+    def test_cancel_returns_token(self):
+        """Test a cancelled reservation is given back"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate_per_second=1, capacity=1, clock=clock)
+
+        bucket.reserve()
+        bucket.cancel()
+        assert bucket.reserve() == 0
+
+
+class TestAILimiter:
+    """Test cases for the AI concurrency limiter"""
+
+    async def test_slot_allows_calls_within_limit(self):
+        """Test calls under the concurrency limit run immediately"""
+        limiter = AILimiter(max_concurrency=2, max_queue=0, rate_per_minute=0)
+
+        async with limiter.slot():
+            async with limiter.slot():
+                pass
+
+    async def test_rejects_when_queue_full(self):
+        """Test callers beyond the queue bound fail fast"""
+        limiter = AILimiter(max_concurrency=1, max_queue=0, rate_per_minute=0)
+
+        async with limiter.slot():
+            with pytest.raises(AIBusyError):
+                async with limiter.slot():
+                    pass
+
+    async def test_queued_call_runs_after_release(self):
+        """Test a queued caller proceeds once a slot frees up"""
+        limiter = AILimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=1, rate_per_minute=0
+        )
+        order = []
+
+        async def call(name, hold):
+            async with limiter.slot():
+                order.append(name)
+                await asyncio.sleep(hold)
+
+        await asyncio.gather(call("first", 0.01), call("second", 0))
+        assert order == ["first", "second"]
+
+    async def test_queue_timeout(self):
+        """Test a queued caller gives up after the queue timeout"""
+        limiter = AILimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=0.01, rate_per_minute=0
+        )
+
+        async with limiter.slot():
+            with pytest.raises(AIBusyError):
+                async with limiter.slot():
+                    pass
+
+    async def test_rate_limit_rejects_long_waits(self):
+        """Test calls that would wait longer than the timeout for a token fail"""
+        limiter = AILimiter(
+            max_concurrency=5, max_queue=5, queue_timeout=1, rate_per_minute=1, burst=1
+        )
+
+        async with limiter.slot():
+            pass
+        with pytest.raises(AIBusyError) as exc_info:
+            async with limiter.slot():
+                pass
+        assert exc_info.value.retry_after >= 59
+
+
+    async def test_cancelled_rate_wait_returns_token(self):
+        """Test a caller cancelled while waiting for a token gives it back"""
+        limiter = AILimiter(
+            max_concurrency=5, max_queue=5, queue_timeout=5, rate_per_minute=60, burst=1
+        )
+        async with limiter.slot():
+            pass
+
+        waiter = asyncio.create_task(limiter.slot().__aenter__())
+        await asyncio.sleep(0.01)
+        assert limiter.bucket.tokens < 0
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert limiter.bucket.tokens >= 0
+        assert limiter.waiting == 0
+
+    async def test_cancelled_slot_wait_returns_token(self):
+        """Test a caller cancelled while queued for a slot leaves no trace"""
+        limiter = AILimiter(
+            max_concurrency=1, max_queue=1, queue_timeout=5, rate_per_minute=60, burst=2
+        )
+        async with limiter.slot():
+            waiter = asyncio.create_task(limiter.slot().__aenter__())
+            await asyncio.sleep(0.01)
+            assert limiter.waiting == 1
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        assert limiter.waiting == 0
+        assert limiter.bucket.tokens > 0.9
+        # Both the slot and the queue place are free again
+        async with limiter.slot():
+            pass
+
+
+class TestAIBusyResponses:
+    """Test cases for endpoints when the AI limiter is saturated"""
+
+    @patch("app.ai_utils.os.getenv")
+    @patch("app.ai_utils.ai_limiter")
+    def test_autofill_returns_429(
+        self, mock_limiter, mock_getenv, authenticated_client, db_session
+    ):
+        """Test the autofill endpoint answers 429 with Retry-After"""
+        from app.models import Game
+
+        mock_getenv.return_value = "test-api-key"
+        mock_limiter.slot.side_effect = AIBusyError(retry_after=5)
+
+        game = Game(title="Busy Game")
+        db_session.add(game)
+        db_session.commit()
+
+        response = authenticated_client.post(
+            f"/games/{game.id}/autofill", follow_redirects=False
+        )
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "5"
@@ -1,12 +1,28 @@
-from unittest.mock import MagicMock, patch
-
+import asyncio
+import os
+import subprocess
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
 import pytest
 
+from app import ai_utils
+from app.ai_limiter import AILimiter
 from app.ai_utils import (
+    ClientDisconnected,
+    JSONObjectParser,
+    cancel_on_disconnect,
+    explain_recommendations,
     format_game_metadata,
+    get_batch_game_metadata,
+    get_client,
     get_game_metadata,
     get_game_recommendations,
+    stream_game_recommendations,
 )
+from app.metrics import AI_PROMPT_TRUNCATIONS, AI_TOKENS
 
 
 class TestAIFunctions:
@@ -34,7 +50,7 @@ class TestAIFunctions:
             "description": "A classic strategy game"
         }
         """
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         # Test the function
         result = await get_game_metadata("Catan")
@@ -73,7 +89,7 @@ class TestAIFunctions:
         mock_response = MagicMock()
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "This is not valid JSON"
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         # Test the function
         result = await get_game_metadata("Catan")
@@ -94,7 +110,9 @@ class TestAIFunctions:
         mock_getenv.return_value = "test-api-key"
 
         # Mock OpenAI to raise exception
-        mock_client.chat.completions.create.side_effect = Exception("API Error")
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=Exception("API Error")
+        )
 
         # Test the function
         result = await get_game_metadata("Catan")
@@ -126,7 +144,7 @@ class TestAIFunctions:
             }
         ]
         """
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
         # Sample games data
         available_games = [
@@ -147,16 +165,18 @@ class TestAIFunctions:
         assert result[1]["reasoning"] == "Easy to learn and fun for groups"
 
     @patch("app.ai_utils.os.getenv")
-    async def test_get_game_recommendations_no_api_key(self, mock_getenv):
+    @patch("app.ai_utils._chat_completion")
+    async def test_get_game_recommendations_no_api_key(self, mock_chat, mock_getenv):
         """Test game recommendations without API key"""
         # Mock no API key
         mock_getenv.return_value = None
 
         # Test the function
-        result = await get_game_recommendations("test query", [])
+        result = await get_game_recommendations("test query", [{"title": "Catan"}])
 
-        # Should return empty list
+        # Should return empty list without calling the AI
         assert result == []
+        mock_chat.assert_not_called()
 
     @patch("app.ai_utils.os.getenv")
     async def test_get_game_recommendations_no_games(self, mock_getenv):
@@ -227,3 +247,417 @@ class TestAIFunctions:
         assert "playtime" in result and result["playtime"] == ""
         # Valid description should be cleaned and included
         assert result["description"] == "Valid description"
+
+
+class TestOpenAIClient:
+    """Test cases for the lazily constructed OpenAI client"""
+
+    def test_client_created_once_on_first_use(self):
+        """Test the client is built on first use and then reused"""
+        with patch.object(ai_utils, "client", None), patch(
+            "openai.AsyncOpenAI"
+        ) as mock_openai:
+            first = get_client()
+            second = get_client()
+
+        mock_openai.assert_called_once()
+        assert first is second is mock_openai.return_value
+        # Timeouts are explicit and retries are left to _chat_completion
+        timeout = mock_openai.call_args.kwargs["timeout"]
+        assert timeout.connect == ai_utils.AI_CONNECT_TIMEOUT
+        assert timeout.read == ai_utils.AI_READ_TIMEOUT
+        assert mock_openai.call_args.kwargs["max_retries"] == 0
+
+    def test_importing_app_does_not_import_openai(self):
+        """Test the OpenAI SDK stays out of worker startup"""
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys, app.main; print('openai' in sys.modules)",
+            ],
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "False"
+
+
+class TestRetryBackoff:
+    """Test cases for the delay between AI call attempts"""
+
+    def test_retry_delay_is_jittered_within_the_envelope(self):
+        """Test backoff is random, grows per attempt and is capped"""
+        first = [ai_utils._retry_delay(0) for _ in range(50)]
+        late = [ai_utils._retry_delay(20) for _ in range(50)]
+
+        assert all(0 <= delay <= ai_utils.AI_RETRY_BASE_DELAY for delay in first)
+        assert all(0 <= delay <= ai_utils.AI_RETRY_MAX_DELAY for delay in late)
+        assert len(set(late)) > 1
+
+
+def _completion(content):
+    response = MagicMock()
+    response.choices = [MagicMock()]
+    response.choices[0].message.content = content
+    return response
+
+
+def _server_error(status_code=503):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.InternalServerError(
+        "Service unavailable",
+        response=httpx.Response(status_code, request=request),
+        body=None,
+    )
+
+
+@patch("app.ai_utils._retry_delay", lambda attempt: 0)
+@patch("app.ai_utils.os.getenv", lambda *args: "test-api-key")
+class TestAsyncCompletions:
+    """Test cases for retries, timeouts and cancellation of AI calls"""
+
+    @patch("app.ai_utils.client")
+    async def test_transient_errors_are_retried(self, mock_client):
+        """Test a 5xx followed by a success returns the successful answer"""
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=[_server_error(), _completion('{"title": "Catan"}')]
+        )
+
+        result = await get_game_metadata("catan")
+
+        assert result == {"title": "Catan"}
+        assert mock_client.chat.completions.create.await_count == 2
+
+    @patch("app.ai_utils.client")
+    async def test_retries_are_bounded(self, mock_client):
+        """Test persistent transient errors give up after AI_MAX_RETRIES"""
+        mock_client.chat.completions.create = AsyncMock(side_effect=_server_error())
+
+        assert await get_game_metadata("catan") == {}
+        assert (
+            mock_client.chat.completions.create.await_count
+            == ai_utils.AI_MAX_RETRIES + 1
+        )
+
+    @patch("app.ai_utils.client")
+    async def test_client_errors_are_not_retried(self, mock_client):
+        """Test a 400 fails straight away"""
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=_server_error(400)
+        )
+
+        assert await get_game_metadata("catan") == {}
+        assert mock_client.chat.completions.create.await_count == 1
+
+    @patch("app.ai_utils.client")
+    async def test_calls_do_not_block_the_event_loop(self, mock_client):
+        """Test concurrent completions overlap instead of running one by one"""
+
+        async def slow_completion(**kwargs):
+            await asyncio.sleep(0.2)
+            return _completion('{"title": "Catan"}')
+
+        mock_client.chat.completions.create = slow_completion
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        # A fresh limiter, so earlier tests haven't used up the rate budget
+        with patch("app.ai_utils.ai_limiter", AILimiter(rate_per_minute=0)):
+            results = await asyncio.gather(
+                *(get_game_metadata("catan") for _ in range(3))
+            )
+
+        assert all(result == {"title": "Catan"} for result in results)
+        assert loop.time() - start < 0.5
+
+    async def test_cancelled_when_client_disconnects(self):
+        """Test the AI call is cancelled once the HTTP client goes away"""
+        cancelled = asyncio.Event()
+
+        async def never_finishes():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(side_effect=[False, True])
+
+        with pytest.raises(ClientDisconnected):
+            await cancel_on_disconnect(request, never_finishes(), poll_interval=0.01)
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+
+    async def test_result_returned_while_client_connected(self):
+        """Test the result passes through when the client stays"""
+        request = MagicMock()
+        request.is_disconnected = AsyncMock(return_value=False)
+
+        async def answer():
+            await asyncio.sleep(0.02)
+            return ["Catan"]
+
+        assert await cancel_on_disconnect(request, answer(), poll_interval=0.01) == [
+            "Catan"
+        ]
+
+
+@patch("app.ai_utils.os.getenv", lambda *args: "test-api-key")
+class TestBatchMetadata:
+    """Test cases for looking up several games in one AI request"""
+
+    @patch("app.ai_utils.client")
+    async def test_results_follow_title_order(self, mock_client):
+        """Test answers keyed by number map back to the titles"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_completion(
+                '{"2": {"title": "Azul", "game_type": ["Abstract", "Tiles"]},'
+                ' "1": {"title": "Catan"}, "3": {}}'
+            )
+        )
+
+        result = await get_batch_game_metadata(["catan", "azul", "Unknown"])
+
+        assert result == [
+            {"title": "Catan"},
+            {"title": "Azul", "game_type": "Abstract, Tiles"},
+            {},
+        ]
+        prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "2. azul" in prompt["content"]
+
+    @patch("app.ai_utils.client")
+    async def test_unparseable_answer(self, mock_client):
+        """Test a bad answer leaves every title unfilled"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_completion("Sorry, I can't help with that")
+        )
+
+        assert await get_batch_game_metadata(["catan", "azul"]) == [{}, {}]
+
+
+@patch("app.ai_utils.os.getenv", lambda *args: "test-api-key")
+class TestExplainRecommendations:
+    """Test cases for AI reasoning on locally chosen games"""
+
+    @patch("app.ai_utils.client")
+    async def test_reasons_follow_game_order(self, mock_client):
+        """Test one reason per game, padded when the model gives fewer"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_completion('["Everyone wins or loses together."]')
+        )
+
+        result = await explain_recommendations(
+            "cooperative", [{"title": "Pandemic"}, {"title": "Azul"}]
+        )
+
+        assert result == ["Everyone wins or loses together.", ""]
+        prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "\nPandemic|-|-|-|-" in prompt["content"]
+
+    @patch("app.ai_utils.client")
+    async def test_unparseable_answer(self, mock_client):
+        """Test a bad answer leaves every reason empty"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_completion("Pandemic is great")
+        )
+
+        assert await explain_recommendations("coop", [{"title": "Pandemic"}]) == [""]
+
+
+class TestPromptCompaction:
+    """Test cases for the game table sent in recommendation prompts"""
+
+    def test_games_table(self):
+        """Test games become pipe-separated rows under a header"""
+        table = ai_utils._games_info(
+            [
+                {
+                    "title": "Pandemic",
+                    "player_count": "2-4 players",
+                    "game_type": "Cooperative",
+                    "playtime": "45 minutes",
+                    "complexity": "Medium",
+                },
+                {"title": "Odd | Title", "player_count": "N/A"},
+            ],
+            0,
+        )
+
+        assert table.splitlines() == [
+            "title|players|type|playtime|complexity",
+            "Pandemic|2-4 players|Cooperative|45 minutes|Medium",
+            "Odd / Title|-|-|-|-",
+        ]
+
+    def test_token_budget_drops_last_games(self):
+        """Test the table stops at the budget, keeping the first games"""
+        games = [{"title": f"Game {number}"} for number in range(100)]
+        before = AI_PROMPT_TRUNCATIONS.value(operation="recommendations")
+
+        table = ai_utils._games_info(games, 50)
+
+        rows = table.splitlines()[1:]
+        assert 1 < len(rows) < 100
+        assert rows == [f"Game {number}|-|-|-|-" for number in range(len(rows))]
+        assert ai_utils.estimate_tokens(table) <= 50
+        assert table == ai_utils._games_info(games, 50)
+        assert AI_PROMPT_TRUNCATIONS.value(operation="recommendations") == before + 2
+
+    def test_token_budget_keeps_one_game(self):
+        """Test a budget too small for any game still sends the first one"""
+        table = ai_utils._games_info([{"title": "Catan"}, {"title": "Azul"}], 1)
+
+        assert table.splitlines()[1:] == ["Catan|-|-|-|-"]
+
+    @patch("app.ai_utils.client")
+    async def test_recommendation_prompt_uses_budget(self, mock_client):
+        """Test the recommendation prompt is capped by AI_PROMPT_TOKEN_BUDGET"""
+        mock_client.chat.completions.create = AsyncMock(return_value=_completion("[]"))
+        games = [{"title": f"Game {number}"} for number in range(500)]
+
+        with (
+            patch("app.ai_utils.AI_PROMPT_TOKEN_BUDGET", 100),
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-api-key"}),
+        ):
+            await get_game_recommendations("anything", games)
+
+        prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]
+        assert "Game 0|" in prompt["content"]
+        assert "Game 499|" not in prompt["content"]
+        assert ai_utils.estimate_tokens(prompt["content"]) < 200
+
+
+class TestJSONObjectParser:
+    """Test cases for picking JSON objects out of streamed text"""
+
+    def test_objects_complete_across_chunks(self):
+        """Test each object is returned once its closing brace arrives"""
+        parser = JSONObjectParser()
+        assert parser.feed('[{"title": "Cat') == []
+        assert parser.feed('an", "reasoning": "Trading"}, {"ti') == [
+            {"title": "Catan", "reasoning": "Trading"}
+        ]
+        assert parser.feed('tle": "Azul"}]') == [{"title": "Azul"}]
+
+    def test_braces_and_quotes_inside_strings(self):
+        """Test braces and escaped quotes in strings don't end an object"""
+        parser = JSONObjectParser()
+        text = '[{"title": "A \\"}\\" game", "nested": {"a": "{"}}]'
+        assert parser.feed(text) == [
+            {"title": 'A "}" game', "nested": {"a": "{"}}
+        ]
+
+    def test_malformed_object_is_skipped(self):
+        """Test a broken object doesn't stop later ones"""
+        parser = JSONObjectParser()
+        assert parser.feed('[{"title": Catan}, {"title": "Azul"}]') == [
+            {"title": "Azul"}
+        ]
+
+
+def _chunk(content=None, usage=None):
+    chunk = MagicMock()
+    chunk.choices = [] if content is None else [MagicMock()]
+    if content is not None:
+        chunk.choices[0].delta.content = content
+    chunk.usage = usage
+    return chunk
+
+
+async def _stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@patch("app.ai_utils.os.getenv", lambda *args: "test-api-key")
+class TestStreamedRecommendations:
+    """Test cases for streaming recommendations"""
+
+    @patch("app.ai_utils.client")
+    async def test_yields_each_recommendation(self, mock_client):
+        """Test recommendations are yielded as they complete"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_stream(
+                _chunk('[{"title": "Catan", "reasoning": "Tr'),
+                _chunk('ading"}, {"title": "Azul", '),
+                _chunk('"reasoning": "Tiles"}]'),
+                _chunk(usage=MagicMock(prompt_tokens=100, completion_tokens=20)),
+            )
+        )
+
+        result = [
+            recommendation
+            async for recommendation in stream_game_recommendations(
+                "strategy", [{"title": "Catan"}, {"title": "Azul"}]
+            )
+        ]
+
+        assert result == [
+            {"title": "Catan", "reasoning": "Trading"},
+            {"title": "Azul", "reasoning": "Tiles"},
+        ]
+        kwargs = mock_client.chat.completions.create.call_args.kwargs
+        assert kwargs["stream"] is True
+
+    @patch("app.ai_utils.client")
+    async def test_stops_at_max_recommendations(self, mock_client):
+        """Test the stream is cut off once enough games are recommended"""
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_stream(
+                _chunk('[{"title": "Catan"}, {"title": "Azul"}, {"title": "Root"}]')
+            )
+        )
+
+        result = [
+            recommendation
+            async for recommendation in stream_game_recommendations(
+                "strategy", [{"title": "Catan"}], max_recommendations=2
+            )
+        ]
+
+        assert [r["title"] for r in result] == ["Catan", "Azul"]
+
+    @patch("app.ai_utils.client")
+    async def test_usage_recorded_after_max_recommendations(self, mock_client):
+        """Test the stream is read to its usage chunk after the last game"""
+        titles = ["Catan", "Azul", "Root", "Wingspan", "Cascadia"]
+        mock_client.chat.completions.create = AsyncMock(
+            return_value=_stream(
+                *[_chunk(f'{{"title": "{title}"}}, ') for title in titles],
+                _chunk(usage=MagicMock(prompt_tokens=300, completion_tokens=60)),
+            )
+        )
+        before = AI_TOKENS.value(operation="recommendations", kind="completion")
+
+        result = [
+            recommendation
+            async for recommendation in stream_game_recommendations(
+                "strategy", [{"title": "Catan"}]
+            )
+        ]
+
+        assert len(result) == 5
+        assert AI_TOKENS.value(operation="recommendations", kind="completion") == (
+            before + 60
+        )
+
+    @patch("app.ai_utils.client")
+    async def test_failure_is_raised(self, mock_client):
+        """Test a stream breaking off raises after the complete recommendations"""
+
+        async def broken_stream():
+            yield _chunk('[{"title": "Catan"}, {"title": "Az')
+            raise Exception("Connection reset")
+
+        mock_client.chat.completions.create = AsyncMock(return_value=broken_stream())
+
+        result = []
+        with pytest.raises(Exception, match="Connection reset"):
+            async for recommendation in stream_game_recommendations(
+                "strategy", [{"title": "Catan"}]
+            ):
+                result.append(recommendation)
+
+        assert result == [{"title": "Catan"}]
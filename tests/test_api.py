@@ -1,3 +1,6 @@
+import asyncio
+import os
+import time
 from unittest.mock import patch
 
 import pytest
@@ -231,6 +234,100 @@ class TestAPIEndpoints:
         response = authenticated_client.get("/games?sort=title")
         assert response.status_code == 200
 
+    def test_games_list_paginated(self, authenticated_client: TestClient, db_session):
+        """Test the grid renders one page and links the next fragment"""
+        from app.models import Game
+        from app.pagination import GAMES_PAGE_SIZE
+
+        for i in range(GAMES_PAGE_SIZE + 5):
+            db_session.add(Game(title=f"Paged Game {i:03d}"))
+        db_session.commit()
+
+        response = authenticated_client.get("/")
+        assert response.status_code == 200
+        assert f"Paged Game {GAMES_PAGE_SIZE - 1:03d}" in response.text
+        assert f"Paged Game {GAMES_PAGE_SIZE:03d}" not in response.text
+        assert f"{GAMES_PAGE_SIZE + 5} games in collection" in response.text
+        assert "/games/fragment?cursor=" in response.text
+
+    def test_games_fragment_next_page(
+        self, authenticated_client: TestClient, db_session
+    ):
+        """Test the fragment endpoint returns the following cards only"""
+        from app.models import Game
+        from app.pagination import GAMES_PAGE_SIZE, encode_cursor
+
+        games = [Game(title=f"Paged Game {i:03d}") for i in range(GAMES_PAGE_SIZE + 5)]
+        db_session.add_all(games)
+        db_session.commit()
+
+        last = games[GAMES_PAGE_SIZE - 1]
+        cursor = encode_cursor(last.title, last.id)
+        response = authenticated_client.get(f"/games/fragment?cursor={cursor}")
+        assert response.status_code == 200
+        assert "<html" not in response.text
+        assert f"Paged Game {GAMES_PAGE_SIZE:03d}" in response.text
+        assert f"Paged Game {GAMES_PAGE_SIZE - 1:03d}" not in response.text
+        assert "/games/fragment" not in response.text
+
+    def test_games_filter_form_reloads_grid(
+        self, authenticated_client: TestClient, db_session
+    ):
+        """Test the filter controls fetch the grid from the server, prefilled"""
+        from app.models import Game
+
+        db_session.add(Game(title="Catan", game_type="Strategy"))
+        db_session.commit()
+
+        response = authenticated_client.get(
+            "/games?search=cat&game_type=Strategy&sort_by=created_at"
+        )
+        assert response.status_code == 200
+        assert 'hx-get="/games/fragment"' in response.text
+        assert 'name="search" value="cat"' in response.text
+        assert '<option value="Strategy" selected>' in response.text
+        assert '<option value="created_at" selected>' in response.text
+
+    def test_games_filter_form_keeps_range_filters(
+        self, authenticated_client: TestClient, db_session
+    ):
+        """Test range and linked filters are form inputs, so reloads keep them"""
+        response = authenticated_client.get(
+            "/games?players=4&max_playtime=0&max_setup=15&game_elements=Dice"
+        )
+        assert response.status_code == 200
+        assert 'name="players" min="1" value="4"' in response.text
+        assert 'name="max_playtime" min="0" value="0"' in response.text
+        assert 'name="max_setup" min="0" value="15"' in response.text
+        assert '<input type="hidden" name="game_elements" value="Dice">' in response.text
+        assert 'name="setup_time"' not in response.text
+
+        response = authenticated_client.get("/games")
+        assert 'name="players" min="1" value=""' in response.text
+
+    def test_games_fragment_filters_every_page(
+        self, authenticated_client: TestClient, db_session
+    ):
+        """Test filtered pages only hold matches and link filtered next pages"""
+        from app.models import Game
+        from app.pagination import GAMES_PAGE_SIZE
+
+        for i in range(GAMES_PAGE_SIZE + 5):
+            db_session.add(Game(title=f"Other {i:03d}", complexity="Easy"))
+            db_session.add(Game(title=f"Heavy {i:03d}", complexity="Hard"))
+        db_session.commit()
+
+        response = authenticated_client.get(
+            "/games/fragment?complexity=Hard&sort_by=created_at"
+        )
+        assert response.status_code == 200
+        assert "Heavy" in response.text
+        assert "Other" not in response.text
+        assert "complexity=Hard&amp;sort_by=created_at&amp;cursor=" in response.text
+
+        response = authenticated_client.get("/games/fragment?search=nothing-like-it")
+        assert "No games match these filters." in response.text
+
     def test_format_game_metadata_with_empty_values(self):
         """Test formatting metadata with empty values"""
         metadata = {
@@ -426,12 +523,231 @@ class TestGameCRUDEndpoints:
                 in response.headers["location"]
             )
 
+    def test_autofill_uses_metadata_cache(self, authenticated_client, db_session):
+        """Test repeat autofills of a title are served from the metadata cache"""
+        from app.models import Game, Job
+
+        game = Game(title="catan")
+        db_session.add(game)
+        db_session.commit()
+
+        with patch("app.main.get_game_metadata") as mock_get_metadata:
+            mock_get_metadata.return_value = {
+                "title": "Catan",
+                "player_count": "3-4 players",
+            }
+
+            authenticated_client.post(
+                f"/games/{game.id}/autofill", follow_redirects=False
+            )
+            response = authenticated_client.post(
+                "/games/autofill", data={"title": "CATAN "}, follow_redirects=False
+            )
+
+        # The known title is filled in straight away, without queueing a job
+        assert response.status_code == 303
+        mock_get_metadata.assert_called_once_with("catan")
+        assert db_session.query(Job).count() == 0
+        assert db_session.query(Game).filter(Game.title == "Catan").count() == 2
+
+    def test_autofill_by_title_queues_job(self, authenticated_client, db_session):
+        """Test autofill returns immediately and shows the metadata as pending"""
+        from app.models import Game, Job
+
+        async def slow_metadata(title):
+            await asyncio.sleep(10)
+
+        with patch("app.main.get_game_metadata", side_effect=slow_metadata):
+            response = authenticated_client.post(
+                "/games/autofill", data={"title": "Catan"}, follow_redirects=False
+            )
+            game = db_session.query(Game).one()
+            job = db_session.query(Job).one()
+            assert response.headers["location"] == f"/games/{game.id}"
+            assert job.game_id == game.id
+
+            page = authenticated_client.get(f"/games/{game.id}")
+            assert "Metadata pending" in page.text
+            assert f'hx-get="/jobs/{job.id}"' in page.text
+
+            status = authenticated_client.get(f"/jobs/{job.id}").json()
+            assert status["game_id"] == game.id
+            assert status["status"] in ("pending", "running")
+
+    def test_autofill_job_fills_metadata(self, authenticated_client, db_session):
+        """Test the background worker fills in the game and the poll refreshes"""
+        from app.models import Game, Job
+
+        with patch("app.main.get_game_metadata") as mock_get_metadata:
+            mock_get_metadata.return_value = {
+                "title": "Catan",
+                "player_count": "3-4 players",
+                "game_type": "Strategy",
+            }
+            authenticated_client.post(
+                "/games/autofill", data={"title": "catan"}, follow_redirects=False
+            )
+            job_id = db_session.query(Job.id).scalar()
+
+            for _ in range(100):
+                status = authenticated_client.get(f"/jobs/{job_id}").json()["status"]
+                if status == "done":
+                    break
+                time.sleep(0.02)
+
+        assert status == "done"
+        poll = authenticated_client.get(
+            f"/jobs/{job_id}", headers={"HX-Request": "true"}
+        )
+        assert poll.headers["HX-Refresh"] == "true"
+        db_session.expire_all()
+        game = db_session.query(Game).one()
+        assert game.title == "Catan"
+        assert game.player_count == "3-4 players"
+
+    def test_failed_job_shown_with_retry(self, authenticated_client, db_session):
+        """Test the game page keeps showing a failed autofill and offers a retry"""
+        from app.models import Game, Job
+
+        game = Game(title="Obscure Game")
+        db_session.add(game)
+        db_session.commit()
+        db_session.add(
+            Job(kind="autofill", game_id=game.id, status="failed", error="Not found")
+        )
+        db_session.commit()
+
+        page = authenticated_client.get(f"/games/{game.id}")
+        assert "AI autofill failed: Not found." in page.text
+        assert f'action="/games/{game.id}/autofill"' in page.text
+
+        # A newer successful run replaces it
+        db_session.add(Job(kind="autofill", game_id=game.id, status="done"))
+        db_session.commit()
+        page = authenticated_client.get(f"/games/{game.id}")
+        assert "AI autofill failed" not in page.text
+
+    def test_failed_bulk_autofill_shown_on_settings(
+        self, authenticated_client, db_session
+    ):
+        """Test the settings page shows the last bulk autofill failure"""
+        from app.models import Job
+
+        db_session.add(Job(kind="autofill_all", status="failed", error="Boom"))
+        db_session.commit()
+
+        page = authenticated_client.get("/settings")
+        assert "AI autofill failed: Boom." in page.text
+        assert 'action="/games/autofill-all"' in page.text
+
+    def test_get_job_not_found(self, authenticated_client):
+        """Test polling a job that doesn't exist"""
+        response = authenticated_client.get("/jobs/999")
+        assert response.status_code == 404
+
     def test_autofill_existing_game_not_found(self, authenticated_client):
         """Test autofill for non-existent game"""
         response = authenticated_client.post("/games/999/autofill")
         assert response.status_code == 404
 
 
+class TestRatingEndpoints:
+    """Test cases for partial rating updates"""
+
+    def _game_and_member(self, db_session):
+        from app.models import FamilyMember, Game
+
+        game = Game(title="Rated Game")
+        member = FamilyMember(name="Alice")
+        db_session.add_all([game, member])
+        db_session.commit()
+        return game, member
+
+    def test_create_rating(self, authenticated_client, db_session):
+        """Test setting a new rating returns the cell and average fragment"""
+        from app.models import GameRating
+
+        game, member = self._game_and_member(db_session)
+
+        response = authenticated_client.patch(
+            f"/games/{game.id}/ratings/{member.id}", data={"rating": "8"}
+        )
+        assert response.status_code == 200
+        assert f'id="rating-{game.id}-{member.id}"' in response.text
+        assert f'id="average-rating-{game.id}" hx-swap-oob="true"' in response.text
+        assert "8.0/10" in response.text
+        assert "<html" not in response.text
+
+        rating = db_session.query(GameRating).filter_by(game_id=game.id).one()
+        assert rating.rating == 8
+
+    def test_update_rating_recomputes_average(self, authenticated_client, db_session):
+        """Test changing one rating leaves the others and updates the average"""
+        from app.models import FamilyMember, GameRating
+
+        game, member = self._game_and_member(db_session)
+        other = FamilyMember(name="Bob")
+        db_session.add(other)
+        db_session.commit()
+        db_session.add_all(
+            [
+                GameRating(game_id=game.id, family_member_id=member.id, rating=4),
+                GameRating(game_id=game.id, family_member_id=other.id, rating=9),
+            ]
+        )
+        db_session.commit()
+
+        response = authenticated_client.patch(
+            f"/games/{game.id}/ratings/{member.id}", data={"rating": "6"}
+        )
+        assert response.status_code == 200
+        assert "7.5/10" in response.text
+
+        ratings = {
+            r.family_member_id: r.rating
+            for r in db_session.query(GameRating).filter_by(game_id=game.id)
+        }
+        assert ratings == {member.id: 6, other.id: 9}
+
+    def test_clear_rating(self, authenticated_client, db_session):
+        """Test an empty value removes the rating"""
+        from app.models import GameRating
+
+        game, member = self._game_and_member(db_session)
+        db_session.add(
+            GameRating(game_id=game.id, family_member_id=member.id, rating=5)
+        )
+        db_session.commit()
+
+        response = authenticated_client.patch(
+            f"/games/{game.id}/ratings/{member.id}", data={"rating": ""}
+        )
+        assert response.status_code == 200
+        assert db_session.query(GameRating).count() == 0
+
+    def test_invalid_rating(self, authenticated_client, db_session):
+        """Test out-of-range ratings are rejected"""
+        game, member = self._game_and_member(db_session)
+
+        response = authenticated_client.patch(
+            f"/games/{game.id}/ratings/{member.id}", data={"rating": "11"}
+        )
+        assert response.status_code == 400
+
+    def test_rating_not_found(self, authenticated_client, db_session):
+        """Test unknown games and family members return 404"""
+        game, member = self._game_and_member(db_session)
+
+        response = authenticated_client.patch(
+            f"/games/999/ratings/{member.id}", data={"rating": "5"}
+        )
+        assert response.status_code == 404
+        response = authenticated_client.patch(
+            f"/games/{game.id}/ratings/999", data={"rating": "5"}
+        )
+        assert response.status_code == 404
+
+
 class TestSettingsEndpoints:
     """Test cases for settings and family member endpoints"""
 
@@ -513,7 +829,10 @@ class TestRecommendationEndpoints:
         db_session.add(game)
         db_session.commit()
 
-        with patch("app.main.get_game_recommendations") as mock_get_recommendations:
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch("app.main.get_game_recommendations") as mock_get_recommendations,
+        ):
             mock_get_recommendations.return_value = [
                 {"title": "Catan", "reasoning": "Great strategy game"}
             ]
@@ -523,3 +842,4 @@ class TestRecommendationEndpoints:
             )
             assert response.status_code == 200
             assert "Catan" in response.text
+            assert "Great strategy game" in response.text
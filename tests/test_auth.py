@@ -175,7 +175,7 @@ class TestAuthFunctions:
         """Test verifying token that returns authenticated=False"""
         with patch("app.auth.get_serializer") as mock_get_serializer:
             mock_serializer = MagicMock()
-            mock_serializer.loads.return_value = {"authenticated": False}
+            mock_serializer.loads.return_value = ({"authenticated": False}, None)
             mock_get_serializer.return_value = mock_serializer
 
             result = verify_session_token("any_token")
@@ -185,13 +185,78 @@ class TestAuthFunctions:
         """Test verifying token that doesn't have authenticated key"""
         with patch("app.auth.get_serializer") as mock_get_serializer:
             mock_serializer = MagicMock()
-            mock_serializer.loads.return_value = {"other_key": "value"}
+            mock_serializer.loads.return_value = ({"other_key": "value"}, None)
             mock_get_serializer.return_value = mock_serializer
 
             result = verify_session_token("any_token")
             assert result is False
 
 
+class TestTokenCache:
+    """Test cases for the verified session token cache"""
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self):
+        import app.auth
+
+        app.auth._token_cache.clear()
+        yield app.auth
+        app.auth._token_cache.clear()
+
+    def test_verified_token_skips_signature_check(self, empty_cache):
+        """Test a recently verified token is accepted from the cache"""
+        token = empty_cache.create_session_token()
+        assert empty_cache.verify_session_token(token) is True
+
+        with patch("app.auth.get_serializer") as mock_get_serializer:
+            assert empty_cache.verify_session_token(token) is True
+        mock_get_serializer.assert_not_called()
+
+    def test_invalid_token_not_cached(self, empty_cache):
+        """Test failed verifications are never cached"""
+        assert empty_cache.verify_session_token("invalid_token") is False
+        assert len(empty_cache._token_cache) == 0
+
+    def test_cache_entry_expires(self, empty_cache):
+        """Test tokens are verified again once their cache entry expires"""
+        token = empty_cache.create_session_token()
+        empty_cache.verify_session_token(token)
+
+        later = empty_cache.time.time() + empty_cache.TOKEN_CACHE_TTL + 1
+        with (
+            patch("app.auth.time.time", return_value=later),
+            patch(
+                "app.auth.get_serializer", wraps=empty_cache.get_serializer
+            ) as mock_get_serializer,
+        ):
+            assert empty_cache.verify_session_token(token) is True
+        mock_get_serializer.assert_called_once()
+
+    def test_cache_never_outlives_token(self, empty_cache):
+        """Test a cache entry expires no later than the token itself"""
+        token = empty_cache.create_session_token()
+        with patch("app.auth.TOKEN_CACHE_TTL", 10 * empty_cache.SESSION_MAX_AGE):
+            empty_cache.verify_session_token(token)
+
+        (expires_at,) = empty_cache._token_cache.values()
+        assert expires_at <= (empty_cache.time.time() + empty_cache.SESSION_MAX_AGE)
+
+    def test_cache_is_bounded(self, empty_cache):
+        """Test the least recently used tokens are evicted beyond the size limit"""
+        tokens = [
+            empty_cache.get_serializer().dumps({"authenticated": True, "n": n})
+            for n in range(3)
+        ]
+        with patch("app.auth.TOKEN_CACHE_SIZE", 2):
+            for token in tokens:
+                assert empty_cache.verify_session_token(token) is True
+
+        assert len(empty_cache._token_cache) == 2
+        with patch("app.auth.get_serializer") as mock_get_serializer:
+            assert empty_cache.verify_session_token(tokens[2]) is True
+        mock_get_serializer.assert_not_called()
+
+
 class TestAuthEnvironmentVariables:
     """Test cases for environment variable handling"""
 
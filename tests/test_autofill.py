@@ -0,0 +1,131 @@
+import asyncio
+from unittest.mock import patch
+
+from app.ai_cache import cache_metadata
+from app.autofill import apply_metadata, autofill_missing, games_missing_metadata
+from app.models import Game
+
+COMPLETE = {
+    "player_count": "2-4 players",
+    "game_type": "Strategy",
+    "playtime": "30-60 minutes",
+    "complexity": "Medium",
+}
+
+
+def _fake_batch(calls, in_flight=None):
+    """Stand-in for get_batch_game_metadata recording the titles per call"""
+    active = 0
+
+    async def fake(titles):
+        nonlocal active
+        calls.append(list(titles))
+        active += 1
+        if in_flight is not None:
+            in_flight.append(active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return [
+            {} if title == "Unknown" else {"title": title.title(), **COMPLETE}
+            for title in titles
+        ]
+
+    return fake
+
+
+class TestApplyMetadata:
+    def test_overwrites_by_default(self):
+        game = Game(title="catan", complexity="Hard")
+        apply_metadata(game, {"title": "Catan", "complexity": "Medium"})
+        assert (game.title, game.complexity) == ("Catan", "Medium")
+
+    def test_only_missing_keeps_entered_values(self):
+        game = Game(title="catan", complexity="Hard", player_count="")
+        apply_metadata(game, {"title": "Catan", **COMPLETE}, only_missing=True)
+        assert game.title == "catan"
+        assert game.complexity == "Hard"
+        assert game.player_count == "2-4 players"
+
+
+class TestAutofillMissing:
+    def _add_games(self, db_session, titles, **fields):
+        for title in titles:
+            db_session.add(Game(title=title, **fields))
+        db_session.commit()
+
+    def test_selects_games_with_empty_fields(self, db_session):
+        self._add_games(db_session, ["Catan"], **COMPLETE)
+        self._add_games(db_session, ["Azul"], **{**COMPLETE, "playtime": ""})
+        self._add_games(db_session, ["Root"])
+        assert [title for _, title in games_missing_metadata(db_session)] == [
+            "Azul",
+            "Root",
+        ]
+
+    async def test_batches_titles_and_reports_progress(self, db_session):
+        titles = ["catan", "azul", "root", "Unknown", "wingspan"]
+        self._add_games(db_session, titles)
+        self._add_games(db_session, ["Complete"], **COMPLETE)
+        cache_metadata(db_session, "wingspan", {"title": "Wingspan", **COMPLETE})
+        db_session.commit()
+
+        calls, updates = [], []
+        with patch("app.autofill.get_batch_game_metadata", _fake_batch(calls)):
+            counts = await autofill_missing(
+                db_session,
+                batch_size=2,
+                progress=lambda done, total: updates.append((done, total)),
+            )
+
+        # The cached title needs no AI call; the rest go two per request
+        assert calls == [["catan", "azul"], ["root", "Unknown"]]
+        assert counts == {"games": 5, "filled": 4, "ai_requests": 2}
+        assert updates[0] == (1, 5) and updates[-1] == (5, 5)
+        db_session.expire_all()
+        catan = db_session.query(Game).filter(Game.title == "catan").one()
+        assert catan.player_count == "2-4 players"
+
+    async def test_rerun_only_retries_unfilled_games(self, db_session):
+        self._add_games(db_session, ["catan", "Unknown"])
+
+        calls = []
+        with patch("app.autofill.get_batch_game_metadata", _fake_batch(calls)):
+            await autofill_missing(db_session, batch_size=8)
+            calls.clear()
+            await autofill_missing(db_session, batch_size=8)
+
+        assert calls == [["Unknown"]]
+
+    async def test_concurrency_is_bounded(self, db_session):
+        self._add_games(db_session, [f"game {number}" for number in range(12)])
+
+        calls, in_flight = [], []
+        with patch(
+            "app.autofill.get_batch_game_metadata", _fake_batch(calls, in_flight)
+        ):
+            await autofill_missing(db_session, batch_size=2, concurrency=2)
+
+        assert len(calls) == 6
+        assert max(in_flight) == 2
+
+
+class TestAutofillAllEndpoint:
+    def test_queues_one_bulk_job(self, authenticated_client, db_session):
+        from app.models import Job
+
+        with patch("app.main.job_queue.submit") as submit:
+            first = authenticated_client.post(
+                "/games/autofill-all", follow_redirects=False
+            )
+            second = authenticated_client.post(
+                "/games/autofill-all", follow_redirects=False
+            )
+
+        job = db_session.query(Job).one()
+        assert job.kind == "autofill_all"
+        submit.assert_called_once_with(job.id)
+        assert first.headers["location"] == "/settings?msg=Bulk+autofill+started"
+        assert "already+running" in second.headers["location"]
+
+        page = authenticated_client.get("/settings")
+        assert f'hx-get="/jobs/{job.id}"' in page.text
@@ -330,3 +330,130 @@ class TestDatabaseSessionManagement:
 
             # This should not raise an error
             app.database.create_db_and_tables()
+
+
+class TestLazySession:
+    """Test cases for lazily opened request sessions"""
+
+    @pytest.fixture
+    def file_engine(self, tmp_path):
+        from sqlalchemy.pool import QueuePool
+
+        engine = create_engine(f"sqlite:///{tmp_path / 'lazy.db'}", poolclass=QueuePool)
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(Game(title="Catan"))
+            session.commit()
+        yield engine
+        engine.dispose()
+
+    def _lazy_session(self, engine):
+        from sqlalchemy.orm import sessionmaker
+
+        from app.database import LazySession
+
+        return LazySession(sessionmaker(bind=engine, autoflush=False))
+
+    def test_unused_session_is_never_created(self):
+        """Test a route that never touches the database creates no session"""
+        from app.database import LazySession
+
+        factory = MagicMock()
+        db = LazySession(factory)
+        db.release()
+        db.close()
+        factory.assert_not_called()
+
+    def test_session_created_on_first_use(self, file_engine):
+        """Test the session and connection are only opened by the first query"""
+        db = self._lazy_session(file_engine)
+        assert file_engine.pool.checkedout() == 0
+
+        assert db.query(Game).count() == 1
+        assert file_engine.pool.checkedout() == 1
+
+        db.close()
+        assert file_engine.pool.checkedout() == 0
+
+    def test_release_returns_connection_and_keeps_objects(self, file_engine):
+        """Test release ends the read transaction without expiring loaded rows"""
+        db = self._lazy_session(file_engine)
+        game = db.query(Game).one()
+
+        db.release()
+        assert file_engine.pool.checkedout() == 0
+        assert game.title == "Catan"
+        assert file_engine.pool.checkedout() == 0
+
+        # Later queries check out a connection again
+        assert db.query(Game).count() == 1
+        db.close()
+
+    def test_release_leaves_pending_writes(self, file_engine):
+        """Test release never commits changes on the handler's behalf"""
+        db = self._lazy_session(file_engine)
+        db.query(Game).one()
+        db.add(Game(title="Azul"))
+        db.release()
+        assert file_engine.pool.checkedout() == 1
+
+        db.flush()
+        db.release()
+        assert file_engine.pool.checkedout() == 1
+
+        db.rollback()
+        db.close()
+        with Session(file_engine) as session:
+            assert session.query(Game).count() == 1
+
+    def test_get_db_exposes_session_on_request(self):
+        """Test get_db registers the lazy session for release before rendering"""
+        from starlette.requests import Request
+
+        from app.database import LazySession, get_db, release_request_connection
+
+        request = Request({"type": "http", "headers": []})
+        db_gen = get_db(request)
+        db = next(db_gen)
+        assert isinstance(db, LazySession)
+        assert request.state.db is db
+
+        with patch.object(db, "release") as mock_release:
+            release_request_connection(request)
+        mock_release.assert_called_once()
+
+        with pytest.raises(StopIteration):
+            next(db_gen)
+
+    def test_route_releases_connection_before_rendering(self, file_engine):
+        """Test a page's connection is checked in before its template renders"""
+        from fastapi.testclient import TestClient
+        from sqlalchemy.orm import sessionmaker
+
+        from app.auth import create_session_token
+        from app.main import app
+        from app.metrics import InstrumentedTemplate
+
+        checked_out_at_render = []
+        render = InstrumentedTemplate.render
+
+        def recording_render(template, *args, **kwargs):
+            checked_out_at_render.append(file_engine.pool.checkedout())
+            return render(template, *args, **kwargs)
+
+        # The real get_db, not the override the client fixtures install
+        with (
+            patch(
+                "app.database.SessionLocal",
+                sessionmaker(bind=file_engine, autoflush=False),
+            ),
+            patch.object(InstrumentedTemplate, "render", recording_render),
+            TestClient(app) as client,
+        ):
+            client.cookies.set("session", create_session_token())
+            response = client.get("/")
+
+        assert response.status_code == 200
+        assert "Catan" in response.text
+        assert checked_out_at_render and set(checked_out_at_render) == {0}
+        assert file_engine.pool.checkedout() == 0
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app.models import FamilyMember, Game, GameRating, PlayLog
+from benchmarks.dataset import generate_dataset
+
+
+def _engine():
+    return create_engine("sqlite://")
+
+
+def _rows(engine, model):
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(select(model.__table__))]
+
+
+class TestGenerateDataset:
+    """Test cases for the synthetic dataset generator"""
+
+    def test_row_counts(self):
+        """Test the requested number of rows is written to each table"""
+        engine = _engine()
+        counts = generate_dataset(
+            engine, games=50, members=4, play_logs=300, rating_density=1.0
+        )
+        assert counts == {
+            "family_members": 4,
+            "games": 50,
+            "game_ratings": 200,
+            "play_logs": 300,
+        }
+        with Session(engine) as session:
+            assert session.query(PlayLog).count() == 300
+            assert session.query(GameRating).count() == 200
+
+    def test_same_seed_same_rows(self):
+        """Test a seed always produces identical data, ids included"""
+        first, second, other = _engine(), _engine(), _engine()
+        generate_dataset(first, games=20, members=3, play_logs=100, seed=7)
+        generate_dataset(second, games=20, members=3, play_logs=100, seed=7)
+        generate_dataset(other, games=20, members=3, play_logs=100, seed=8)
+
+        for model in (FamilyMember, Game, GameRating, PlayLog):
+            assert _rows(first, model) == _rows(second, model)
+        assert _rows(first, Game) != _rows(other, Game)
+
+    def test_rows_are_realistic(self):
+        """Test generated values fit the formats the app and AI prompts use"""
+        engine = _engine()
+        generate_dataset(engine, games=30, members=5, play_logs=200)
+        with Session(engine) as session:
+            for game in session.query(Game):
+                assert 1 <= len(game.game_type.split(", ")) <= 3
+                assert game.player_count.endswith("players")
+                assert game.average_rating is None or 1 <= game.average_rating <= 10
+            for play_log in session.query(PlayLog):
+                players = play_log.players.split(", ")
+                assert play_log.winner is None or play_log.winner in players
+                assert play_log.duration_minutes > 0
+            assert all(1 <= rating.rating <= 10 for rating in session.query(GameRating))
+
+    def test_refuses_existing_data_without_reset(self):
+        """Test existing games are only replaced when reset is requested"""
+        engine = _engine()
+        generate_dataset(engine, games=5, members=2, play_logs=10)
+        with pytest.raises(ValueError, match="already has games"):
+            generate_dataset(engine, games=5, members=2, play_logs=10)
+
+        counts = generate_dataset(engine, games=8, members=2, play_logs=10, reset=True)
+        assert counts["games"] == 8
+        assert len(_rows(engine, Game)) == 8
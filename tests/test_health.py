@@ -0,0 +1,91 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.health import ReadinessProbe, pool_usage
+
+
+def _queue_pool_engine(pool_size=2, max_overflow=0):
+    return create_engine(
+        "sqlite://", poolclass=QueuePool, pool_size=pool_size, max_overflow=max_overflow
+    )
+
+
+class TestPoolUsage:
+    def test_share_of_checked_out_connections(self):
+        engine = _queue_pool_engine(pool_size=2, max_overflow=2)
+        assert pool_usage(engine, max_overflow=2) == 0
+        with engine.connect():
+            assert pool_usage(engine, max_overflow=2) == 0.25
+            assert pool_usage(engine) == 0.5
+
+    def test_pool_without_counters(self):
+        engine = create_engine("sqlite://")
+        engine.pool = MagicMock(spec=[])
+        assert pool_usage(engine) is None
+
+
+class TestReadinessProbe:
+    def test_ready_when_database_answers(self):
+        probe = ReadinessProbe(_queue_pool_engine())
+        state = probe.refresh()
+        assert state.ready
+        assert state.database == "connected"
+        assert state.checked_at is not None
+
+    def test_not_ready_when_database_fails(self):
+        engine = _queue_pool_engine()
+        probe = ReadinessProbe(engine)
+        with patch.object(engine, "connect", side_effect=Exception("DB Error")):
+            state = probe.refresh()
+        assert not state.ready
+        assert state.database == "disconnected"
+
+    def test_not_ready_when_pool_saturated(self):
+        engine = _queue_pool_engine(pool_size=1)
+        probe = ReadinessProbe(engine)
+        with engine.connect():
+            with patch.object(engine, "connect") as connect:
+                state = probe.refresh()
+        # The probe must not queue for a connection behind real requests
+        connect.assert_not_called()
+        assert not state.ready
+        assert state.database == "saturated"
+        assert state.pool_usage == 1
+
+    async def test_current_probes_once_then_caches(self):
+        probe = ReadinessProbe(_queue_pool_engine())
+        with patch.object(probe, "refresh", wraps=probe.refresh) as refresh:
+            await probe.current()
+            await probe.current()
+            await probe.current()
+        assert refresh.call_count == 1
+
+    async def test_first_probe_runs_off_the_event_loop(self):
+        probe = ReadinessProbe(_queue_pool_engine())
+        loop_thread = threading.get_ident()
+        probe_threads = []
+
+        def refresh():
+            probe_threads.append(threading.get_ident())
+            return probe.state
+
+        with patch.object(probe, "refresh", refresh):
+            await probe.current()
+        assert probe_threads and probe_threads[0] != loop_thread
+
+    def test_background_task_refreshes(self):
+        probe = ReadinessProbe(_queue_pool_engine(), interval=0.01)
+
+        async def run():
+            probe.start()
+            await asyncio.sleep(0.1)
+            await probe.stop()
+
+        with patch.object(probe, "refresh", wraps=probe.refresh) as refresh:
+            asyncio.run(run())
+        assert refresh.call_count >= 2
+        assert probe._task is None
@@ -0,0 +1,136 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.ai_limiter import AIBusyError
+from app.jobs import DONE, FAILED, PENDING, RUNNING, JobQueue
+from app.models import Job
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+    SQLModel.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _add_job(session_factory, status=PENDING, updated_at=None) -> int:
+    with session_factory() as db:
+        job = Job(kind="autofill", game_id=1, status=status, updated_at=updated_at)
+        db.add(job)
+        db.commit()
+        return job.id
+
+
+def _job(session_factory, job_id) -> Job:
+    with session_factory() as db:
+        job = db.get(Job, job_id)
+        db.expunge(job)
+        return job
+
+
+class TestRunJob:
+    async def test_successful_job_is_done(self, session_factory):
+        queue = JobQueue(session_factory)
+        handler = AsyncMock()
+        queue.register("autofill", handler)
+        job_id = _add_job(session_factory)
+
+        assert await queue.run_job(job_id) == DONE
+
+        handler.assert_awaited_once()
+        job = _job(session_factory, job_id)
+        assert job.status == DONE
+        assert job.attempts == 1
+
+    async def test_failing_job_records_error(self, session_factory):
+        queue = JobQueue(session_factory)
+        queue.register("autofill", AsyncMock(side_effect=ValueError("Game not found")))
+        job_id = _add_job(session_factory)
+
+        assert await queue.run_job(job_id) == FAILED
+        assert _job(session_factory, job_id).error == "Game not found"
+
+    async def test_job_runs_only_once(self, session_factory):
+        queue = JobQueue(session_factory)
+        handler = AsyncMock()
+        queue.register("autofill", handler)
+        job_id = _add_job(session_factory)
+
+        await queue.run_job(job_id)
+        assert await queue.run_job(job_id) is None
+        handler.assert_awaited_once()
+
+    async def test_busy_ai_requeues_job(self, session_factory):
+        queue = JobQueue(session_factory)
+        queue.register("autofill", AsyncMock(side_effect=AIBusyError(retry_after=7)))
+        job_id = _add_job(session_factory)
+
+        with patch.object(queue, "_retry_later") as retry_later:
+            assert await queue.run_job(job_id) == PENDING
+        retry_later.assert_called_once_with(job_id, 7)
+
+    async def test_busy_ai_fails_job_after_max_attempts(self, session_factory):
+        queue = JobQueue(session_factory, max_attempts=2)
+        queue.register("autofill", AsyncMock(side_effect=AIBusyError(retry_after=7)))
+        job_id = _add_job(session_factory)
+
+        with patch.object(queue, "_retry_later") as retry_later:
+            assert await queue.run_job(job_id) == PENDING
+            assert await queue.run_job(job_id) == FAILED
+        retry_later.assert_called_once()
+        job = _job(session_factory, job_id)
+        assert job.attempts == 2
+        assert "busy" in job.error
+
+    async def test_cancelled_job_is_left_pending(self, session_factory):
+        async def slow_handler(db, job):
+            await asyncio.sleep(10)
+
+        queue = JobQueue(session_factory)
+        queue.register("autofill", slow_handler)
+        job_id = _add_job(session_factory)
+
+        task = asyncio.create_task(queue.run_job(job_id))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert _job(session_factory, job_id).status == PENDING
+
+
+class TestJobQueue:
+    def test_resume_resets_only_stale_running_jobs(self, session_factory):
+        now = datetime.now(UTC)
+        pending = _add_job(session_factory)
+        stale = _add_job(session_factory, RUNNING, now - timedelta(hours=1))
+        fresh = _add_job(session_factory, RUNNING, now)
+        _add_job(session_factory, DONE)
+
+        assert JobQueue(session_factory).resume() == [pending, stale]
+        assert _job(session_factory, fresh).status == RUNNING
+
+    async def test_workers_run_submitted_and_resumed_jobs(self, session_factory):
+        queue = JobQueue(session_factory, workers=2)
+        handler = AsyncMock()
+        queue.register("autofill", handler)
+        left_over = _add_job(session_factory)
+
+        await queue.start()
+        try:
+            with session_factory() as db:
+                job = queue.create(db, "autofill", game_id=2)
+                db.commit()
+                queue.submit(job.id)
+            await asyncio.wait_for(queue.join(), timeout=5)
+        finally:
+            await queue.stop()
+
+        assert handler.await_count == 2
+        assert _job(session_factory, left_over).status == DONE
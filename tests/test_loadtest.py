@@ -0,0 +1,114 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.database import get_db
+from app.main import app
+from app.models import FamilyMember, Game, GameRating, PlayLog
+from benchmarks.loadtest import (
+    Recorder,
+    compare_reports,
+    percentile,
+    run_load_test,
+    summarize,
+)
+
+
+@pytest.fixture
+def seeded_app(db_session):
+    """The app serving a small collection, with any password accepted"""
+    db_session.add_all(
+        [Game(title="Catan", complexity="Medium"), Game(title="Azul")]
+        + [FamilyMember(name="Alice"), FamilyMember(name="Bob")]
+    )
+    db_session.commit()
+    app.dependency_overrides[get_db] = lambda: db_session
+    with patch("app.main.check_family_password", return_value=True):
+        yield app
+    app.dependency_overrides.clear()
+
+
+class TestReport:
+    """Test cases for latency statistics and report comparison"""
+
+    def test_percentile_nearest_rank(self):
+        """Test percentiles pick the nearest-rank sample"""
+        values = [float(value) for value in range(1, 101)]
+        assert percentile(values, 50) == 50
+        assert percentile(values, 95) == 95
+        assert percentile(values, 99) == 99
+        assert percentile([], 95) == 0
+
+    def test_summarize_per_route(self):
+        """Test the report breaks latency and throughput down per route"""
+        recorder = Recorder()
+        recorder.routes["GET /"].latencies.extend([0.01, 0.02, 0.03, 0.04])
+        recorder.routes["GET /"].errors = 1
+        report = summarize(recorder, elapsed=2, config={})
+
+        route = report["routes"]["GET /"]
+        assert route["requests"] == 4
+        assert route["errors"] == 1
+        assert route["rps"] == 2
+        assert route["p50_ms"] == 20
+        assert route["p99_ms"] == 40
+        assert report["rps"] == 2
+
+    def test_compare_reports(self):
+        """Test comparison shows the relative change per route"""
+        baseline = {
+            "rps": 100,
+            "routes": {"GET /": {"p50_ms": 10, "p95_ms": 20, "p99_ms": 40, "rps": 100}},
+        }
+        current = {
+            "rps": 50,
+            "routes": {
+                "GET /": {"p50_ms": 15, "p95_ms": 20, "p99_ms": 20, "rps": 50},
+                "GET /games": {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "rps": 1},
+            },
+        }
+        lines = compare_reports(current, baseline)
+        assert "+50.0%" in lines[1]
+        assert "-50.0%" in lines[1]
+        assert "(new route)" in lines[2]
+
+
+class TestRunLoadTest:
+    """Test cases for running scenarios against the app in-process"""
+
+    async def test_runs_all_scenarios(self, seeded_app, db_session):
+        """Test a short mixed run logs in, discovers ids and hits every route"""
+        report = await run_load_test(
+            "http://testserver",
+            "password",
+            ["browse", "log-play", "edit-ratings"],
+            concurrency=1,
+            iterations=9,
+            transport=httpx.ASGITransport(app=seeded_app),
+        )
+
+        assert report["errors"] == 0
+        assert report["requests"] > 0
+        assert "GET /games/{game_id}" in report["routes"]
+        assert "POST /games/{game_id}/log-play" in report["routes"]
+        assert "PATCH /games/{game_id}/ratings/{member_id}" in report["routes"]
+        assert db_session.query(PlayLog).count() > 0
+        assert db_session.query(GameRating).count() > 0
+
+    async def test_failed_login(self, seeded_app):
+        """Test a wrong password stops the run before any load is generated"""
+        with patch("app.main.check_family_password", return_value=False):
+            with pytest.raises(RuntimeError, match="Login failed"):
+                await run_load_test(
+                    "http://testserver",
+                    "wrong",
+                    ["browse"],
+                    iterations=1,
+                    transport=httpx.ASGITransport(app=seeded_app),
+                )
+
+    async def test_unknown_scenario(self):
+        """Test unknown scenario names are rejected"""
+        with pytest.raises(ValueError, match="Unknown scenario"):
+            await run_load_test("http://testserver", "password", ["checkout"])
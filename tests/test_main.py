@@ -5,6 +5,7 @@ import pytest
 from sqlalchemy import text
 
 from app.database import get_db
+from app.sql_monitor import assert_max_queries
 
 
 class TestHealthCheck:
@@ -23,7 +24,8 @@ class TestHealthCheck:
         assert data["environment"] == "development"
 
     def test_health_check_healthy_production(self, db_session):
-        with patch.dict(os.environ, {"IS_PRODUCTION": "true"}):
+        # IS_PRODUCTION is read once at import, so patch the cached value
+        with patch("app.main.ENVIRONMENT", "production"):
             from fastapi.testclient import TestClient
 
             from app.main import app
@@ -63,6 +65,56 @@ class TestHealthCheck:
         response = client.head("/healthz")
         assert response.status_code == 200
 
+    def test_liveness(self):
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        client = TestClient(app)
+        with patch("app.main.readiness_probe.refresh") as refresh:
+            response = client.get("/livez")
+            assert client.head("/livez").status_code == 200
+        assert response.status_code == 200
+        assert response.json() == {"status": "alive"}
+        refresh.assert_not_called()
+
+    def test_readiness_serves_cached_state(self):
+        from fastapi.testclient import TestClient
+
+        from app.health import ReadinessState
+        from app.main import app, readiness_probe
+
+        client = TestClient(app)
+        with (
+            patch.object(
+                readiness_probe, "state", ReadinessState(True, "connected", 0.25, 1.0)
+            ),
+            patch.object(readiness_probe, "refresh") as refresh,
+        ):
+            response = client.get("/readyz")
+            assert client.head("/readyz").status_code == 200
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["database"] == "connected"
+        assert data["pool_usage"] == 0.25
+        refresh.assert_not_called()
+
+    def test_readiness_not_ready(self):
+        from fastapi.testclient import TestClient
+
+        from app.health import ReadinessState
+        from app.main import app, readiness_probe
+
+        client = TestClient(app)
+        with patch.object(
+            readiness_probe, "state", ReadinessState(False, "saturated", 1.0, 1.0)
+        ):
+            response = client.get("/readyz")
+        assert response.status_code == 503
+        assert response.json()["status"] == "not ready"
+        assert response.json()["database"] == "saturated"
+
 
 class TestLoginLogout:
     def test_login_page_get(self):
@@ -276,6 +328,25 @@ class TestUIEndpoints:
         assert response.status_code == 200
         assert "Recommendations" in response.text
 
+    def test_connection_released_before_rendering(self):
+        """Test pages hand the request's DB connection back before rendering"""
+        from starlette.requests import Request
+
+        from app.main import templates
+
+        request = Request(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": "/",
+                "query_string": b"",
+                "headers": [],
+            }
+        )
+        request.state.db = MagicMock()
+        templates.TemplateResponse(request, "login.html", {})
+        request.state.db.release.assert_called_once()
+
 
 class TestAuthenticationRequired:
     """Test cases for endpoints that require authentication"""
@@ -321,3 +392,100 @@ class TestAuthenticationRequired:
         response = client.get("/settings", follow_redirects=False)
         assert response.status_code == 303
         assert response.headers["location"] == "/login"
+
+    def test_rejected_requests_skip_database(self):
+        """Test unauthenticated requests are redirected before get_db runs"""
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        get_db_calls = []
+        app.dependency_overrides[get_db] = lambda: get_db_calls.append(1)
+        client = TestClient(app)
+
+        for method, url in [
+            ("GET", "/"),
+            ("GET", "/games/1"),
+            ("POST", "/games"),
+            ("PATCH", "/games/1/ratings/1"),
+            ("POST", "/recommend"),
+        ]:
+            response = client.request(method, url, follow_redirects=False)
+            assert response.status_code == 303
+            assert response.headers["location"] == "/login"
+        assert get_db_calls == []
+        app.dependency_overrides.clear()
+
+    def test_only_public_routes_skip_auth(self):
+        """Test every route except probes, metrics and login requires a session"""
+        from fastapi.routing import APIRoute
+
+        from app.main import app, require_auth
+
+        public = {"/livez", "/readyz", "/healthz", "/metrics", "/login", "/logout"}
+        for route in app.routes:
+            if not isinstance(route, APIRoute) or route.path in public:
+                continue
+            dependencies = [dep.call for dep in route.dependant.dependencies]
+            assert dependencies[0] is require_auth, route.path
+
+
+class TestQueryBudgets:
+    """Pin the number of SQL statements per page so N+1 regressions fail"""
+
+    @pytest.fixture
+    def collection(self, db_session):
+        """Several games, each rated by every family member and played once"""
+        from datetime import datetime
+
+        from app.models import FamilyMember, Game, GameRating, PlayLog
+
+        members = [FamilyMember(name=f"Member {i}") for i in range(5)]
+        games = [Game(title=f"Game {i}", game_type="Strategy") for i in range(10)]
+        db_session.add_all(members + games)
+        db_session.commit()
+        for game in games:
+            for member in members:
+                db_session.add(
+                    GameRating(game_id=game.id, family_member_id=member.id, rating=7)
+                )
+            db_session.add(
+                PlayLog(
+                    game_id=game.id,
+                    played_date=datetime(2025, 1, 1),
+                    duration_minutes=30,
+                )
+            )
+        db_session.commit()
+        ids = {"games": [g.id for g in games], "members": [m.id for m in members]}
+        # Start every request from an empty identity map
+        db_session.expunge_all()
+        return ids
+
+    def test_index_query_budget(self, authenticated_client, collection):
+        with assert_max_queries(8):
+            response = authenticated_client.get("/")
+        assert response.status_code == 200
+
+    def test_list_games_query_budget(self, authenticated_client, collection):
+        with assert_max_queries(8):
+            response = authenticated_client.get("/games?game_type=Strategy")
+        assert response.status_code == 200
+
+    def test_get_game_query_budget(self, authenticated_client, collection):
+        game_id = collection["games"][0]
+        with assert_max_queries(4):
+            response = authenticated_client.get(f"/games/{game_id}")
+        assert response.status_code == 200
+
+    def test_log_play_session_query_budget(self, authenticated_client, collection):
+        game_id = collection["games"][0]
+        data = {"played_date": "2025-02-01T10:00", "duration_minutes": "45"}
+        for member_id in collection["members"]:
+            data[f"rating_{member_id}"] = "9"
+
+        with assert_max_queries(7):
+            response = authenticated_client.post(
+                f"/games/{game_id}/log-play", data=data, follow_redirects=False
+            )
+        assert response.status_code == 303
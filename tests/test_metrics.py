@@ -0,0 +1,272 @@
+import json
+import os
+import subprocess
+import sys
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool, StaticPool
+from starlette.testclient import TestClient
+
+from app.metrics import (
+    AI_CALL_ERRORS,
+    AI_CALL_TOKENS,
+    AI_TOKENS,
+    REQUEST_AI_TOKENS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    Registry,
+    RequestStats,
+    SnapshotWriter,
+    clear_snapshots,
+    current_request,
+    instrument_engine,
+    read_snapshots,
+    register_pool_metrics,
+    registry,
+    render_metrics,
+    write_snapshot,
+)
+
+
+class TestMetricTypes:
+    """Test cases for the Prometheus metric primitives"""
+
+    def test_counter_render(self):
+        """Test counters render one sample per label set"""
+        counter = Counter("test_total", "Test counter", ["route"])
+        counter.inc(route="/a")
+        counter.inc(2, route="/a")
+        lines = counter.render()
+        assert "# TYPE test_total counter" in lines
+        assert 'test_total{route="/a"} 3' in lines
+
+    def test_histogram_render(self):
+        """Test histogram buckets are cumulative with sum and count"""
+        histogram = Histogram(
+            "test_seconds", "Test histogram", ["route"], buckets=(1, 5)
+        )
+        histogram.observe(0.5, route="/a")
+        histogram.observe(3, route="/a")
+        lines = histogram.render()
+        assert 'test_seconds_bucket{route="/a",le="1"} 1' in lines
+        assert 'test_seconds_bucket{route="/a",le="5"} 2' in lines
+        assert 'test_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+        assert 'test_seconds_sum{route="/a"} 3.5' in lines
+        assert 'test_seconds_count{route="/a"} 2' in lines
+
+    def test_label_escaping(self):
+        """Test quotes in label values are escaped"""
+        counter = Counter("test_total", "Test counter", ["route"])
+        counter.inc(route='/a"b')
+        assert 'test_total{route="/a\\"b"} 1' in counter.render()
+
+
+class TestWorkerAggregation:
+    """Test cases for summing metrics across worker processes"""
+
+    def test_snapshots_are_summed(self):
+        """Test other workers' counters, histograms and gauges add to ours"""
+        ours = Registry()
+        counter = ours.register(Counter("test_total", "Test counter", ["route"]))
+        histogram = ours.register(Histogram("test_seconds", "Test", buckets=(1,)))
+        ours.register(Gauge("test_connections", "Test gauge", lambda: 2))
+        counter.inc(route="/a")
+        histogram.observe(0.5)
+
+        theirs = Registry()
+        theirs.register(Counter("test_total", "Test counter", ["route"])).inc(
+            3, route="/a"
+        )
+        theirs._metrics["test_total"].inc(route="/b")
+        theirs.register(Histogram("test_seconds", "Test", buckets=(1,))).observe(4)
+        theirs.register(Gauge("test_connections", "Test gauge", lambda: 5))
+
+        lines = ours.render([json.loads(json.dumps(theirs.snapshot()))]).splitlines()
+        assert 'test_total{route="/a"} 4' in lines
+        assert 'test_total{route="/b"} 1' in lines
+        assert 'test_seconds_bucket{le="1"} 1' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 2' in lines
+        assert "test_seconds_sum 4.5" in lines
+        assert "test_connections 7" in lines
+
+    def test_exited_workers_keep_counters_not_gauges(self, tmp_path):
+        """Test a recycled worker's totals still count but its gauges don't"""
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        saved = {
+            "gamedex_db_queries_total": [[["background"], 7]],
+            "gamedex_db_pool_checked_out": [[[], 3]],
+        }
+        for pid in (os.getppid(), exited.pid):
+            (tmp_path / f"metrics-{pid}.json").write_text(
+                json.dumps({"pid": pid, "metrics": saved})
+            )
+
+        with patch.dict(registry._metrics):
+            registry.register(
+                Gauge("gamedex_db_pool_checked_out", "Connections in use", lambda: 0)
+            )
+            snapshots = read_snapshots(str(tmp_path))
+            assert len(snapshots) == 2
+            assert sum("gamedex_db_pool_checked_out" in s for s in snapshots) == 1
+
+    def test_own_snapshot_is_not_counted_twice(self, tmp_path):
+        """Test a worker renders its live values, not its saved copy too"""
+        before = render_metrics(str(tmp_path))
+        write_snapshot(str(tmp_path))
+        assert (tmp_path / f"metrics-{os.getpid()}.json").exists()
+        assert render_metrics(str(tmp_path)) == before
+
+    async def test_writer_saves_on_stop(self, tmp_path):
+        """Test the background writer saves once more when the worker stops"""
+        writer = SnapshotWriter(str(tmp_path), interval=3600)
+        writer.start()
+        path = tmp_path / f"metrics-{os.getpid()}.json"
+        await writer.stop()
+        assert path.exists()
+        assert json.loads(path.read_text())["pid"] == os.getpid()
+
+        clear_snapshots(str(tmp_path))
+        assert list(tmp_path.iterdir()) == []
+
+
+class TestInstrumentation:
+    """Test cases for request, SQL and AI instrumentation"""
+
+    def test_metrics_endpoint(self, authenticated_client):
+        """Test /metrics reports per-route requests and template renders"""
+        authenticated_client.get("/games/999")
+        authenticated_client.get("/")
+
+        response = authenticated_client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'gamedex_http_requests_total{method="GET",route="/games/{game_id}",status="404"}'
+            in response.text
+        )
+        assert (
+            'gamedex_template_render_duration_seconds_count{template="index.html"}'
+            in response.text
+        )
+
+    def test_sql_statements_counted_per_request(self):
+        """Test SQL hooks attribute statements to the current request"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+        finally:
+            current_request.reset(token)
+
+        assert stats.db_queries == 2
+        assert stats.db_seconds >= 0
+
+    def test_failed_statement_discards_timer(self):
+        """Test a failing statement doesn't leave its start time behind"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+
+        with engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM missing_table"))
+            assert conn.info["query_start_time"] == []
+
+    def test_pool_gauges_follow_disposed_pool(self):
+        """Test pool gauges read the engine's current pool, not the first one"""
+        engine = create_engine("sqlite://", poolclass=QueuePool)
+
+        with patch.dict(registry._metrics):
+            register_pool_metrics(engine)
+            connection = engine.connect()
+            assert "gamedex_db_pool_checked_out 1" in render_metrics()
+
+            # What the worker fork hook does
+            engine.dispose(close=False)
+            assert "gamedex_db_pool_checked_out 0" in render_metrics()
+            connection.close()
+
+    @patch("app.ai_utils.os.getenv")
+    @patch("app.ai_utils.client")
+    async def test_ai_token_usage_recorded(self, mock_client, mock_getenv):
+        """Test token usage from OpenAI responses is counted"""
+        from app.ai_utils import get_game_metadata
+
+        mock_getenv.return_value = "test-api-key"
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"title": "Catan"}'
+        mock_response.usage.prompt_tokens = 120
+        mock_response.usage.completion_tokens = 30
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        before = AI_TOKENS.value(operation="metadata", kind="prompt")
+        await get_game_metadata("Catan")
+        assert AI_TOKENS.value(operation="metadata", kind="prompt") == before + 120
+
+    @patch("app.ai_utils.os.getenv")
+    @patch("app.ai_utils.client")
+    async def test_ai_tokens_recorded_per_call_and_request(
+        self, mock_client, mock_getenv
+    ):
+        """Test each call's token usage is observed and added to the request"""
+        from app.ai_utils import get_game_metadata
+
+        mock_getenv.return_value = "test-api-key"
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"title": "Catan"}'
+        mock_response.usage.prompt_tokens = 120
+        mock_response.usage.completion_tokens = 30
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+        before = AI_CALL_TOKENS.count(operation="metadata", kind="completion")
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            await get_game_metadata("Catan")
+            await get_game_metadata("Azul")
+        finally:
+            current_request.reset(token)
+
+        assert stats.ai_tokens == 300
+        assert AI_CALL_TOKENS.count(operation="metadata", kind="completion") == (
+            before + 2
+        )
+
+    def test_request_ai_tokens_observed(self):
+        """Test the middleware reports AI tokens for requests that used any"""
+
+        async def app(scope, receive, send):
+            current_request.get().ai_tokens += 250
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        before = REQUEST_AI_TOKENS.count(route="unmatched")
+        TestClient(MetricsMiddleware(app)).get("/anything")
+        assert REQUEST_AI_TOKENS.count(route="unmatched") == before + 1
+
+    @patch("app.ai_utils.os.getenv")
+    @patch("app.ai_utils.client")
+    async def test_ai_errors_recorded(self, mock_client, mock_getenv):
+        """Test failed OpenAI calls are counted"""
+        from app.ai_utils import get_game_metadata
+
+        mock_getenv.return_value = "test-api-key"
+        mock_client.chat.completions.create = AsyncMock(
+            side_effect=Exception("API Error")
+        )
+
+        before = AI_CALL_ERRORS.value(operation="metadata")
+        assert await get_game_metadata("Catan") == {}
+        assert AI_CALL_ERRORS.value(operation="metadata") == before + 1
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.models import Game
+from app.pagination import decode_cursor, encode_cursor, paginate_games
+
+
+class TestCursor:
+    """Test cases for pagination cursors"""
+
+    def test_cursor_round_trip(self):
+        """Test string sort values survive encoding"""
+        cursor = encode_cursor("Catan", 7)
+        assert decode_cursor(cursor) == ("Catan", 7)
+
+    def test_cursor_round_trip_datetime(self):
+        """Test datetime sort values survive encoding"""
+        created = datetime(2025, 7, 4, 16, 41, 47, 123456)
+        assert decode_cursor(encode_cursor(created, 3)) == (created, 3)
+
+    def test_decode_invalid_cursor(self):
+        """Test garbage cursors are rejected instead of raising"""
+        assert decode_cursor("not-a-cursor") is None
+
+
+class TestPaginateGames:
+    """Test cases for keyset pagination of games"""
+
+    def _add_games(self, db_session: Session, titles):
+        for title in titles:
+            db_session.add(Game(title=title))
+        db_session.commit()
+
+    def test_pages_cover_collection_in_order(self, db_session: Session):
+        """Test walking all pages returns every game once, in title order"""
+        titles = [f"Game {i:02d}" for i in range(10)]
+        self._add_games(db_session, reversed(titles))
+
+        seen = []
+        cursor = None
+        while True:
+            games, cursor = paginate_games(
+                db_session.query(Game), cursor=cursor, page_size=3
+            )
+            seen.extend(game.title for game in games)
+            if cursor is None:
+                break
+
+        assert seen == titles
+
+    def test_duplicate_sort_values_use_id_tie_breaker(self, db_session: Session):
+        """Test games sharing a title are neither skipped nor repeated"""
+        self._add_games(db_session, ["Same"] * 5)
+
+        first, cursor = paginate_games(db_session.query(Game), page_size=2)
+        second, cursor = paginate_games(
+            db_session.query(Game), cursor=cursor, page_size=2
+        )
+        third, cursor = paginate_games(
+            db_session.query(Game), cursor=cursor, page_size=2
+        )
+
+        ids = [game.id for game in first + second + third]
+        assert ids == sorted(ids)
+        assert len(set(ids)) == 5
+        assert cursor is None
+
+    def test_descending_sort(self, db_session: Session):
+        """Test newest-first pagination on created_at"""
+        self._add_games(db_session, ["First", "Second", "Third"])
+
+        games, cursor = paginate_games(
+            db_session.query(Game), sort_by="created_at", page_size=2
+        )
+        rest, _ = paginate_games(
+            db_session.query(Game), sort_by="created_at", cursor=cursor, page_size=2
+        )
+
+        assert [game.title for game in games + rest] == ["Third", "Second", "First"]
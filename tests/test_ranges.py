@@ -0,0 +1,136 @@
+from app.autofill import apply_metadata
+from app.models import Game
+from app.ranges import game_numbers, parse_range
+
+
+class TestParseRange:
+    def test_ranges(self):
+        assert parse_range("2-4 players") == (2, 4)
+        assert parse_range("3 to 5") == (3, 5)
+        assert parse_range("5+") == (5, 9)
+        assert parse_range("Up to 8 players") == (1, 8)
+        assert parse_range("2 players") == (2, 2)
+
+    def test_hours_are_minutes(self):
+        assert parse_range("30-60 minutes") == (30, 60)
+        assert parse_range("1-2 hours") == (60, 120)
+
+    def test_each_number_has_its_own_unit(self):
+        assert parse_range("45 minutes to 1 hour") == (45, 60)
+        assert parse_range("30 min - 2 hours") == (30, 120)
+        assert parse_range("1 hr") == (60, 60)
+
+    def test_decimals(self):
+        assert parse_range("1.5 hours") == (90, 90)
+        assert parse_range("1-1.5 hours") == (60, 90)
+        assert parse_range("2.5+ hours", open_span=None) == (150, None)
+
+    def test_unparseable(self):
+        assert parse_range(None) is None
+        assert parse_range("varies") is None
+
+    def test_open_span(self):
+        assert parse_range("5+ players", open_span=None) == (5, None)
+        assert parse_range("6+", open_span=10) == (6, 16)
+
+    def test_open_durations_stay_open(self):
+        assert parse_range("120+ minutes") == (120, None)
+        assert parse_range("2+ hours", open_span=10) == (120, None)
+
+    def test_compound_durations(self):
+        assert parse_range("1 hour 30 minutes") == (90, 90)
+        assert parse_range("1h 30m") == (90, 90)
+        assert parse_range("1h30m") == (90, 90)
+        assert parse_range("1 hr and 15 min") == (75, 75)
+        assert parse_range("1 hour 30 minutes - 2 hours") == (90, 120)
+
+    def test_lists(self):
+        assert parse_range("2, 4 or 6 players") == (2, 6)
+        assert parse_range("3/4/5") == (3, 5)
+
+
+class TestGameNumbers:
+    def test_parses_all_fields(self):
+        assert game_numbers("2-4 players", "1-2 hours", "5-10 minutes") == {
+            "min_players": 2,
+            "max_players": 4,
+            "min_playtime": 60,
+            "max_playtime": 120,
+            "setup_minutes": 10,
+        }
+
+    def test_open_ended_and_missing(self):
+        assert game_numbers("5+ players", None, "varies") == {
+            "min_players": 5,
+            "max_players": None,
+            "min_playtime": None,
+            "max_playtime": None,
+            "setup_minutes": None,
+        }
+
+    def test_set_on_insert_and_update(self, db_session):
+        game = Game(title="Catan", player_count="3-4 players", playtime="60 minutes")
+        db_session.add(game)
+        db_session.commit()
+        assert (game.min_players, game.max_players) == (3, 4)
+        assert (game.min_playtime, game.max_playtime) == (60, 60)
+
+        game.player_count = "2-6 players"
+        game.playtime = None
+        db_session.commit()
+        assert (game.min_players, game.max_players) == (2, 6)
+        assert game.max_playtime is None
+
+    def test_set_by_autofill(self, db_session):
+        game = Game(title="Azul")
+        db_session.add(game)
+        db_session.commit()
+        assert game.min_players is None
+
+        apply_metadata(game, {"player_count": "2-4 players", "setup_time": "5 min"})
+        db_session.commit()
+        assert (game.min_players, game.max_players, game.setup_minutes) == (2, 4, 5)
+
+
+class TestRangeFilters:
+    def test_games_filtered_by_numeric_ranges(self, authenticated_client, db_session):
+        for title, player_count, playtime, setup_time in [
+            ("Patchwork", "2 players", "30 minutes", "5 minutes"),
+            ("Codenames", "4-8 players", "15 minutes", "2 minutes"),
+            ("Werewolf", "6+ players", "30-45 minutes", "5 minutes"),
+            ("Twilight Imperium", "3-6 players", "4-8 hours", "1 hour"),
+            ("Mystery", None, None, None),
+        ]:
+            db_session.add(
+                Game(
+                    title=title,
+                    player_count=player_count,
+                    playtime=playtime,
+                    setup_time=setup_time,
+                )
+            )
+        db_session.commit()
+
+        def titles(**params):
+            response = authenticated_client.get("/games", params=params)
+            assert response.status_code == 200
+            return {
+                title
+                for title in (
+                    "Patchwork",
+                    "Codenames",
+                    "Werewolf",
+                    "Twilight",
+                    "Mystery",
+                )
+                if title in response.text
+            }
+
+        assert titles(players=5) == {"Codenames", "Twilight"}
+        assert titles(players=10) == {"Werewolf"}
+        assert titles(players=5, max_playtime=45) == {"Codenames"}
+        assert titles(max_setup=5) == {"Patchwork", "Codenames", "Werewolf"}
+
+    def test_invalid_range_rejected(self, authenticated_client):
+        response = authenticated_client.get("/games", params={"players": 0})
+        assert response.status_code == 422
@@ -0,0 +1,370 @@
+import os
+from unittest.mock import AsyncMock, patch
+
+from app.models import Game
+from app.recommend import (
+    complexity_level,
+    explain_match,
+    parse_query,
+    recommend_locally,
+    score_game,
+    select_candidates,
+    use_local_recommendations,
+)
+
+
+def _game(title, **fields):
+    return {"title": title, **fields}
+
+
+class TestParseQuery:
+    def test_player_count(self):
+        assert parse_query("something for 4 players").players == 4
+        assert parse_query("game for three people").players == 3
+        assert parse_query("a party of 6").players == 6
+        assert parse_query("solo evening").players == 1
+        assert parse_query("date night with my partner").players == 2
+
+    def test_bare_player_count(self):
+        assert parse_query("quick game for 4").players == 4
+        assert parse_query("party game for 8").players == 8
+        assert parse_query("game for three tonight").players == 3
+        prefs = parse_query("game for 3 in under 30 min")
+        assert prefs.players == 3
+        assert prefs.max_minutes == 30
+
+    def test_duration_is_not_a_player_count(self):
+        assert parse_query("something to play for 2 hours").players is None
+        assert parse_query("a game for 45 minutes").players is None
+
+    def test_a_is_not_a_player_count(self):
+        assert parse_query("something for a kids party").players is None
+
+    def test_time_budget_in_minutes(self):
+        assert parse_query("under 45 minutes").max_minutes == 45
+        assert parse_query("about an hour").max_minutes == 60
+        assert parse_query("half an hour or less").max_minutes == 30
+        assert parse_query("2 hours tonight").max_minutes == 120
+        assert parse_query("something quick").max_minutes == 30
+
+    def test_complexity_and_words(self):
+        prefs = parse_query("An easy cooperative game for 2 players")
+        assert prefs.complexity == 1
+        assert prefs.words == ("cooperative", "easy")
+
+    def test_nothing_parseable(self):
+        prefs = parse_query("surprise me")
+        assert prefs.players is None
+        assert prefs.max_minutes is None
+        assert prefs.complexity is None
+
+
+class TestComplexityLevel:
+    def test_levels(self):
+        assert complexity_level("Medium") == 2
+        assert complexity_level("Very complex") == 3
+        assert complexity_level(None) is None
+
+
+class TestScoring:
+    def test_fit_outscores_misfit(self):
+        prefs = parse_query("easy game for 4 players under 30 minutes")
+        fits = _game(
+            "Sushi Go", player_count="2-5 players", playtime="15 min", complexity="Easy"
+        )
+        misfit = _game(
+            "Twilight Imperium",
+            player_count="3-6 players",
+            playtime="4-8 hours",
+            complexity="Expert",
+        )
+        unknown = _game("Mystery Box")
+        assert score_game(fits, prefs) > score_game(unknown, prefs)
+        assert score_game(unknown, prefs) > score_game(misfit, prefs)
+
+    def test_player_count_outside_range(self):
+        prefs = parse_query("two player game")
+        assert score_game(_game("Patchwork", player_count="2 players"), prefs) > 0
+        assert score_game(_game("Codenames", player_count="4-8 players"), prefs) < 0
+
+    def test_open_ended_playtime_is_a_partial_fit(self):
+        prefs = parse_query("under 150 minutes")
+        open_ended = _game("Twilight Imperium", playtime="120+ minutes")
+        assert score_game(open_ended, prefs) == 1
+        assert "fits in" not in explain_match(open_ended, prefs)
+
+    def test_keywords_match_type_and_description(self):
+        prefs = parse_query("cooperative dungeon crawler")
+        coop = _game("Gloomhaven", game_type="Cooperative, Dungeon crawler")
+        assert score_game(coop, prefs) == 1.5
+        assert score_game(_game("Chess"), prefs) == 0
+
+
+class TestSelectCandidates:
+    def test_small_collections_pass_through(self):
+        games = [_game("Catan"), _game("Azul")]
+        assert select_candidates("anything", games, limit=5) is games
+
+    def test_top_matches_in_score_order(self):
+        games = [_game(f"Filler {i}", player_count="5-8 players") for i in range(10)]
+        games.insert(3, _game("Jaipur", player_count="2 players"))
+        games.insert(7, _game("Azul", player_count="2-4 players"))
+
+        selected = select_candidates("for 2 players", games, limit=3)
+        assert [game["title"] for game in selected] == ["Jaipur", "Azul", "Filler 0"]
+
+    def test_deterministic(self):
+        games = [_game(f"Game {i}") for i in range(40)]
+        first = select_candidates("strategy", games, limit=10)
+        assert first == select_candidates("strategy", games, limit=10)
+        assert first == games[:10]
+
+
+class TestRecommendPrefilter:
+    def test_only_top_candidates_sent_to_ai(self, authenticated_client, db_session):
+        for i in range(6):
+            db_session.add(Game(title=f"Party Game {i}", player_count="6-10 players"))
+        db_session.add(Game(title="Jaipur", player_count="2 players"))
+        db_session.commit()
+
+        with (
+            patch("app.recommend.RECOMMEND_CANDIDATES", 3),
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch(
+                "app.main.get_game_recommendations", new_callable=AsyncMock
+            ) as mock_recommend,
+        ):
+            mock_recommend.return_value = []
+            response = authenticated_client.post(
+                "/recommend", data={"query": "a game for 2 players"}
+            )
+
+        assert response.status_code == 200
+        candidates = mock_recommend.call_args.args[1]
+        assert len(candidates) == 3
+        assert candidates[0]["title"] == "Jaipur"
+
+
+class TestLocalRecommendations:
+    def _games(self):
+        return [
+            Game(
+                id=1,
+                title="Pandemic",
+                player_count="2-4 players",
+                playtime="45 minutes",
+                complexity="Medium",
+                game_type="Cooperative",
+            ),
+            Game(
+                id=2,
+                title="Codenames",
+                player_count="4-8 players",
+                playtime="15 minutes",
+                complexity="Easy",
+                game_type="Party, Word",
+            ),
+            Game(id=3, title="Azul", player_count="2-4 players", game_type="Abstract"),
+        ]
+
+    def test_ranks_by_similarity_and_fit(self):
+        recommendations = recommend_locally(
+            "cooperative game for 2 players", self._games()
+        )
+        assert recommendations[0]["title"] == "Pandemic"
+        assert recommendations[0]["reasoning"] == (
+            'Plays 2 (2-4 players); matches "cooperative".'
+        )
+
+    def test_leaves_out_games_that_do_not_fit(self):
+        recommendations = recommend_locally("quick party game", self._games())
+        assert [game["title"] for game in recommendations] == ["Codenames"]
+
+    def test_max_recommendations(self):
+        assert len(recommend_locally("2 players", self._games(), 1)) == 1
+
+    def test_used_without_api_key(self):
+        with patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
+            assert use_local_recommendations()
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+            assert not use_local_recommendations()
+            with patch("app.recommend.RECOMMEND_MODE", "local"):
+                assert use_local_recommendations()
+
+    def test_recommend_route_without_api_key(self, authenticated_client, db_session):
+        db_session.add(Game(title="Pandemic", game_type="Cooperative"))
+        db_session.add(Game(title="Catan", game_type="Strategy"))
+        db_session.commit()
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": ""}),
+            patch(
+                "app.main.get_game_recommendations", new_callable=AsyncMock
+            ) as mock_recommend,
+        ):
+            response = authenticated_client.post(
+                "/recommend", data={"query": "a cooperative game"}
+            )
+
+        assert response.status_code == 200
+        assert "Pandemic" in response.text
+        assert "Matches &#34;cooperative&#34;." in response.text
+        mock_recommend.assert_not_called()
+
+    def test_ai_reasoning_for_local_picks(self, authenticated_client, db_session):
+        db_session.add(Game(title="Pandemic", game_type="Cooperative"))
+        db_session.commit()
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch("app.recommend.RECOMMEND_MODE", "local"),
+            patch("app.recommend.RECOMMEND_AI_REASONING", True),
+            patch(
+                "app.main.explain_recommendations", new_callable=AsyncMock
+            ) as mock_explain,
+        ):
+            mock_explain.return_value = ["Everyone wins or loses together."]
+            response = authenticated_client.post(
+                "/recommend", data={"query": "cooperative"}
+            )
+
+        assert "Everyone wins or loses together." in response.text
+        assert mock_explain.call_args.args[1][0]["title"] == "Pandemic"
+
+
+class TestRecommendationCaching:
+    def test_repeated_query_skips_the_ai(self, authenticated_client, db_session):
+        game = Game(title="Catan", game_type="Strategy")
+        db_session.add(game)
+        db_session.commit()
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch(
+                "app.main.get_game_recommendations", new_callable=AsyncMock
+            ) as mock_recommend,
+        ):
+            mock_recommend.return_value = [
+                {"title": "Catan", "reasoning": "Classic strategy"}
+            ]
+            for query in ("Strategy game", "strategy game!"):
+                response = authenticated_client.post(
+                    "/recommend", data={"query": query}
+                )
+                assert "Classic strategy" in response.text
+            assert mock_recommend.await_count == 1
+
+            # Editing a game changes the candidate set, so the AI is asked again
+            game.playtime = "60-90 minutes"
+            db_session.commit()
+            authenticated_client.post("/recommend", data={"query": "strategy game"})
+            assert mock_recommend.await_count == 2
+
+
+def _events(text):
+    """(event, data) pairs from a Server-Sent Events body"""
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = block.split("\n")
+        event = lines[0].removeprefix("event: ")
+        data = "\n".join(line.removeprefix("data: ") for line in lines[1:])
+        events.append((event, data))
+    return events
+
+
+class TestStreamedRecommendations:
+    async def _picks(self, query, games, max_recommendations=5):
+        yield {"title": "Catan", "reasoning": "Trading and building"}
+        yield {"title": "Azul", "reasoning": "Pretty tiles"}
+
+    def test_streams_one_card_per_recommendation(
+        self, authenticated_client, db_session
+    ):
+        db_session.add(Game(title="Catan", player_count="3-4 players"))
+        db_session.add(Game(title="Azul"))
+        db_session.commit()
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch("app.main.stream_game_recommendations", self._picks),
+        ):
+            response = authenticated_client.get(
+                "/recommend/stream", params={"query": "strategy"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _events(response.text)
+        assert [event for event, _ in events] == [
+            "recommendation",
+            "recommendation",
+            "done",
+        ]
+        assert "Trading and building" in events[0][1]
+        assert "3-4 players" in events[0][1]
+        assert "Pretty tiles" in events[1][1]
+        assert events[2][1] == "2"
+
+    def test_streamed_results_are_cached(self, authenticated_client, db_session):
+        db_session.add(Game(title="Catan"))
+        db_session.commit()
+        calls = []
+
+        async def picks(query, games, max_recommendations=5):
+            calls.append(query)
+            yield {"title": "Catan", "reasoning": "Trading"}
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch("app.main.stream_game_recommendations", picks),
+        ):
+            for _ in range(2):
+                response = authenticated_client.get(
+                    "/recommend/stream", params={"query": "strategy"}
+                )
+                assert "Trading" in response.text
+
+        assert len(calls) == 1
+
+    def test_interrupted_stream_is_not_cached(self, authenticated_client, db_session):
+        db_session.add(Game(title="Catan"))
+        db_session.commit()
+        calls = []
+
+        async def picks(query, games, max_recommendations=5):
+            calls.append(query)
+            yield {"title": "Catan", "reasoning": "Trading"}
+            raise Exception("Connection reset")
+
+        with (
+            patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}),
+            patch("app.main.stream_game_recommendations", picks),
+        ):
+            for _ in range(2):
+                response = authenticated_client.get(
+                    "/recommend/stream", params={"query": "strategy"}
+                )
+                events = _events(response.text)
+                assert [event for event, _ in events] == ["recommendation", "error"]
+
+        assert len(calls) == 2
+
+    def test_local_recommendations_stream(self, authenticated_client, db_session):
+        db_session.add(Game(title="Pandemic", game_type="Cooperative"))
+        db_session.commit()
+
+        with patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
+            response = authenticated_client.get(
+                "/recommend/stream", params={"query": "cooperative"}
+            )
+
+        events = _events(response.text)
+        assert events[0][0] == "recommendation"
+        assert "Pandemic" in events[0][1]
+        assert events[-1] == ("done", "1")
+
+    def test_empty_collection(self, authenticated_client):
+        response = authenticated_client.get(
+            "/recommend/stream", params={"query": "anything"}
+        )
+        assert _events(response.text)[0][0] == "error"
@@ -0,0 +1,117 @@
+import os
+from unittest.mock import patch
+
+import pytest
+import uvicorn
+
+from app.server import JitteredServer, available_cpus, main, serve, worker_count
+
+
+class TestWorkerCount:
+    """Test cases for the multi-worker launcher configuration"""
+
+    def test_worker_count_from_env(self):
+        """Test WEB_CONCURRENCY overrides the CPU-based default"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "3"}):
+            assert worker_count() == 3
+
+    def test_worker_count_defaults_to_cpus(self):
+        """Test one worker per available CPU when WEB_CONCURRENCY is unset"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": ""}):
+            assert worker_count() == available_cpus()
+
+    def test_worker_count_minimum_one(self):
+        """Test a zero or negative worker count is clamped to one"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "0"}):
+            assert worker_count() == 1
+
+    def test_worker_count_invalid(self):
+        """Test a non-numeric WEB_CONCURRENCY is rejected"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "many"}):
+            with pytest.raises(ValueError, match="WEB_CONCURRENCY"):
+                worker_count()
+
+
+class TestServerMain:
+    """Test cases for the server entry point"""
+
+    @patch("app.server.serve")
+    def test_main_runs_uvicorn_with_workers(self, mock_serve):
+        """Test the launcher preloads the app and starts uvicorn workers"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "2"}):
+            main()
+
+        mock_serve.assert_called_once()
+        config = mock_serve.call_args.args[0]
+        assert config.app == "app.main:app"
+        assert config.workers == 2
+        # Jitter is added in each worker, not here
+        assert config.limit_max_requests == 1000
+        assert config.timeout_graceful_shutdown == 30
+        # Forwarded headers are only trusted from localhost unless configured
+        assert config.forwarded_allow_ips == "127.0.0.1"
+
+    @patch("app.server.Multiprocess")
+    def test_serve_spawns_jittered_workers(self, mock_multiprocess):
+        """Test several workers run under uvicorn's supervisor as JitteredServers"""
+        config = uvicorn.Config("app.main:app", workers=2, limit_max_requests=1000)
+        with patch.object(uvicorn.Config, "bind_socket") as bind_socket:
+            serve(config)
+
+        args, kwargs = mock_multiprocess.call_args
+        assert args[0] is config
+        assert isinstance(kwargs["target"].__self__, JitteredServer)
+        assert kwargs["sockets"] == [bind_socket.return_value]
+        mock_multiprocess.return_value.run.assert_called_once()
+
+    @patch("app.server.serve")
+    def test_main_warns_about_per_worker_metrics(self, mock_run, caplog):
+        """Test several workers without METRICS_DIR log that /metrics is partial"""
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "2"}):
+            with patch("app.server.METRICS_DIR", None):
+                main()
+        assert "METRICS_DIR is not set" in caplog.text
+
+    @patch("app.server.serve")
+    def test_main_clears_old_metrics_snapshots(self, mock_run, tmp_path, caplog):
+        """Test snapshots from a previous run are removed before workers start"""
+        (tmp_path / "metrics-1.json").write_text("{}")
+        with patch.dict(os.environ, {"WEB_CONCURRENCY": "2"}):
+            with patch("app.server.METRICS_DIR", str(tmp_path)):
+                with patch("app.metrics.METRICS_DIR", str(tmp_path)):
+                    main()
+        assert list(tmp_path.iterdir()) == []
+        assert "METRICS_DIR" not in caplog.text
+
+
+class TestMaxRequestsJitter:
+    """Test cases for the per-worker max-requests limit"""
+
+    @patch("app.server.uvicorn.Server.run")
+    def test_each_worker_adds_jitter(self, mock_run):
+        """Test a worker's limit is MAX_REQUESTS plus its own random jitter"""
+        config = uvicorn.Config("app.main:app", limit_max_requests=1000)
+        with patch("app.server.random.randint", return_value=37) as randint:
+            JitteredServer(config).run()
+
+        randint.assert_called_once_with(0, 50)
+        assert config.limit_max_requests == 1037
+        mock_run.assert_called_once()
+
+    @patch("app.server.uvicorn.Server.run")
+    def test_jitter_spreads_workers(self, mock_run):
+        """Test workers spawned from one config draw different limits"""
+        limits = set()
+        for _ in range(20):
+            config = uvicorn.Config("app.main:app", limit_max_requests=1000)
+            JitteredServer(config).run()
+            limits.add(config.limit_max_requests)
+        assert len(limits) > 1
+        assert all(1000 <= limit <= 1050 for limit in limits)
+
+    @patch("app.server.uvicorn.Server.run")
+    def test_no_limit_no_jitter(self, mock_run):
+        """Test recycling stays off when MAX_REQUESTS is 0"""
+        config = uvicorn.Config("app.main:app", limit_max_requests=None)
+        JitteredServer(config).run()
+        assert config.limit_max_requests is None
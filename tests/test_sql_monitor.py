@@ -0,0 +1,88 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.metrics import RequestStats, instrument_engine
+from app.sql_monitor import (
+    assert_max_queries,
+    check_statement,
+    monitor_queries,
+    record_queries,
+    report_n_plus_one,
+    statement_shape,
+)
+
+
+class TestStatementShape:
+    """Test cases for statement normalization"""
+
+    def test_parameters_and_literals_fold(self):
+        """Test statements differing only in values share a shape"""
+        assert statement_shape("SELECT * FROM games WHERE id = 1") == statement_shape(
+            "SELECT *\n  FROM games WHERE id = 22"
+        )
+        assert statement_shape("SELECT 'a'") == statement_shape("SELECT 'b'")
+
+    def test_in_lists_fold(self):
+        """Test IN lists of different lengths share a shape"""
+        assert statement_shape("SELECT * FROM t WHERE id IN (?, ?)") == (
+            statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?, ?)")
+        )
+
+
+class TestQueryMonitor:
+    """Test cases for statement recording and N+1 detection"""
+
+    def test_record_queries(self):
+        """Test statements on a monitored engine are recorded"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+        monitor_queries()
+
+        with record_queries() as query_log:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        assert len(query_log) == 1
+
+    def test_assert_max_queries_fails_over_budget(self):
+        """Test the helper lists the statements when the budget is exceeded"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+        monitor_queries()
+
+        with pytest.raises(AssertionError, match="at most 1 queries, 2 were"):
+            with assert_max_queries(1):
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT 1"))
+                    conn.execute(text("SELECT 2"))
+
+    def test_n_plus_one_reported(self, caplog):
+        """Test repeated statement shapes in one request are flagged"""
+        stats = RequestStats(route="/games")
+        for i in range(5):
+            check_statement(f"SELECT * FROM game_ratings WHERE game_id = {i}", 0, stats)
+
+        with caplog.at_level(logging.WARNING, logger="gamedex.sql"):
+            report_n_plus_one(stats)
+        assert "Probable N+1 on /games" in caplog.text
+        assert "executed 5 times" in caplog.text
+
+    def test_n_plus_one_reported_per_request(self, authenticated_client, caplog):
+        """Test the metrics middleware runs the N+1 check after each request"""
+        with (
+            patch("app.sql_monitor.N_PLUS_ONE_THRESHOLD", 1),
+            caplog.at_level(logging.WARNING, logger="gamedex.sql"),
+        ):
+            authenticated_client.get("/settings")
+        assert "Probable N+1 on /settings" in caplog.text
+
+    def test_slow_query_logged_with_route(self, caplog):
+        """Test slow statements are logged with the route that ran them"""
+        stats = RequestStats(scope={"path": "/static/app.css"})
+
+        with caplog.at_level(logging.WARNING, logger="gamedex.sql"):
+            check_statement("SELECT 1", 1.0, stats)
+        assert "Slow query (1000.0 ms) on /static: SELECT 1" in caplog.text
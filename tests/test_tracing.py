@@ -0,0 +1,183 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+import app.tracing as tracing
+from app.metrics import instrument_engine
+from app.tracing import (
+    JsonLinesExporter,
+    configure_tracing,
+    flush_tracing,
+    parse_traceparent,
+    start_span,
+    traced,
+)
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+@pytest.fixture
+def exporter():
+    """Enable tracing into an in-memory exporter for one test"""
+    exporter = ListExporter()
+    processor = configure_tracing(exporter)
+    exporter.flush = processor.flush
+    yield exporter
+    tracing._processor = None
+
+
+class TestSpans:
+    """Test cases for span creation and export"""
+
+    def test_disabled_tracing_is_noop(self):
+        """Test start_span yields nothing when tracing is off"""
+        with start_span("work") as span:
+            assert span is None
+
+    def test_child_spans_share_trace(self, exporter):
+        """Test nested spans link to their parent"""
+        with start_span("parent") as parent:
+            with start_span("child") as child:
+                pass
+        exporter.flush()
+
+        assert child.trace_id == parent.trace_id
+        assert child.parent_span_id == parent.span_id
+        assert {span.name for span in exporter.spans} == {"parent", "child"}
+
+    def test_error_recorded(self, exporter):
+        """Test exceptions mark the span as failed"""
+        with pytest.raises(ValueError):
+            with start_span("failing"):
+                raise ValueError("boom")
+        exporter.flush()
+
+        assert exporter.spans[0].status == tracing.STATUS_ERROR
+        assert exporter.spans[0].attributes["exception.type"] == "ValueError"
+
+    async def test_traced_generator(self, exporter):
+        """Test an async generator gets one span, current only while it runs"""
+
+        @traced("numbers")
+        async def numbers():
+            with start_span("step"):
+                yield 1
+            yield 2
+
+        with start_span("caller") as caller:
+            items = []
+            async for item in numbers():
+                with start_span("handle"):
+                    items.append(item)
+        exporter.flush()
+
+        assert items == [1, 2]
+        spans = {span.name: span for span in exporter.spans}
+        assert spans["numbers"].parent_span_id == caller.span_id
+        assert spans["step"].parent_span_id == spans["numbers"].span_id
+        assert spans["handle"].parent_span_id == caller.span_id
+        assert spans["numbers"].status != tracing.STATUS_ERROR
+
+    async def test_traced_generator_error(self, exporter):
+        """Test a failing async generator marks its span as failed"""
+
+        @traced("failing")
+        async def failing():
+            yield 1
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            async for _ in failing():
+                pass
+        exporter.flush()
+
+        assert exporter.spans[0].status == tracing.STATUS_ERROR
+
+    def test_sql_spans(self, exporter):
+        """Test each SQL statement becomes a client span"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+
+        with start_span("request"):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        exporter.flush()
+
+        sql_spans = [s for s in exporter.spans if s.kind == tracing.SPAN_KIND_CLIENT]
+        assert len(sql_spans) == 1
+        assert sql_spans[0].attributes["db.statement"] == "SELECT 1"
+
+    def test_failed_sql_span(self, exporter):
+        """Test a failing statement ends its span with the error"""
+        engine = create_engine("sqlite://", poolclass=StaticPool)
+        instrument_engine(engine)
+
+        with start_span("request"):
+            with engine.connect() as conn:
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM missing_table"))
+        exporter.flush()
+
+        sql_span = next(s for s in exporter.spans if s.name == "SELECT")
+        assert sql_span.status == tracing.STATUS_ERROR
+
+    def test_flush_at_shutdown(self, exporter):
+        """Test flush_tracing exports queued spans, as the app does on shutdown"""
+        with start_span("last request"):
+            pass
+        flush_tracing()
+
+        assert [span.name for span in exporter.spans] == ["last request"]
+
+    def test_parse_traceparent(self):
+        """Test W3C trace context headers are parsed"""
+        header = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        assert parse_traceparent(header) == (
+            "0af7651916cd43dd8448eb211c80319c",
+            "b7ad6b7169203331",
+        )
+        assert parse_traceparent("garbage") == ("", "")
+
+    def test_json_lines_exporter(self, tmp_path):
+        """Test spans are written as OTLP/JSON export requests, one per line"""
+        path = tmp_path / "traces.jsonl"
+        span = tracing.Span("work", "a" * 32)
+        span.end_ns = span.start_ns + 1
+
+        JsonLinesExporter(str(path)).export([span])
+
+        line = json.loads(path.read_text().splitlines()[0])
+        otlp_span = line["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        assert otlp_span["name"] == "work"
+        assert otlp_span["traceId"] == "a" * 32
+
+
+class TestRequestTracing:
+    """Test cases for request-level tracing"""
+
+    def test_request_root_span(self, authenticated_client, exporter):
+        """Test a request produces a server span with template render children"""
+        traceparent = "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        response = authenticated_client.get(
+            "/games/new", headers={"traceparent": traceparent}
+        )
+        assert response.status_code == 200
+        exporter.flush()
+
+        root = next(s for s in exporter.spans if s.kind == tracing.SPAN_KIND_SERVER)
+        assert root.name == "GET /games/new"
+        assert root.trace_id == "0af7651916cd43dd8448eb211c80319c"
+        assert root.parent_span_id == "b7ad6b7169203331"
+        assert root.attributes["http.status_code"] == 200
+
+        render = next(s for s in exporter.spans if s.name == "render new_game.html")
+        assert render.parent_span_id == root.span_id
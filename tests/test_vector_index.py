@@ -0,0 +1,67 @@
+from datetime import UTC, datetime, timedelta
+
+from app.models import Game
+from app.vector_index import GameIndex, features, game_vector
+
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def _game(game_id, title, updated_at=NOW, **fields):
+    return Game(id=game_id, title=title, updated_at=updated_at, **fields)
+
+
+GAMES = [
+    _game(1, "Pandemic", game_type="Cooperative", description="Stop diseases together"),
+    _game(2, "Catan", game_type="Strategy, Trading", description="Trade and build"),
+    _game(3, "Codenames", game_type="Party, Word", description="Team word guessing"),
+]
+
+
+class TestVectors:
+    def test_features_are_stable_and_case_insensitive(self):
+        assert features("Deck Building") == features("deck-building")
+
+    def test_game_vector_is_unit_length(self):
+        vector = game_vector(GAMES[0])
+        assert abs(sum(weight * weight for weight in vector.values()) - 1) < 1e-9
+
+    def test_empty_game_has_empty_vector(self):
+        assert game_vector(Game(title="")) == {}
+
+
+class TestGameIndex:
+    def test_search_ranks_by_similarity(self):
+        index = GameIndex()
+        index.sync(GAMES)
+        results = index.search("cooperative game")
+        assert results[0][0] == 1
+        assert 0 < results[0][1] <= 1
+
+    def test_prefixes_match_partial_words(self):
+        index = GameIndex()
+        index.sync(GAMES)
+        assert index.search("coop")[0][0] == 1
+
+    def test_no_match(self):
+        index = GameIndex()
+        index.sync(GAMES)
+        assert index.search("xyzzy") == []
+
+    def test_sync_only_reindexes_changed_games(self):
+        index = GameIndex()
+        assert index.sync(GAMES) == 3
+        assert index.sync(GAMES) == 0
+
+        edited = _game(
+            2, "Catan", updated_at=NOW + timedelta(minutes=1), game_type="Cooperative"
+        )
+        assert index.sync([GAMES[0], edited, GAMES[2]]) == 1
+        assert {game_id for game_id, _ in index.search("cooperative")} == {1, 2}
+
+    def test_sync_drops_deleted_games(self):
+        index = GameIndex()
+        index.sync(GAMES)
+        index.sync(GAMES[1:])
+        assert len(index) == 2
+        assert 1 not in index.games
+        assert index.search("pandemic") == []